@@ -1,12 +1,15 @@
+import asyncio
 import base64
 import json
 import os
+import random
 import re
 import time
 
 import pandas as pd
 from azure.identity import get_bearer_token_provider
 from azure.identity import AzureCliCredential
+from azure.identity.aio import AzureCliCredential as AsyncAzureCliCredential
 from azure.keyvault.secrets import SecretClient
 from azure.search.documents import SearchClient
 from azure.search.documents.indexes import SearchIndexClient
@@ -31,8 +34,9 @@ from azure.storage.filedatalake import (
     DataLakeServiceClient,
     FileSystemClient,
 )
-from azure.ai.projects import AIProjectClient
+from azure.ai.projects.aio import AIProjectClient
 from datetime import datetime
+from openai import APIConnectionError, APITimeoutError, InternalServerError, RateLimitError
 
 # Get Azure Key Vault Client
 key_vault_name = "kv_to-be-replaced"  #'nc6262-kv-2fpeafsylfd2e'
@@ -40,6 +44,14 @@ managed_identity_client_id = "mici_to-be-replaced"
 
 index_name = "transcripts_index"
 
+# Embedding throughput; keep the tokens per minute at or below the deployment's quota
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "16"))
+EMBEDDING_BATCH_MAX_TOKENS = int(os.getenv("EMBEDDING_BATCH_MAX_TOKENS", "32000"))
+EMBEDDING_CONCURRENCY = int(os.getenv("EMBEDDING_CONCURRENCY", "4"))
+EMBEDDING_TOKENS_PER_MINUTE = int(os.getenv("EMBEDDING_TOKENS_PER_MINUTE", "120000"))
+EMBEDDING_MAX_RETRIES = int(os.getenv("EMBEDDING_MAX_RETRIES", "8"))
+UPLOAD_BATCH_SIZE = 100
+
 file_system_client_name = "data"
 directory = "clienttranscripts/meeting_transcripts"
 csv_file_name = (
@@ -136,25 +148,136 @@ result = index_client.create_or_update_index(index)
 print(f" {result.name} created")
 
 
-# Function: Get Embeddings
-def get_embeddings(text: str, ai_project_endpoint, openai_api_version, credential):
+# Embeddings: many chunks per request, a few requests in flight, one client
+def estimate_tokens(text):
+    # Deliberately high (about 3 characters per token) so batches stay under limits
+    return len(text) // 3 + 1
+
+
+def make_batches(texts, max_items, max_tokens):
+    """Group text indices into batches of at most max_items texts and max_tokens tokens."""
+    batches = []
+    current, current_tokens = [], 0
+    for i, text in enumerate(texts):
+        tokens = estimate_tokens(text)
+        if current and (len(current) >= max_items or current_tokens + tokens > max_tokens):
+            batches.append((current, current_tokens))
+            current, current_tokens = [], 0
+        current.append(i)
+        current_tokens += tokens
+    if current:
+        batches.append((current, current_tokens))
+    return batches
+
+
+class TokenBucket:
+    """Spreads requests so the estimated tokens stay under a per-minute quota."""
+
+    def __init__(self, tokens_per_minute):
+        self.capacity = tokens_per_minute
+        self.tokens = tokens_per_minute
+        self.rate = tokens_per_minute / 60
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, tokens):
+        tokens = min(tokens, self.capacity)
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self.tokens) / self.rate)
+
+    def drain(self):
+        # The service throttled us, so nobody gets to send until the bucket refills
+        self.tokens = 0
+        self.updated = time.monotonic()
+
+
+def retry_after_seconds(error):
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    for name, scale in (("retry-after-ms", 0.001), ("retry-after", 1)):
+        value = headers.get(name)
+        if value:
+            try:
+                return float(value) * scale
+            except ValueError:
+                pass
+    return None
+
+
+async def embed_batch(openai_client, bucket, texts, tokens, model_id):
+    for attempt in range(EMBEDDING_MAX_RETRIES + 1):
+        await bucket.acquire(tokens)
+        try:
+            response = await openai_client.embeddings.create(input=texts, model=model_id)
+            return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+        except (RateLimitError, APIConnectionError, APITimeoutError, InternalServerError) as e:
+            if attempt >= EMBEDDING_MAX_RETRIES:
+                raise
+            delay = retry_after_seconds(e)
+            if delay is None and isinstance(e, RateLimitError):
+                # No hint from the service: wait for the shared bucket to refill
+                bucket.drain()
+                print("Embedding request throttled, waiting for the token bucket to refill")
+                continue
+            if delay is None:
+                delay = min(60, 2 ** attempt) + random.uniform(0, 1)
+            print(f"Embedding request failed ({type(e).__name__}), retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+
+async def embed_and_upload(docs, upload_documents, ai_project_endpoint, openai_api_version):
+    """
+    Embed docs over one client and upload them UPLOAD_BATCH_SIZE at a time, so
+    only one upload batch of vectors is held in memory.
+    """
     model_id = openai_embedding_model or "text-embedding-ada-002"
-    
-    # Create AI Projects client
-    project_client = AIProjectClient(
+    bucket = TokenBucket(EMBEDDING_TOKENS_PER_MINUTE)
+    semaphore = asyncio.Semaphore(EMBEDDING_CONCURRENCY)
+
+    async with AsyncAzureCliCredential() as async_credential, AIProjectClient(
         endpoint=ai_project_endpoint,
-        credential=credential,
+        credential=async_credential,
         api_version=openai_api_version,
-    )
-    
-    # Get the OpenAI client from the AI Projects client
-    openai_client = project_client.get_openai_client(
-        api_version=openai_api_version
-    )
+    ) as project_client:
+        openai_client = await project_client.get_openai_client(api_version=openai_api_version)
+        # Retries are handled here so they can share the token bucket
+        openai_client = openai_client.with_options(max_retries=0)
+
+        async def embed(texts, vectors, indices, tokens):
+            async with semaphore:
+                embeddings = await embed_batch(
+                    openai_client, bucket, [texts[i] for i in indices], tokens, model_id
+                )
+            for i, embedding in zip(indices, embeddings):
+                vectors[i] = embedding
 
-    embedding = openai_client.embeddings.create(input=text, model=model_id).data[0].embedding
-
-    return embedding
+        try:
+            for start in range(0, len(docs), UPLOAD_BATCH_SIZE):
+                batch = docs[start:start + UPLOAD_BATCH_SIZE]
+                texts = [doc["content"] for doc in batch]
+                vectors = [None] * len(texts)
+                await asyncio.gather(
+                    *(
+                        embed(texts, vectors, indices, tokens)
+                        for indices, tokens in make_batches(
+                            texts, EMBEDDING_BATCH_SIZE, EMBEDDING_BATCH_MAX_TOKENS
+                        )
+                    )
+                )
+                await asyncio.to_thread(
+                    upload_documents,
+                    [{**doc, "contentVector": vector} for doc, vector in zip(batch, vectors)],
+                )
+                print(f" {start + len(batch)}/{len(docs)} chunks embedded and uploaded")
+        finally:
+            await openai_client.close()
 
 
 def clean_spaces_with_regex(text):
@@ -289,16 +412,6 @@ for path in paths:
 
         counter += 1
 
-        try:
-            v_contentVector = get_embeddings(
-                d["content"], ai_project_endpoint, openai_api_version, credential
-            )
-        except:
-            time.sleep(30)
-            v_contentVector = get_embeddings(
-                d["content"], ai_project_endpoint, openai_api_version, credential
-            )
-
         docs.append(
             {
                 "id": base64.urlsafe_b64encode(
@@ -311,15 +424,15 @@ for path in paths:
                 "meeting_start_time": meeting_start_time,
                 "meeting_end_time": meeting_end_time,
                 "meeting_title": meeting_title,
-                "contentVector": v_contentVector,
             }
         )
 
-        if counter % 10 == 0:
-            result = search_client.upload_documents(documents=docs)
-            docs = []
-            print(f" {str(counter)} uploaded")
-
-# upload the last batch
-if docs != []:
-    search_client.upload_documents(documents=docs)
+print(f" {counter} chunks to embed")
+asyncio.run(
+    embed_and_upload(
+        docs,
+        lambda batch: search_client.upload_documents(documents=batch),
+        ai_project_endpoint,
+        openai_api_version,
+    )
+)
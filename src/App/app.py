@@ -1,14 +1,14 @@
-import copy
 import json
 import logging
 import os
+import socket
 import time
 import uuid
-from types import SimpleNamespace
+from collections.abc import Mapping
+from types import MappingProxyType
 
 from backend.helpers.azure_credential_utils import get_azure_credential
 from azure.monitor.opentelemetry import configure_azure_monitor
-from azure.ai.projects import AIProjectClient
 
 # from quart.sessions import SecureCookieSessionInterface
 from opentelemetry import trace
@@ -17,6 +17,7 @@ from quart import (
     Blueprint,
     Quart,
     Response,
+    current_app,
     jsonify,
     render_template,
     request,
@@ -26,15 +27,33 @@ from quart import (
 from backend.agents.agent_factory import AgentFactory
 from backend.auth.auth_utils import get_authenticated_user_details, get_tenantid
 from backend.common.config import config
-from backend.common.event_utils import track_event_if_configured
+from backend.common.event_utils import (
+    get_event_pipeline,
+    shutdown_event_pipeline,
+    track_event_if_configured,
+)
+from backend.common.metrics import record_stage, render_gauges, stage_histograms
+from backend.common.sse import (
+    EVENT_STREAM_MIMETYPE,
+    ReplayRegistry,
+    event_stream,
+    parse_event_id,
+    wants_event_stream,
+)
+from backend.common.stream_coalescer import coalesce_deltas
 from backend.common.utils import (
+    RedactedJSON,
+    StreamChunkEncoder,
+    close_graph_session,
     format_stream_response,
     generateFilterString,
     parse_multi_columns,
 )
+from backend.helpers.openai_client_registry import OpenAIClientRegistry
 from backend.services import sqldb_service
 from backend.services.chat_service import stream_response_from_wealth_assistant
 from backend.services.cosmosdb_service import CosmosConversationClient
+from backend.services.maintenance_scheduler import MaintenanceScheduler
 
 bp = Blueprint("routes", __name__, static_folder="static", template_folder="static")
 
@@ -83,25 +102,69 @@ def create_app():
     # Setup agent initialization and cleanup
     @app.before_serving
     async def startup():
-        app.wealth_advisor_agent = await AgentFactory.get_wealth_advisor_agent()
-        logging.info("Wealth Advisor Agent initialized during application startup")
-        app.search_agent = await AgentFactory.get_search_agent()
-        logging.info("Call Transcript Search Agent initialized during application startup")
-        app.sql_agent = await AgentFactory.get_sql_agent()
-        logging.info("SQL Agent initialized during application startup")
+        # Decide once whether custom events are sent and start the flusher
+        get_event_pipeline()
+        app.openai_client_registry = OpenAIClientRegistry()
+        app.sse_replay_registry = ReplayRegistry(
+            max_events=config.SSE_REPLAY_MAX_EVENTS,
+            ttl=config.SSE_REPLAY_TTL_SECONDS,
+            orphan_timeout=config.SSE_ORPHAN_TIMEOUT_SECONDS,
+        )
+        if SHOULD_USE_DATA:
+            # Fail fast on search misconfiguration
+            app.data_source_template = build_data_source_template()
+        app.cosmos_conversation_client = None
+        try:
+            app.cosmos_conversation_client = init_cosmosdb_client()
+            if app.cosmos_conversation_client:
+                _, message = await app.cosmos_conversation_client.check_health()
+                logging.info(f"CosmosDB conversation client initialized: {message}")
+        except Exception:
+            logging.exception("CosmosDB conversation client could not be initialized")
+        try:
+            await sqldb_service.init_pool()
+            logging.info("SQL connection pool initialized during application startup")
+        except Exception:
+            logging.exception("SQL connection pool could not be warmed up")
+        app.maintenance_scheduler = MaintenanceScheduler()
+        app.maintenance_scheduler.add_job(
+            "roll_sample_data_dates",
+            sqldb_service.roll_sample_data_dates,
+            interval=config.SAMPLE_DATA_MAINTENANCE_INTERVAL_SECONDS,
+        )
+        app.maintenance_scheduler.start()
+        app.wealth_advisor_agent = await AgentFactory.initialize_agents(
+            warm_in_background=config.AGENT_BACKGROUND_WARMUP
+        )
+        logging.info("Agents initialized during application startup")
 
     @app.after_serving
     async def shutdown():
         try:
             logging.info("Application shutdown initiated...")
+            if getattr(app, 'maintenance_scheduler', None) is not None:
+                await app.maintenance_scheduler.stop()
+                app.maintenance_scheduler = None
+                logging.info("Maintenance scheduler stopped")
+            if getattr(app, 'sse_replay_registry', None) is not None:
+                await app.sse_replay_registry.close()
+                app.sse_replay_registry = None
             await AgentFactory.delete_all_agent_instance()
             if hasattr(app, 'wealth_advisor_agent'):
                 app.wealth_advisor_agent = None
-            if hasattr(app, 'search_agent'):
-                app.search_agent = None
-            if hasattr(app, 'sql_agent'):
-                app.sql_agent = None
             logging.info("Agents cleaned up successfully")
+            if getattr(app, 'openai_client_registry', None) is not None:
+                await app.openai_client_registry.close()
+                app.openai_client_registry = None
+                logging.info("OpenAI client registry closed")
+            if getattr(app, 'cosmos_conversation_client', None) is not None:
+                await app.cosmos_conversation_client.close()
+                app.cosmos_conversation_client = None
+                logging.info("CosmosDB conversation client closed")
+            await sqldb_service.close_pool()
+            logging.info("SQL connection pool closed")
+            await close_graph_session()
+            shutdown_event_pipeline()
         except Exception as e:
             logging.error(f"Error during shutdown: {e}")
             logging.exception("Detailed error during shutdown")
@@ -167,9 +230,82 @@ def should_use_data():
 SHOULD_USE_DATA = should_use_data()
 
 
-# Initialize Azure AI Projects Client
-def init_ai_projects_client(use_data=SHOULD_USE_DATA):
-    ai_projects_client = None
+def get_openai_client_registry():
+    """
+    Return the app-scoped OpenAI client registry, creating it if the
+    before_serving hook has not run (e.g. under the test client).
+    """
+    registry = getattr(current_app, "openai_client_registry", None)
+    if registry is None:
+        registry = OpenAIClientRegistry()
+        current_app.openai_client_registry = registry
+    return registry
+
+
+def get_sse_replay_registry():
+    """
+    Return the app-scoped SSE replay registry, creating it if the
+    before_serving hook has not run (e.g. under the test client).
+    """
+    registry = getattr(current_app, "sse_replay_registry", None)
+    if registry is None:
+        registry = ReplayRegistry(
+            max_events=config.SSE_REPLAY_MAX_EVENTS,
+            ttl=config.SSE_REPLAY_TTL_SECONDS,
+            orphan_timeout=config.SSE_ORPHAN_TIMEOUT_SECONDS,
+        )
+        current_app.sse_replay_registry = registry
+    return registry
+
+
+def event_stream_response(buffer, after=0):
+    response = Response(
+        event_stream(buffer, after, heartbeat=config.SSE_HEARTBEAT_SECONDS),
+        content_type=EVENT_STREAM_MIMETYPE,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+    response.timeout = None
+    return response
+
+
+def resume_event_stream(last_event_id):
+    parsed = parse_event_id(last_event_id)
+    buffer = get_sse_replay_registry().get(parsed[0]) if parsed else None
+    if buffer is None:
+        # Expired, never started, or started on another worker: the replay
+        # registry is held in process memory.
+        track_event_if_configured("sse_resume_unavailable", {"reason": "stream_not_found"})
+        return jsonify({
+            "error": "The stream to resume is not available on this worker",
+            "code": "stream_not_found",
+        }), 404
+    if not buffer.can_resume(parsed[1]):
+        # The client fell more than SSE_REPLAY_MAX_EVENTS events behind
+        track_event_if_configured("sse_resume_unavailable", {"reason": "events_evicted"})
+        return jsonify({
+            "error": f"Events after {parsed[1]} are no longer buffered",
+            "code": "events_evicted",
+        }), 410
+    track_event_if_configured("sse_resumed", {"stream_id": buffer.stream_id})
+    return event_stream_response(buffer, after=parsed[1])
+
+
+def resume_requested(request_headers):
+    """
+    Return the resume response when the request is an SSE reconnect
+    (``Last-Event-ID`` set), otherwise None. Routes call this before doing
+    any work, so a reconnect never writes to chat history again.
+    """
+    if not config.USE_INTERNAL_STREAM:
+        return None
+    last_event_id = request_headers.get("Last-Event-ID")
+    if not last_event_id or not wants_event_stream(request_headers.get("Accept", "")):
+        return None
+    return resume_event_stream(last_event_id)
+
+
+# Get the pooled Azure OpenAI client from the Azure AI Projects registry
+async def init_ai_projects_client(use_data=SHOULD_USE_DATA):
     try:
         # API version check
         if (
@@ -186,27 +322,9 @@ def init_ai_projects_client(use_data=SHOULD_USE_DATA):
                 "AI_PROJECT_ENDPOINT is required for Azure AI Projects client"
             )
 
-        # Authentication using managed identity
-        credential = get_azure_credential(config.MID_ID)
-        # Create AI Projects client
-        ai_projects_client = AIProjectClient(
-            endpoint=config.AI_PROJECT_ENDPOINT,
-            credential=credential,
-            api_version=config.AZURE_OPENAI_PREVIEW_API_VERSION,
-        )
-
-        # Get the OpenAI client from the AI Projects client
-        openai_client = ai_projects_client.get_openai_client(
-            api_version=config.AZURE_OPENAI_PREVIEW_API_VERSION
-        )
-
-        track_event_if_configured(
-            "AzureAIProjectsClientInitialized",
-            {
-                "status": "success",
-                "endpoint": config.AI_PROJECT_ENDPOINT,
-                "use_managed_identity": True,
-            },
+        # One pooled client (HTTP connections and cached token) per endpoint and API version
+        openai_client = await get_openai_client_registry().get_client(
+            config.AI_PROJECT_ENDPOINT, config.AZURE_OPENAI_PREVIEW_API_VERSION
         )
 
         return openai_client
@@ -216,7 +334,6 @@ def init_ai_projects_client(use_data=SHOULD_USE_DATA):
         if span is not None:
             span.record_exception(e)
             span.set_status(Status(StatusCode.ERROR, str(e)))
-        ai_projects_client = None
         raise e
 
 
@@ -265,107 +382,106 @@ def init_cosmosdb_client():
     return cosmos_conversation_client
 
 
-def get_configured_data_source():
-    data_source = {}
-    query_type = "simple"
-    if DATASOURCE_TYPE == "AzureCognitiveSearch":
-        track_event_if_configured(
-            "datasource_selected", {"type": "AzureCognitiveSearch"}
-        )
-        # Set query type
-        if config.AZURE_SEARCH_QUERY_TYPE:
-            query_type = config.AZURE_SEARCH_QUERY_TYPE
-        elif (
-            config.AZURE_SEARCH_USE_SEMANTIC_SEARCH.lower() == "true"
-            and config.AZURE_SEARCH_SEMANTIC_SEARCH_CONFIG
-        ):
-            query_type = "semantic"
-        track_event_if_configured("query_type_determined", {"query_type": query_type})
-
-        # Set filter
-        filter = None
-        userToken = None
-        if config.AZURE_SEARCH_PERMITTED_GROUPS_COLUMN:
-            userToken = request.headers.get("X-MS-TOKEN-AAD-ACCESS-TOKEN", "")
-            logging.debug(f"USER TOKEN is {'present' if userToken else 'not present'}")
-            if not userToken:
-                track_event_if_configured("user_token_missing", {})
-                raise Exception(
-                    "Document-level access control is enabled, but user access token could not be fetched."
-                )
+def get_cosmos_conversation_client():
+    """
+    Return the app-lifetime CosmosConversationClient, creating it on first use
+    if the before_serving hook did not (or could not) create it.
+    """
+    cosmos_conversation_client = getattr(
+        current_app, "cosmos_conversation_client", None
+    )
+    if cosmos_conversation_client is None:
+        cosmos_conversation_client = init_cosmosdb_client()
+        current_app.cosmos_conversation_client = cosmos_conversation_client
+    return cosmos_conversation_client
 
-            filter = generateFilterString(userToken)
-            track_event_if_configured("filter_generated", {"filter": filter})
-            logging.debug(f"FILTER: {filter}")
 
-        # Set authentication
-        authentication = {}
-        if config.AZURE_SEARCH_KEY:
-            authentication = {"type": "api_key", "api_key": config.AZURE_SEARCH_KEY}
-        else:
-            # If key is not provided, assume AOAI resource identity has been granted access to the search service
-            authentication = {"type": "system_assigned_managed_identity"}
-        track_event_if_configured(
-            "authentication_set", {"auth_type": authentication["type"]}
-        )
+def build_data_source_template():
+    """
+    Build the azure_search data source from config once.
 
-        data_source = {
-            "type": "azure_search",
-            "parameters": {
-                "endpoint": f"https://{config.AZURE_SEARCH_SERVICE}.search.windows.net",
-                "authentication": authentication,
-                "index_name": config.AZURE_SEARCH_INDEX,
-                "fields_mapping": {
-                    "content_fields": (
-                        parse_multi_columns(config.AZURE_SEARCH_CONTENT_COLUMNS)
-                        if config.AZURE_SEARCH_CONTENT_COLUMNS
-                        else []
-                    ),
-                    "title_field": (
-                        config.AZURE_SEARCH_TITLE_COLUMN
-                        if config.AZURE_SEARCH_TITLE_COLUMN
-                        else None
-                    ),
-                    "url_field": (
-                        config.AZURE_SEARCH_URL_COLUMN
-                        if config.AZURE_SEARCH_URL_COLUMN
-                        else None
-                    ),
-                    "filepath_field": (
-                        config.AZURE_SEARCH_FILENAME_COLUMN
-                        if config.AZURE_SEARCH_FILENAME_COLUMN
-                        else None
-                    ),
-                    "vector_fields": (
-                        parse_multi_columns(config.AZURE_SEARCH_VECTOR_COLUMNS)
-                        if config.AZURE_SEARCH_VECTOR_COLUMNS
-                        else []
-                    ),
-                },
-                "in_scope": (
-                    True
-                    if config.AZURE_SEARCH_ENABLE_IN_DOMAIN.lower() == "true"
-                    else False
-                ),
-                "top_n_documents": (int(config.AZURE_SEARCH_TOP_K)),
-                "query_type": query_type,
-                "semantic_configuration": (
-                    config.AZURE_SEARCH_SEMANTIC_SEARCH_CONFIG
-                    if config.AZURE_SEARCH_SEMANTIC_SEARCH_CONFIG
-                    else ""
-                ),
-                "role_information": config.AZURE_OPENAI_SYSTEM_MESSAGE,
-                "filter": filter,
-                "strictness": (int(config.AZURE_SEARCH_STRICTNESS)),
-            },
-        }
-    else:
+    Everything except the per-user permission filter is fixed for the life of
+    the process, so misconfiguration surfaces here at startup instead of as a
+    500 on the first chat request.
+    """
+    query_type = "simple"
+    if DATASOURCE_TYPE != "AzureCognitiveSearch":
         track_event_if_configured("unknown_datasource_type", {"type": DATASOURCE_TYPE})
         raise Exception(
             f"DATASOURCE_TYPE is not configured or unknown: {DATASOURCE_TYPE}"
         )
+    track_event_if_configured("datasource_selected", {"type": "AzureCognitiveSearch"})
+
+    # Set query type
+    if config.AZURE_SEARCH_QUERY_TYPE:
+        query_type = config.AZURE_SEARCH_QUERY_TYPE
+    elif (
+        config.AZURE_SEARCH_USE_SEMANTIC_SEARCH.lower() == "true"
+        and config.AZURE_SEARCH_SEMANTIC_SEARCH_CONFIG
+    ):
+        query_type = "semantic"
+    track_event_if_configured("query_type_determined", {"query_type": query_type})
+
+    # Set authentication
+    authentication = {}
+    if config.AZURE_SEARCH_KEY:
+        authentication = {"type": "api_key", "api_key": config.AZURE_SEARCH_KEY}
+    else:
+        # If key is not provided, assume AOAI resource identity has been granted access to the search service
+        authentication = {"type": "system_assigned_managed_identity"}
+    track_event_if_configured(
+        "authentication_set", {"auth_type": authentication["type"]}
+    )
+
+    parameters = {
+        "endpoint": f"https://{config.AZURE_SEARCH_SERVICE}.search.windows.net",
+        "authentication": authentication,
+        "index_name": config.AZURE_SEARCH_INDEX,
+        "fields_mapping": {
+            "content_fields": (
+                parse_multi_columns(config.AZURE_SEARCH_CONTENT_COLUMNS)
+                if config.AZURE_SEARCH_CONTENT_COLUMNS
+                else []
+            ),
+            "title_field": (
+                config.AZURE_SEARCH_TITLE_COLUMN
+                if config.AZURE_SEARCH_TITLE_COLUMN
+                else None
+            ),
+            "url_field": (
+                config.AZURE_SEARCH_URL_COLUMN
+                if config.AZURE_SEARCH_URL_COLUMN
+                else None
+            ),
+            "filepath_field": (
+                config.AZURE_SEARCH_FILENAME_COLUMN
+                if config.AZURE_SEARCH_FILENAME_COLUMN
+                else None
+            ),
+            "vector_fields": (
+                parse_multi_columns(config.AZURE_SEARCH_VECTOR_COLUMNS)
+                if config.AZURE_SEARCH_VECTOR_COLUMNS
+                else []
+            ),
+        },
+        "in_scope": (
+            True
+            if config.AZURE_SEARCH_ENABLE_IN_DOMAIN.lower() == "true"
+            else False
+        ),
+        "top_n_documents": (int(config.AZURE_SEARCH_TOP_K)),
+        "query_type": query_type,
+        "semantic_configuration": (
+            config.AZURE_SEARCH_SEMANTIC_SEARCH_CONFIG
+            if config.AZURE_SEARCH_SEMANTIC_SEARCH_CONFIG
+            else ""
+        ),
+        "role_information": config.AZURE_OPENAI_SYSTEM_MESSAGE,
+        "filter": None,
+        "strictness": (int(config.AZURE_SEARCH_STRICTNESS)),
+    }
 
-    if "vector" in query_type.lower() and DATASOURCE_TYPE != "AzureMLIndex":
+    if "vector" in query_type.lower():
         embeddingDependency = {}
         if config.AZURE_OPENAI_EMBEDDING_NAME:
             embeddingDependency = {
@@ -395,15 +511,70 @@ def get_configured_data_source():
             "embedding_dependency_set",
             {"embedding_type": embeddingDependency.get("type")},
         )
-        data_source["parameters"]["embedding_dependency"] = embeddingDependency
-    track_event_if_configured(
-        "get_configured_data_source_complete",
-        {"datasource_type": DATASOURCE_TYPE, "query_type": query_type},
-    )
+        parameters["embedding_dependency"] = embeddingDependency
+
+    # Read-only all the way down; requests get a mutable copy via _thaw
+    return _freeze({"type": "azure_search", "parameters": parameters})
+
+
+def _freeze(value):
+    """
+    Recursively turn dicts into read-only mapping proxies and lists into tuples.
+    """
+    if isinstance(value, Mapping):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _thaw(value):
+    """
+    Return a plain, JSON-serializable deep copy of a value made by ``_freeze``.
+    """
+    if isinstance(value, Mapping):
+        return {key: _thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(item) for item in value]
+    return value
+
+
+def get_data_source_template():
+    """
+    Return the data source template built at startup, building it on first
+    use if the before_serving hook has not run (e.g. under the test client).
+    """
+    template = getattr(current_app, "data_source_template", None)
+    if template is None:
+        template = build_data_source_template()
+        current_app.data_source_template = template
+    return template
+
+
+async def get_configured_data_source():
+    template = get_data_source_template()
+
+    # Set filter
+    filter = None
+    if config.AZURE_SEARCH_PERMITTED_GROUPS_COLUMN:
+        userToken = request.headers.get("X-MS-TOKEN-AAD-ACCESS-TOKEN", "")
+        logging.debug(f"USER TOKEN is {'present' if userToken else 'not present'}")
+        if not userToken:
+            track_event_if_configured("user_token_missing", {})
+            raise Exception(
+                "Document-level access control is enabled, but user access token could not be fetched."
+            )
+
+        filter = await generateFilterString(userToken)
+        track_event_if_configured("filter_generated", {"filter": filter})
+        logging.debug(f"FILTER: {filter}")
+
+    data_source = _thaw(template)
+    data_source["parameters"]["filter"] = filter
     return data_source
 
 
-def prepare_model_args(request_body, request_headers):
+async def prepare_model_args(request_body, request_headers):
     track_event_if_configured("prepare_model_args_start", {})
     request_messages = request_body.get("messages", [])
     messages = []
@@ -448,47 +619,10 @@ def prepare_model_args(request_body, request_headers):
         "user": user_json,
     }
 
-    if config.SHOULD_USE_DATA:
-        track_event_if_configured(
-            "ms_defender_user_info_added", {"user_id": user_args["EndUserId"]}
-        )
-        model_args["extra_body"] = {"data_sources": [get_configured_data_source()]}
-
-    model_args_clean = copy.deepcopy(model_args)
-    if model_args_clean.get("extra_body"):
-        secret_params = [
-            "key",
-            "connection_string",
-            "embedding_key",
-            "encoded_api_key",
-            "api_key",
-        ]
-        for secret_param in secret_params:
-            if model_args_clean["extra_body"]["data_sources"][0]["parameters"].get(
-                secret_param
-            ):
-                model_args_clean["extra_body"]["data_sources"][0]["parameters"][
-                    secret_param
-                ] = "*****"
-        authentication = model_args_clean["extra_body"]["data_sources"][0][
-            "parameters"
-        ].get("authentication", {})
-        for field in authentication:
-            if field in secret_params:
-                model_args_clean["extra_body"]["data_sources"][0]["parameters"][
-                    "authentication"
-                ][field] = "*****"
-        embeddingDependency = model_args_clean["extra_body"]["data_sources"][0][
-            "parameters"
-        ].get("embedding_dependency", {})
-        if "authentication" in embeddingDependency:
-            for field in embeddingDependency["authentication"]:
-                if field in secret_params:
-                    model_args_clean["extra_body"]["data_sources"][0]["parameters"][
-                        "embedding_dependency"
-                    ]["authentication"][field] = "*****"
-
-    logging.debug(f"REQUEST BODY: {json.dumps(model_args_clean, indent=4)}")
+    if SHOULD_USE_DATA:
+        model_args["extra_body"] = {"data_sources": [await get_configured_data_source()]}
+
+    logging.debug("REQUEST BODY: %s", RedactedJSON(model_args))
     track_event_if_configured(
         "prepare_model_args_complete", {"model": config.AZURE_OPENAI_MODEL}
     )
@@ -505,10 +639,10 @@ async def send_chat_request(request_body, request_headers):
             filtered_messages.append(message)
 
     request_body["messages"] = filtered_messages
-    model_args = prepare_model_args(request_body, request_headers)
+    model_args = await prepare_model_args(request_body, request_headers)
 
     try:
-        azure_openai_client = init_ai_projects_client()
+        azure_openai_client = await init_ai_projects_client()
         raw_response = (
             await azure_openai_client.chat.completions.with_raw_response.create(
                 **model_args
@@ -531,8 +665,11 @@ async def send_chat_request(request_body, request_headers):
 
 
 async def stream_chat_request(request_body, request_headers):
+    request_started = time.perf_counter()
     track_event_if_configured("stream_chat_request_start", {})
     if config.USE_INTERNAL_STREAM:
+        use_sse = wants_event_stream(request_headers.get("Accept", ""))
+
         history_metadata = request_body.get("history_metadata", {})
         apim_request_id = ""
 
@@ -546,41 +683,34 @@ async def stream_chat_request(request_body, request_headers):
         sk_response = await stream_response_from_wealth_assistant(query, client_id)
 
         async def generate():
-            chunk_id = str(uuid.uuid4())
-            created_time = int(time.time())
-
-            async for chunk in sk_response():
-                deltaText = ""
-                deltaText = chunk.content
-
-                completionChunk = {
-                    "id": chunk_id,
-                    "model": config.AZURE_OPENAI_MODEL,
-                    "created": created_time,
-                    "object": "extensions.chat.completion.chunk",
-                    "choices": [
-                        {
-                            "messages": [{"role": "assistant", "content": deltaText}],
-                            "delta": {"role": "assistant", "content": deltaText},
-                        }
-                    ],
-                    "apim-request-id": request_headers.get("apim-request-id", ""),
-                    "history_metadata": history_metadata,
-                }
-
-                completionChunk2 = json.loads(
-                    json.dumps(completionChunk),
-                    object_hook=lambda d: SimpleNamespace(**d),
-                )
-
-                yield json.dumps(
-                    format_stream_response(
-                        completionChunk2,
-                        history_metadata,
-                        request_headers.get("apim-request-id", ""),
-                    )
-                ) + "\n"
+            encoder = StreamChunkEncoder(
+                str(uuid.uuid4()),
+                config.AZURE_OPENAI_MODEL,
+                int(time.time()),
+                history_metadata,
+                request_headers.get("apim-request-id", ""),
+            )
 
+            # sk_response yields delta text and ToolProgress events
+            first_token = True
+            async for item in coalesce_deltas(
+                sk_response(),
+                max_bytes=config.STREAM_FLUSH_MAX_BYTES,
+                max_ms=config.STREAM_FLUSH_MAX_MS,
+                sentence_boundary=config.STREAM_FLUSH_ON_SENTENCE,
+            ):
+                if isinstance(item, str):
+                    if first_token:
+                        first_token = False
+                        record_stage("first_token", time.perf_counter() - request_started)
+                    yield encoder.encode(item)
+                else:
+                    yield encoder.encode_progress(item)
+            record_stage("last_token", time.perf_counter() - request_started)
+
+        if use_sse:
+            buffer = get_sse_replay_registry().start(generate())
+            return event_stream_response(buffer)
         return Response(generate(), content_type="application/json-lines")
 
     else:
@@ -629,6 +759,9 @@ async def conversation_internal(request_body, request_headers):
 
 @bp.route("/conversation", methods=["POST"])
 async def conversation():
+    resumed = resume_requested(request.headers)
+    if resumed is not None:
+        return resumed
     if not request.is_json:
         track_event_if_configured("invalid_request_format", {})
         return jsonify({"error": "request must be json"}), 415
@@ -655,6 +788,9 @@ def get_frontend_settings():
 async def add_conversation():
     authenticated_user = get_authenticated_user_details(request_headers=request.headers)
     user_id = authenticated_user["user_principal_id"]
+    resumed = resume_requested(request.headers)
+    if resumed is not None:
+        return resumed
     track_event_if_configured("HistoryGenerate_Start", {"user_id": user_id})
 
     # check request for conversation_id
@@ -663,7 +799,7 @@ async def add_conversation():
 
     try:
         # make sure cosmos is configured
-        cosmos_conversation_client = init_cosmosdb_client()
+        cosmos_conversation_client = get_cosmos_conversation_client()
         if not cosmos_conversation_client:
             raise Exception("CosmosDB is not configured or not working")
 
@@ -714,8 +850,6 @@ async def add_conversation():
         else:
             raise Exception("No user message found")
 
-        await cosmos_conversation_client.cosmosdb_client.close()
-
         # Submit request to Chat Completions for response
         request_body = await request.get_json()
         history_metadata["conversation_id"] = conversation_id
@@ -756,7 +890,7 @@ async def update_conversation():
 
     try:
         # make sure cosmos is configured
-        cosmos_conversation_client = init_cosmosdb_client()
+        cosmos_conversation_client = get_cosmos_conversation_client()
         if not cosmos_conversation_client:
             raise Exception("CosmosDB is not configured or not working")
 
@@ -798,7 +932,6 @@ async def update_conversation():
         else:
             raise Exception("No bot messages found")
         # Submit request to Chat Completions for response
-        await cosmos_conversation_client.cosmosdb_client.close()
         track_event_if_configured(
             "UpdateConversation_Success",
             {"user_id": user_id, "conversation_id": conversation_id},
@@ -819,7 +952,7 @@ async def update_conversation():
 async def update_message():
     authenticated_user = get_authenticated_user_details(request_headers=request.headers)
     user_id = authenticated_user["user_principal_id"]
-    cosmos_conversation_client = init_cosmosdb_client()
+    cosmos_conversation_client = get_cosmos_conversation_client()
 
     # check request for message_id
     request_json = await request.get_json()
@@ -901,7 +1034,7 @@ async def delete_conversation():
             return jsonify({"error": "conversation_id is required"}), 400
 
         # make sure cosmos is configured
-        cosmos_conversation_client = init_cosmosdb_client()
+        cosmos_conversation_client = get_cosmos_conversation_client()
         if not cosmos_conversation_client:
             raise Exception("CosmosDB is not configured or not working")
 
@@ -911,8 +1044,6 @@ async def delete_conversation():
         # Now delete the conversation
         await cosmos_conversation_client.delete_conversation(user_id, conversation_id)
 
-        await cosmos_conversation_client.cosmosdb_client.close()
-
         track_event_if_configured(
             "DeleteConversation_Success",
             {"user_id": user_id, "conversation_id": conversation_id},
@@ -947,7 +1078,7 @@ async def list_conversations():
     )
 
     # make sure cosmos is configured
-    cosmos_conversation_client = init_cosmosdb_client()
+    cosmos_conversation_client = get_cosmos_conversation_client()
     if not cosmos_conversation_client:
         raise Exception("CosmosDB is not configured or not working")
 
@@ -955,7 +1086,6 @@ async def list_conversations():
     conversations = await cosmos_conversation_client.get_conversations(
         user_id, offset=offset, limit=25
     )
-    await cosmos_conversation_client.cosmosdb_client.close()
     if not isinstance(conversations, list):
         track_event_if_configured(
             "ListConversations_Empty", {"user_id": user_id, "offset": offset}
@@ -1001,7 +1131,7 @@ async def get_conversation():
         return jsonify({"error": "conversation_id is required"}), 400
 
     # make sure cosmos is configured
-    cosmos_conversation_client = init_cosmosdb_client()
+    cosmos_conversation_client = get_cosmos_conversation_client()
     if not cosmos_conversation_client:
         raise Exception("CosmosDB is not configured or not working")
 
@@ -1037,7 +1167,6 @@ async def get_conversation():
         for msg in conversation_messages
     ]
 
-    await cosmos_conversation_client.cosmosdb_client.close()
     track_event_if_configured(
         "GetConversation_Success",
         {
@@ -1075,7 +1204,7 @@ async def rename_conversation():
         return jsonify({"error": "conversation_id is required"}), 400
 
     # make sure cosmos is configured
-    cosmos_conversation_client = init_cosmosdb_client()
+    cosmos_conversation_client = get_cosmos_conversation_client()
     if not cosmos_conversation_client:
         raise Exception("CosmosDB is not configured or not working")
 
@@ -1102,8 +1231,6 @@ async def rename_conversation():
         conversation
     )
 
-    await cosmos_conversation_client.cosmosdb_client.close()
-
     track_event_if_configured(
         "RenameConversation_Success",
         {"user_id": user_id, "conversation_id": conversation_id, "new_title": title},
@@ -1122,7 +1249,7 @@ async def delete_all_conversations():
     # get conversations for user
     try:
         # make sure cosmos is configured
-        cosmos_conversation_client = init_cosmosdb_client()
+        cosmos_conversation_client = get_cosmos_conversation_client()
         if not cosmos_conversation_client:
             raise Exception("CosmosDB is not configured or not working")
 
@@ -1149,7 +1276,6 @@ async def delete_all_conversations():
             await cosmos_conversation_client.delete_conversation(
                 user_id, conversation["id"]
             )
-        await cosmos_conversation_client.cosmosdb_client.close()
 
         track_event_if_configured(
             "DeleteAllConversations_Success",
@@ -1205,7 +1331,7 @@ async def clear_messages():
             return jsonify({"error": "conversation_id is required"}), 400
 
         # make sure cosmos is configured
-        cosmos_conversation_client = init_cosmosdb_client()
+        cosmos_conversation_client = get_cosmos_conversation_client()
         if not cosmos_conversation_client:
             raise Exception("CosmosDB is not configured or not working")
 
@@ -1247,9 +1373,13 @@ async def ensure_cosmos():
         return jsonify({"error": "CosmosDB is not configured"}), 404
 
     try:
-        cosmos_conversation_client = init_cosmosdb_client()
-        success, err = await cosmos_conversation_client.ensure()
-        if not cosmos_conversation_client or not success:
+        cosmos_conversation_client = get_cosmos_conversation_client()
+        if not cosmos_conversation_client:
+            return jsonify({"error": "CosmosDB is not configured or not working"}), 500
+
+        # Health is checked at startup and cached on the long-lived client
+        success, err = await cosmos_conversation_client.get_health()
+        if not success:
             if err:
                 track_event_if_configured(
                     "EnsureCosmosDB_Failed",
@@ -1260,13 +1390,6 @@ async def ensure_cosmos():
                 return jsonify({"error": err}), 422
             return jsonify({"error": "CosmosDB is not configured or not working"}), 500
 
-        await cosmos_conversation_client.cosmosdb_client.close()
-        track_event_if_configured(
-            "EnsureCosmosDB_Failed",
-            {
-                "error": "CosmosDB is not configured or not working",
-            },
-        )
         return jsonify({"message": "CosmosDB is configured and working"}), 200
     except Exception as e:
         logging.exception("Exception in /history/ensure")
@@ -1311,7 +1434,7 @@ async def generate_title(conversation_messages):
     messages.append({"role": "user", "content": title_prompt})
 
     try:
-        azure_openai_client = init_ai_projects_client(use_data=False)
+        azure_openai_client = await init_ai_projects_client(use_data=False)
         response = await azure_openai_client.chat.completions.create(
             model=config.AZURE_OPENAI_MODEL,
             messages=messages,
@@ -1332,11 +1455,17 @@ async def generate_title(conversation_messages):
 
 
 @bp.route("/api/users", methods=["GET"])
-def get_users():
+async def get_users():
     track_event_if_configured("UserFetch_Start", {})
 
     try:
-        users = sqldb_service.get_client_data()
+        users, etag = await sqldb_service.get_cached_client_data()
+
+        if etag in request.if_none_match:
+            track_event_if_configured("UserFetch_NotModified", {})
+            response = Response(status=304)
+            response.set_etag(etag)
+            return response
 
         track_event_if_configured(
             "UserFetch_Success",
@@ -1345,7 +1474,11 @@ def get_users():
             },
         )
 
-        return jsonify(users)
+        response = jsonify(users)
+        response.set_etag(etag)
+        # Let the browser keep the roster but revalidate it on every load
+        response.headers["Cache-Control"] = "private, no-cache"
+        return response
 
     except Exception as e:
         span = trace.get_current_span()
@@ -1356,4 +1489,40 @@ def get_users():
         return str(e), 500
 
 
+@bp.route("/api/admin/users/cache/invalidate", methods=["POST"])
+async def invalidate_users_cache():
+    """
+    Drop the client roster cache of the worker process that serves this
+    request. Each worker keeps its own cache, so with WEB_CONCURRENCY > 1 or
+    several instances the other workers keep serving their copy until
+    USERS_CACHE_TTL_SECONDS expires. The response names the cleared worker.
+    """
+    authenticated_user = get_authenticated_user_details(request_headers=request.headers)
+    user_id = authenticated_user["user_principal_id"]
+    if user_id not in config.ADMIN_PRINCIPAL_IDS:
+        track_event_if_configured("UserCacheInvalidate_Forbidden", {"user_id": user_id})
+        return jsonify({"error": "Forbidden"}), 403
+
+    sqldb_service.invalidate_client_data_cache()
+    worker = {"host": socket.gethostname(), "pid": os.getpid()}
+    track_event_if_configured("UserCacheInvalidate_Success", {"user_id": user_id, **worker})
+    return jsonify({
+        "message": "Client roster cache invalidated on this worker",
+        "worker": worker,
+    }), 200
+
+
+@bp.route("/metrics", methods=["GET"])
+async def get_metrics():
+    # Chat stage latency histograms plus SQL executor and pool gauges in the
+    # Prometheus text format
+    if not config.METRICS_ENDPOINT_ENABLED:
+        return jsonify({"error": "Not found"}), 404
+    return Response(
+        stage_histograms.render_prometheus()
+        + render_gauges("sql", sqldb_service.get_stats()),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
 app = create_app()
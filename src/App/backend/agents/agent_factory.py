@@ -8,13 +8,17 @@ and supports plugin integration.
 
 import asyncio
 import logging
-from typing import Optional
+import time
+from typing import Optional, Set
 
-from azure.ai.projects import AIProjectClient
-from backend.helpers.azure_credential_utils import get_azure_credential
+from azure.ai.projects.aio import AIProjectClient
 from backend.helpers.azure_credential_utils import get_azure_credential_async
 from semantic_kernel.agents import AzureAIAgent, AzureAIAgentSettings
 
+from backend.agents.agent_leader import AgentLeaderElection
+from backend.agents.agent_reconciler import AgentHeartbeat, get_or_create_agent
+from backend.agents.agent_thread_pool import AgentThreadPool
+from backend.agents.tool_progress import add_tool_progress_filter
 from backend.common.config import config
 from backend.plugins.chat_with_data_plugin import ChatWithDataPlugin
 
@@ -24,18 +28,28 @@ class AgentFactory:
     Singleton factory for creating and managing an AzureAIAgent instances.
     """
 
-    _lock = asyncio.Lock()
+    # One lock per agent so the three agents can be provisioned concurrently
+    _wealth_advisor_lock = asyncio.Lock()
+    _search_lock = asyncio.Lock()
+    _sql_lock = asyncio.Lock()
+    _warmup_tasks: Set[asyncio.Task] = set()
     _wealth_advisor_agent: Optional[AzureAIAgent] = None
     _search_agent: Optional[dict] = None
     _sql_agent: Optional[dict] = None
+    # Multi-worker mode: the leader's election, or the agent ids a follower attaches to
+    _leader_election: Optional[AgentLeaderElection] = None
+    _published_agents: Optional[dict] = None
+    # Reconcile mode: keeps last_seen fresh on the agents this process owns
+    _heartbeat: Optional[AgentHeartbeat] = None
 
     @classmethod
     async def get_wealth_advisor_agent(cls):
         """
         Get or create the singleton WealthAdvisor AzureAIAgent instance.
         """
-        async with cls._lock:
+        async with cls._wealth_advisor_lock:
             if cls._wealth_advisor_agent is None:
+                start = time.perf_counter()
                 ai_agent_settings = AzureAIAgentSettings()
                 creds = await get_azure_credential_async(config.MID_ID)
                 client = AzureAIAgent.create_client(
@@ -46,7 +60,8 @@ class AgentFactory:
                 agent_instructions = '''You are a helpful assistant to a Wealth Advisor.
                 If the question is unrelated to data but is conversational (e.g., greetings or follow-ups), respond appropriately using context, do not use external tools or perform any web searches for these conversational inputs.'''
 
-                agent_definition = await client.agents.create_agent(
+                agent_definition = await cls._resolve_agent(
+                    client.agents,
                     model=ai_agent_settings.model_deployment_name,
                     name=agent_name,
                     instructions=agent_instructions,
@@ -56,7 +71,11 @@ class AgentFactory:
                     definition=agent_definition,
                     plugins=[ChatWithDataPlugin()],
                 )
+                add_tool_progress_filter(agent.kernel)
                 cls._wealth_advisor_agent = agent
+                logging.info(
+                    f"WealthAdvisor agent created in {time.perf_counter() - start:.2f}s"
+                )
         return cls._wealth_advisor_agent
 
     @classmethod
@@ -64,8 +83,9 @@ class AgentFactory:
         """
         Get or create the singleton CallTranscriptSearch AzureAIAgent instance.
         """
-        async with cls._lock:
+        async with cls._search_lock:
             if cls._search_agent is None:
+                start = time.perf_counter()
 
                 agent_instructions = config.CALL_TRANSCRIPT_SYSTEM_PROMPT
                 if not agent_instructions:
@@ -78,32 +98,175 @@ class AgentFactory:
 
                 project_client = AIProjectClient(
                     endpoint=config.AI_PROJECT_ENDPOINT,
-                    credential=get_azure_credential(config.MID_ID),
+                    credential=await get_azure_credential_async(config.MID_ID),
                     api_version="2025-05-01",
                 )
 
-                agent = project_client.agents.create_agent(
+                agent = await cls._resolve_agent(
+                    project_client.agents,
                     model=config.AZURE_OPENAI_MODEL,
                     instructions=agent_instructions,
                     name="CallTranscriptSearchAgent",
                 )
-                cls._search_agent = {"agent": agent, "client": project_client}
+                if cls._published_agents is not None:
+                    index_asset_id = cls._published_agents["index_asset_id"]
+                else:
+                    index_asset_id = await cls._register_search_index(project_client)
+                cls._search_agent = {
+                    "agent": agent,
+                    "client": project_client,
+                    "index_asset_id": index_asset_id,
+                    "thread_pool": await cls._start_thread_pool(project_client),
+                }
+                logging.info(
+                    f"CallTranscriptSearchAgent created in {time.perf_counter() - start:.2f}s"
+                )
         return cls._search_agent
 
+    @classmethod
+    async def _resolve_agent(cls, agents_client, *, name: str, model: str, instructions: str):
+        """
+        Attach to the leader's agent on a follower worker, otherwise create or
+        reconcile the agent.
+        """
+        if cls._published_agents is not None:
+            agent = await agents_client.get_agent(cls._published_agents[name])
+            logging.info(f"Attached to {name} ({agent.id}) published by the agent leader")
+            return agent
+        agent = await get_or_create_agent(
+            agents_client, name=name, model=model, instructions=instructions
+        )
+        if config.AGENT_RECONCILE:
+            if cls._heartbeat is None:
+                cls._heartbeat = AgentHeartbeat(config.AGENT_HEARTBEAT_SECONDS)
+            cls._heartbeat.track(agents_client, agent)
+        return agent
+
+    @staticmethod
+    async def _start_thread_pool(project_client) -> AgentThreadPool:
+        thread_pool = AgentThreadPool(
+            project_client,
+            size=config.AGENT_THREAD_POOL_SIZE,
+            ttl=config.AGENT_THREAD_TTL_SECONDS,
+        )
+        await thread_pool.start()
+        return thread_pool
+
+    @staticmethod
+    async def _register_search_index(project_client) -> str:
+        """
+        Register the call transcript search index as a project index asset.
+
+        Done once with the search agent so questions only attach a filtered
+        search tool to their own run instead of re-registering the index.
+        """
+        project_index = await project_client.indexes.create_or_update(
+            name=f"project-index-{config.AZURE_SEARCH_INDEX}",
+            version="1",
+            index={
+                "connectionName": config.AZURE_SEARCH_CONNECTION_NAME,
+                "indexName": config.AZURE_SEARCH_INDEX,
+                "type": "AzureSearch",
+                "fieldMapping": {
+                    "contentFields": ["content"],
+                    "urlField": "sourceurl",
+                    "titleField": "chunk_id",
+                    "vector_fields": ["contentVector"],
+                },
+            },
+        )
+        return f"{project_index.name}/versions/{project_index.version}"
+
+    @classmethod
+    async def initialize_agents(cls, warm_in_background: bool = False):
+        """
+        Provision the WealthAdvisor, search and SQL agents concurrently.
+
+        With ``warm_in_background`` only the WealthAdvisor agent is awaited and
+        the plugin agents keep warming while the app starts serving; a tool call
+        that needs one before it is ready waits on that agent's lock.
+
+        Returns the WealthAdvisor agent.
+        """
+        start = time.perf_counter()
+        if config.WEB_CONCURRENCY > 1:
+            is_leader = await cls._elect_leader()
+            # Followers need every agent id published, so the leader creates all of them up front
+            warm_in_background = warm_in_background and not is_leader
+        if warm_in_background:
+            for get_agent in (cls.get_search_agent, cls.get_sql_agent):
+                task = asyncio.create_task(cls._warm_up(get_agent))
+                cls._warmup_tasks.add(task)
+                task.add_done_callback(cls._warmup_tasks.discard)
+            agent = await cls.get_wealth_advisor_agent()
+        else:
+            agent, _, _ = await asyncio.gather(
+                cls.get_wealth_advisor_agent(),
+                cls.get_search_agent(),
+                cls.get_sql_agent(),
+            )
+        if cls._leader_election is not None:
+            cls._leader_election.publish(
+                {
+                    "WealthAdvisor": agent.id,
+                    "CallTranscriptSearchAgent": cls._search_agent["agent"].id,
+                    "SQLQueryGeneratorAgent": cls._sql_agent["agent"].id,
+                    "index_asset_id": cls._search_agent["index_asset_id"],
+                }
+            )
+        logging.info(f"Agents ready for serving in {time.perf_counter() - start:.2f}s")
+        return agent
+
+    @classmethod
+    async def _elect_leader(cls) -> bool:
+        """
+        Become the agent leader, or wait for the leader to publish its agents.
+        """
+        election = AgentLeaderElection(config.AGENT_LEADER_LOCK_FILE)
+        if election.try_acquire():
+            cls._leader_election = election
+            return True
+        logging.info("Waiting for the agent leader to publish its agents")
+        cls._published_agents = await election.wait_for_agents(
+            timeout=config.AGENT_LEADER_WAIT_SECONDS
+        )
+        return False
+
+    @classmethod
+    def _keeps_agents(cls) -> bool:
+        """
+        Whether shutdown should leave the agents in place for other processes.
+        """
+        return config.AGENT_RECONCILE or cls._published_agents is not None
+
+    @staticmethod
+    async def _warm_up(get_agent):
+        try:
+            await get_agent()
+        except Exception:
+            logging.exception(f"Background warm-up failed for {get_agent.__name__}")
+
     @classmethod
     async def delete_all_agent_instance(cls):
         """
         Delete the singleton AzureAIAgent instances if it exists.
         """
-        async with cls._lock:
+        if cls._warmup_tasks:
+            await asyncio.gather(*list(cls._warmup_tasks), return_exceptions=True)
+        async with cls._wealth_advisor_lock, cls._search_lock, cls._sql_lock:
             logging.info("Starting agent deletion process...")
+            if cls._heartbeat is not None:
+                await cls._heartbeat.close()
+                cls._heartbeat = None
 
             # Delete Wealth Advisor Agent
             if cls._wealth_advisor_agent is not None:
                 try:
                     agent_id = cls._wealth_advisor_agent.id
                     logging.info(f"Deleting wealth advisor agent: {agent_id}")
-                    if hasattr(cls._wealth_advisor_agent, 'client') and cls._wealth_advisor_agent.client:
+                    if cls._keeps_agents():
+                        logging.info("Keeping wealth advisor agent for reuse")
+                    elif hasattr(cls._wealth_advisor_agent, 'client') and cls._wealth_advisor_agent.client:
                         await cls._wealth_advisor_agent.client.agents.delete_agent(agent_id)
                         logging.info("Wealth advisor agent deleted successfully")
                     else:
@@ -118,15 +281,19 @@ class AgentFactory:
             if cls._search_agent is not None:
                 try:
                     agent_id = cls._search_agent['agent'].id
+                    if cls._search_agent.get("thread_pool") is not None:
+                        await cls._search_agent["thread_pool"].close()
                     logging.info(f"Deleting search agent: {agent_id}")
                     if cls._search_agent.get("client") and hasattr(cls._search_agent["client"], "agents"):
-                        # AIProjectClient.agents.delete_agent is synchronous, don't await it
-                        cls._search_agent["client"].agents.delete_agent(agent_id)
-                        logging.info("Search agent deleted successfully")
+                        if cls._keeps_agents():
+                            logging.info("Keeping Search agent for reuse")
+                        else:
+                            await cls._search_agent["client"].agents.delete_agent(agent_id)
+                            logging.info("Search agent deleted successfully")
 
                         # Close the client if it has a close method
                         if hasattr(cls._search_agent["client"], "close"):
-                            cls._search_agent["client"].close()
+                            await cls._search_agent["client"].close()
                     else:
                         logging.warning("Search agent client is None or invalid")
                 except Exception as e:
@@ -139,15 +306,19 @@ class AgentFactory:
             if cls._sql_agent is not None:
                 try:
                     agent_id = cls._sql_agent['agent'].id
+                    if cls._sql_agent.get("thread_pool") is not None:
+                        await cls._sql_agent["thread_pool"].close()
                     logging.info(f"Deleting SQL agent: {agent_id}")
                     if cls._sql_agent.get("client") and hasattr(cls._sql_agent["client"], "agents"):
-                        # AIProjectClient.agents.delete_agent is synchronous, don't await it
-                        cls._sql_agent["client"].agents.delete_agent(agent_id)
-                        logging.info("SQL agent deleted successfully")
+                        if cls._keeps_agents():
+                            logging.info("Keeping SQL agent for reuse")
+                        else:
+                            await cls._sql_agent["client"].agents.delete_agent(agent_id)
+                            logging.info("SQL agent deleted successfully")
 
                         # Close the client if it has a close method
                         if hasattr(cls._sql_agent["client"], "close"):
-                            cls._sql_agent["client"].close()
+                            await cls._sql_agent["client"].close()
                     else:
                         logging.warning("SQL agent client is None or invalid")
                 except Exception as e:
@@ -156,6 +327,10 @@ class AgentFactory:
                 finally:
                     cls._sql_agent = None
 
+            cls._published_agents = None
+            if cls._leader_election is not None:
+                cls._leader_election.release()
+                cls._leader_election = None
             logging.info("Agent deletion process completed")
 
     @classmethod
@@ -164,8 +339,9 @@ class AgentFactory:
         Get or create a singleton SQLQueryGenerator AzureAIAgent instance.
         This agent is used to generate T-SQL queries from natural language input.
         """
-        async with cls._lock:
+        async with cls._sql_lock:
             if cls._sql_agent is None:
+                start = time.perf_counter()
 
                 agent_instructions = config.SQL_SYSTEM_PROMPT or """
     You are an expert assistant in generating T-SQL queries based on user questions.
@@ -190,15 +366,23 @@ class AgentFactory:
 
                 project_client = AIProjectClient(
                     endpoint=config.AI_PROJECT_ENDPOINT,
-                    credential=get_azure_credential(config.MID_ID),
+                    credential=await get_azure_credential_async(config.MID_ID),
                     api_version="2025-05-01",
                 )
 
-                agent = project_client.agents.create_agent(
+                agent = await cls._resolve_agent(
+                    project_client.agents,
                     model=config.AZURE_OPENAI_MODEL,
                     instructions=agent_instructions,
                     name="SQLQueryGeneratorAgent",
                 )
 
-                cls._sql_agent = {"agent": agent, "client": project_client}
+                cls._sql_agent = {
+                    "agent": agent,
+                    "client": project_client,
+                    "thread_pool": await cls._start_thread_pool(project_client),
+                }
+                logging.info(
+                    f"SQLQueryGeneratorAgent created in {time.perf_counter() - start:.2f}s"
+                )
         return cls._sql_agent
@@ -0,0 +1,114 @@
+"""
+Leader election between uvicorn workers for the agent lifecycle.
+
+When the app runs with more than one worker (``WEB_CONCURRENCY`` > 1) every
+worker process has its own AgentFactory singletons. To avoid each worker
+creating, garbage-collecting and deleting the same Foundry agents, the first
+worker to take an exclusive ``flock`` on a local lock file becomes the leader:
+it reconciles the agents and publishes their ids to a state file next to the
+lock. The other workers are followers. They wait for the state file and attach
+to the published agents read-only, without creating or deleting anything.
+
+The lock is held for the leader's lifetime and released by the OS if the
+process dies, so a restarted worker can take over. Each leader writes a fresh
+token into the lock file, and followers only accept a state file carrying the
+same token, so a state file left over from an earlier leader is never used.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms run a single worker
+    fcntl = None
+
+
+class AgentLeaderElection:
+    """
+    File-lock based leader election for workers on the same host.
+    """
+
+    def __init__(self, lock_path: str):
+        self.lock_path = lock_path
+        self.state_path = f"{lock_path}.json"
+        self.token: Optional[str] = None
+        self._lock_file = None
+
+    def try_acquire(self) -> bool:
+        """
+        Try to become the leader without blocking.
+        """
+        if fcntl is None:
+            logging.warning("fcntl unavailable; treating this worker as agent leader")
+            self.token = uuid.uuid4().hex
+            return True
+
+        lock_file = open(self.lock_path, "a+")
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+
+        self._lock_file = lock_file
+        self.token = uuid.uuid4().hex
+        lock_file.seek(0)
+        lock_file.truncate()
+        lock_file.write(self.token)
+        lock_file.flush()
+        os.fsync(lock_file.fileno())
+        logging.info(f"Worker {os.getpid()} is the agent leader")
+        return True
+
+    def publish(self, agents: dict):
+        """
+        Publish the leader's agent ids for followers, atomically.
+        """
+        tmp_path = f"{self.state_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as state_file:
+            json.dump({"token": self.token, "agents": agents}, state_file)
+        os.replace(tmp_path, self.state_path)
+
+    def _read_json(self, path: str):
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _leader_token(self) -> Optional[str]:
+        try:
+            with open(self.lock_path) as f:
+                return f.read().strip() or None
+        except OSError:
+            return None
+
+    async def wait_for_agents(self, timeout: float = 300, poll_interval: float = 0.5) -> dict:
+        """
+        Wait until the current leader has published its agent ids.
+        """
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            token = self._leader_token()
+            state = self._read_json(self.state_path)
+            if token and state and state.get("token") == token:
+                return state["agents"]
+            await asyncio.sleep(poll_interval)
+        raise TimeoutError(f"Timed out waiting for the agent leader to publish {self.state_path}")
+
+    def release(self):
+        """
+        Give up leadership so another worker can take over.
+        """
+        if self._lock_file is not None:
+            try:
+                fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+            finally:
+                self._lock_file.close()
+                self._lock_file = None
@@ -0,0 +1,188 @@
+"""
+Reattach to existing Foundry agents instead of creating new ones per boot.
+
+Each agent created in reconcile mode is tagged with a hash of its name, model
+and instructions. On startup the factory lists the project's agents and
+reuses the oldest one whose tag matches, creating an agent only when nothing
+does.
+
+The process that owns a reconciled agent refreshes a ``last_seen`` timestamp
+in its metadata every ``AGENT_HEARTBEAT_SECONDS``. Agents with the same name
+but an outdated definition, and duplicates left behind by crashed or racing
+workers, are garbage-collected only when they carry the reconciler's tag and
+their ``last_seen`` is older than the grace period, so agents created by
+other tools and agents still used by a running (e.g. older) deployment are
+left alone.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from backend.common.config import config
+
+DEFINITION_HASH_KEY = "definition_hash"
+LAST_SEEN_KEY = "last_seen"
+
+
+def definition_hash(name: str, model: str, instructions: str) -> str:
+    payload = json.dumps(
+        {"name": name, "model": model, "instructions": instructions}, sort_keys=True
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+def _created_at(agent) -> float:
+    created_at = getattr(agent, "created_at", None)
+    if isinstance(created_at, datetime):
+        return created_at.timestamp()
+    if isinstance(created_at, (int, float)):
+        return float(created_at)
+    return time.time()
+
+
+def _last_seen(agent) -> Optional[float]:
+    try:
+        return float((agent.metadata or {})[LAST_SEEN_KEY])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def _is_stale(agent, cutoff: float) -> bool:
+    """
+    Whether ``agent`` is a reconciled agent nobody has used since ``cutoff``.
+
+    Agents without the definition tag were not created here, and tagged agents
+    without a heartbeat give no evidence that their owner is gone.
+    """
+    if DEFINITION_HASH_KEY not in (agent.metadata or {}):
+        return False
+    last_seen = _last_seen(agent)
+    return last_seen is not None and last_seen < cutoff and _created_at(agent) < cutoff
+
+
+async def touch(agents_client, agent):
+    """
+    Refresh the ``last_seen`` heartbeat in the agent's metadata.
+    """
+    metadata = {**(agent.metadata or {}), LAST_SEEN_KEY: str(int(time.time()))}
+    try:
+        await agents_client.update_agent(agent.id, metadata=metadata)
+    except Exception as e:
+        logging.warning(f"Could not refresh heartbeat of agent {agent.id}: {e}")
+
+
+async def _find_by_name(agents_client, name: str):
+    agents = []
+    async for agent in agents_client.list_agents():
+        if agent.name == name:
+            agents.append(agent)
+    return sorted(agents, key=_created_at)
+
+
+async def get_or_create_agent(agents_client, *, name: str, model: str, instructions: str):
+    """
+    Return an agent for the definition, reusing a matching one in reconcile mode.
+
+    Without ``AGENT_RECONCILE`` this is a plain ``create_agent`` call.
+    """
+    if not config.AGENT_RECONCILE:
+        return await agents_client.create_agent(
+            model=model, name=name, instructions=instructions
+        )
+
+    digest = definition_hash(name, model, instructions)
+    candidates = await _find_by_name(agents_client, name)
+    matches = [a for a in candidates if (a.metadata or {}).get(DEFINITION_HASH_KEY) == digest]
+
+    if matches:
+        agent = matches[0]
+        await touch(agents_client, agent)
+        logging.info(f"Reattached to existing agent {name} ({agent.id})")
+    else:
+        created = await agents_client.create_agent(
+            model=model,
+            name=name,
+            instructions=instructions,
+            metadata={DEFINITION_HASH_KEY: digest, LAST_SEEN_KEY: str(int(time.time()))},
+        )
+        # Another worker may have created the same agent concurrently;
+        # converge on the oldest one so every worker shares it
+        candidates = await _find_by_name(agents_client, name)
+        matches = [
+            a for a in candidates if (a.metadata or {}).get(DEFINITION_HASH_KEY) == digest
+        ] or [created]
+        agent = matches[0]
+        if agent.id != created.id:
+            await _delete(agents_client, created, reason="lost creation race")
+            await touch(agents_client, agent)
+        else:
+            logging.info(f"Created agent {name} ({agent.id})")
+
+    await _collect_garbage(agents_client, candidates, keep_id=agent.id)
+    return agent
+
+
+async def _collect_garbage(agents_client, candidates, keep_id: str):
+    cutoff = time.time() - config.AGENT_STALE_GRACE_SECONDS
+    for stale in candidates:
+        if stale.id != keep_id and _is_stale(stale, cutoff):
+            await _delete(agents_client, stale, reason="stale")
+
+
+async def _delete(agents_client, agent, reason: str):
+    try:
+        await agents_client.delete_agent(agent.id)
+        logging.info(f"Deleted {reason} agent {agent.name} ({agent.id})")
+    except Exception as e:
+        logging.warning(f"Could not delete {reason} agent {agent.id}: {e}")
+
+
+class AgentHeartbeat:
+    """
+    Periodically refreshes ``last_seen`` on the agents this process owns so
+    other processes do not garbage-collect them while they are in use.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._agents: Dict[str, Tuple[object, object]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def track(self, agents_client, agent):
+        """
+        Keep ``agent`` alive, starting the heartbeat task on first use.
+        """
+        self._agents[agent.id] = (agents_client, agent)
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(self._beat_periodically())
+
+    async def beat(self):
+        await asyncio.gather(
+            *(touch(agents_client, agent) for agents_client, agent in list(self._agents.values()))
+        )
+
+    async def _beat_periodically(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.beat()
+            except Exception:
+                logging.exception("Error refreshing agent heartbeats")
+
+    async def close(self):
+        """
+        Stop the heartbeat and forget the tracked agents.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._agents.clear()
@@ -0,0 +1,25 @@
+"""
+Cancellation of AI Foundry agent runs abandoned by their caller.
+
+Cancelling the asyncio task that waits on a run only stops the wait; the run
+itself keeps executing, and spending tokens, in the service. When a chat is
+abandoned the callers use ``cancel_active_runs`` to cancel whatever is still
+running on the thread they were using.
+"""
+
+import logging
+
+ACTIVE_RUN_STATUSES = frozenset(["queued", "in_progress", "requires_action"])
+
+
+async def cancel_active_runs(agents_client, thread_id: str):
+    """
+    Cancel the runs on ``thread_id`` that have not finished. Errors are logged.
+    """
+    try:
+        async for run in agents_client.runs.list(thread_id=thread_id):
+            if run.status in ACTIVE_RUN_STATUSES:
+                await agents_client.runs.cancel(thread_id=thread_id, run_id=run.id)
+                logging.info(f"Cancelled agent run {run.id} on thread {thread_id}")
+    except Exception as e:
+        logging.warning(f"Could not cancel agent runs on thread {thread_id}: {e}")
@@ -0,0 +1,156 @@
+"""
+Pool of pre-created agent threads for the plugin's SQL and search agents.
+
+Each tool call used to create a thread, post a message, run it and delete the
+thread, so two of its four service round trips were thread churn. The pool
+hands out a thread created ahead of time, and once the call is done the used
+thread is deleted and a fresh one created in the background. Idle threads
+older than ``ttl`` are pruned so the pool never serves stale threads.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Optional, Set
+
+
+class AgentThreadPool:
+    """
+    Keeps up to ``size`` unused threads ready on an async AIProjectClient.
+
+    Threads are single use: a released thread holds the previous conversation,
+    so it is deleted rather than handed out again.
+    """
+
+    def __init__(self, project_client, size: int = 4, ttl: float = 900):
+        self._client = project_client
+        self.size = max(0, size)
+        self.ttl = ttl
+        self._idle = deque()
+        self._pending_creates = 0
+        self._background: Set[asyncio.Task] = set()
+        self._prune_task: Optional[asyncio.Task] = None
+        self._closed = False
+
+    @property
+    def idle_count(self) -> int:
+        return len(self._idle)
+
+    async def start(self):
+        """
+        Create ``size`` threads and start the TTL pruning task.
+        """
+        self._closed = False
+        if self._prune_task is None and self.ttl > 0:
+            self._prune_task = asyncio.create_task(self._prune_periodically())
+        await asyncio.gather(
+            *(self._create_idle() for _ in range(self.size - len(self._idle))),
+            return_exceptions=True,
+        )
+
+    async def acquire(self) -> str:
+        """
+        Return the id of an unused thread, creating one if none is ready.
+        """
+        thread_id = None
+        while self._idle:
+            candidate, created_at = self._idle.popleft()
+            if self._is_fresh(created_at):
+                thread_id = candidate
+                break
+            self._spawn(self._delete(candidate))
+
+        if thread_id is None:
+            thread = await self._client.agents.threads.create()
+            thread_id = thread.id
+        self._replenish()
+        return thread_id
+
+    def release(self, thread_id: str):
+        """
+        Hand back a used thread. It is deleted in the background.
+        """
+        if thread_id:
+            self._spawn(self._delete(thread_id))
+
+    def _is_fresh(self, created_at: float) -> bool:
+        return self.ttl <= 0 or time.monotonic() - created_at < self.ttl
+
+    def _replenish(self):
+        missing = self.size - len(self._idle) - self._pending_creates
+        for _ in range(max(0, missing)):
+            self._spawn(self._create_idle())
+
+    async def _create_idle(self):
+        self._pending_creates += 1
+        try:
+            thread = await self._client.agents.threads.create()
+        except Exception as e:
+            logging.warning(f"Failed to pre-create agent thread: {e}")
+            return
+        finally:
+            self._pending_creates -= 1
+        if self._closed:
+            await self._delete(thread.id)
+        else:
+            self._idle.append((thread.id, time.monotonic()))
+
+    async def _delete(self, thread_id: str):
+        try:
+            await self._client.agents.threads.delete(thread_id)
+            logging.debug(f"Agent thread {thread_id} deleted")
+        except Exception as e:
+            logging.warning(f"Error deleting agent thread {thread_id}: {e}")
+
+    def _spawn(self, coro):
+        task = asyncio.ensure_future(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def prune(self):
+        """
+        Delete idle threads older than ``ttl`` and top the pool back up.
+        """
+        fresh = deque()
+        while self._idle:
+            thread_id, created_at = self._idle.popleft()
+            if self._is_fresh(created_at):
+                fresh.append((thread_id, created_at))
+            else:
+                self._spawn(self._delete(thread_id))
+        self._idle = fresh
+        self._replenish()
+
+    async def _prune_periodically(self):
+        interval = max(1.0, self.ttl / 2)
+        while not self._closed:
+            await asyncio.sleep(interval)
+            try:
+                await self.prune()
+            except Exception:
+                logging.exception("Error pruning agent threads")
+
+    async def drain(self):
+        """
+        Wait for pending background creates and deletes to finish.
+        """
+        while self._background:
+            await asyncio.gather(*list(self._background), return_exceptions=True)
+
+    async def close(self):
+        """
+        Stop pruning, wait for background work and delete all idle threads.
+        """
+        self._closed = True
+        if self._prune_task is not None:
+            self._prune_task.cancel()
+            try:
+                await self._prune_task
+            except asyncio.CancelledError:
+                pass
+            self._prune_task = None
+        await self.drain()
+        idle = [thread_id for thread_id, _ in self._idle]
+        self._idle.clear()
+        await asyncio.gather(*(self._delete(thread_id) for thread_id in idle))
@@ -0,0 +1,62 @@
+"""
+Progress events for the WealthAdvisor agent's tool calls.
+
+While the agent runs a plugin function the chat stream produces no text, often
+for many seconds. A kernel function invocation filter reports when each tool
+starts and finishes to the progress queue of the request that is iterating the
+agent stream. The queue is carried in a context variable, so concurrent chats
+sharing the same agent and kernel only see their own tools.
+"""
+
+import asyncio
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Optional
+
+from semantic_kernel.filters.filter_types import FilterTypes
+
+# Keyed by the kernel function names the plugin registers, which are the names
+# the agent's function calls carry, not the Python method names
+TOOL_LABELS = {
+    "ChatWithSQLDatabase": "Querying portfolio data",
+    "ChatWithCallTranscripts": "Searching call transcripts",
+}
+
+progress_queue: ContextVar[Optional[asyncio.Queue]] = ContextVar(
+    "tool_progress_queue", default=None
+)
+
+
+@dataclass
+class ToolProgress:
+    tool: str
+    status: str  # started, running, completed or failed
+    message: str
+    elapsed_ms: int = 0
+
+
+def tool_label(function_name: str) -> str:
+    return TOOL_LABELS.get(function_name, f"Running {function_name}")
+
+
+async def tool_progress_filter(context, next):
+    queue = progress_queue.get()
+    if queue is None:
+        await next(context)
+        return
+
+    name = context.function.name
+    start = time.monotonic()
+    queue.put_nowait(ToolProgress(name, "started", tool_label(name)))
+    status = "failed"
+    try:
+        await next(context)
+        status = "completed"
+    finally:
+        elapsed_ms = int((time.monotonic() - start) * 1000)
+        queue.put_nowait(ToolProgress(name, status, tool_label(name), elapsed_ms))
+
+
+def add_tool_progress_filter(kernel):
+    kernel.add_filter(FilterTypes.FUNCTION_INVOCATION, tool_progress_filter)
@@ -34,6 +34,20 @@ class Config:
         self.APPLICATIONINSIGHTS_CONNECTION_STRING = os.getenv(
             "APPLICATIONINSIGHTS_CONNECTION_STRING"
         )
+        # Custom event pipeline; sample rates are "event_name=rate,..."
+        self.TELEMETRY_QUEUE_SIZE = int(os.getenv("TELEMETRY_QUEUE_SIZE", "10000"))
+        self.TELEMETRY_BATCH_SIZE = int(os.getenv("TELEMETRY_BATCH_SIZE", "100"))
+        self.TELEMETRY_FLUSH_INTERVAL_SECONDS = float(
+            os.getenv("TELEMETRY_FLUSH_INTERVAL_SECONDS", "1")
+        )
+        self.TELEMETRY_DEFAULT_SAMPLE_RATE = float(
+            os.getenv("TELEMETRY_DEFAULT_SAMPLE_RATE", "1")
+        )
+        self.TELEMETRY_SAMPLE_RATES = os.getenv("TELEMETRY_SAMPLE_RATES", "")
+        # Serve chat stage latency histograms on /metrics
+        self.METRICS_ENDPOINT_ENABLED = (
+            os.getenv("METRICS_ENDPOINT_ENABLED", "false").lower() == "true"
+        )
 
         # Azure Logging Configuration
         self.AZURE_BASIC_LOGGING_LEVEL = os.environ.get(
@@ -133,6 +147,27 @@ class Config:
         self.USE_INTERNAL_STREAM = (
             os.environ.get("USE_INTERNAL_STREAM", "false").lower() == "true"
         )
+        # Coalescing of streamed assistant deltas; 0 / false disables a trigger
+        self.STREAM_FLUSH_MAX_BYTES = int(os.environ.get("STREAM_FLUSH_MAX_BYTES", "256"))
+        self.STREAM_FLUSH_MAX_MS = float(os.environ.get("STREAM_FLUSH_MAX_MS", "100"))
+        self.STREAM_FLUSH_ON_SENTENCE = (
+            os.environ.get("STREAM_FLUSH_ON_SENTENCE", "true").lower() == "true"
+        )
+        # Progress frames while agent tools run; 0 only reports start and finish
+        self.TOOL_PROGRESS_INTERVAL_SECONDS = float(
+            os.environ.get("TOOL_PROGRESS_INTERVAL_SECONDS", "5")
+        )
+        # Server-Sent Events mode (Accept: text/event-stream). Replay buffers
+        # live in the worker process that started the stream, so a
+        # Last-Event-ID reconnect only resumes when it reaches the same worker
+        # (single worker, or sticky sessions); elsewhere it gets a 404.
+        self.SSE_HEARTBEAT_SECONDS = float(os.environ.get("SSE_HEARTBEAT_SECONDS", "15"))
+        self.SSE_REPLAY_MAX_EVENTS = int(os.environ.get("SSE_REPLAY_MAX_EVENTS", "512"))
+        self.SSE_REPLAY_TTL_SECONDS = float(os.environ.get("SSE_REPLAY_TTL_SECONDS", "60"))
+        # Cancel an event stream when no client has followed it for this long
+        self.SSE_ORPHAN_TIMEOUT_SECONDS = float(
+            os.environ.get("SSE_ORPHAN_TIMEOUT_SECONDS", "15")
+        )
         # Frontend Settings via Environment Variables
         self.AUTH_ENABLED = os.environ.get("AUTH_ENABLED", "true").lower() == "true"
         self.CHAT_HISTORY_ENABLED = (
@@ -153,6 +188,74 @@ class Config:
         self.MID_ID = os.getenv("AZURE_CLIENT_ID")
         self.SQL_MID_ID = os.getenv("SQLDB_USER_MID")
 
+        # SQL connection pool (sizes, and timeouts in seconds)
+        self.SQL_POOL_MIN_SIZE = int(os.getenv("SQLDB_POOL_MIN_SIZE", "1"))
+        self.SQL_POOL_MAX_SIZE = int(os.getenv("SQLDB_POOL_MAX_SIZE", "10"))
+        self.SQL_POOL_IDLE_TIMEOUT = float(os.getenv("SQLDB_POOL_IDLE_TIMEOUT", "300"))
+        self.SQL_POOL_TOKEN_REFRESH_MARGIN = float(
+            os.getenv("SQLDB_POOL_TOKEN_REFRESH_MARGIN", "300")
+        )
+        self.SQL_POOL_ACQUIRE_TIMEOUT = float(
+            os.getenv("SQLDB_POOL_ACQUIRE_TIMEOUT", "30")
+        )
+        self.SQL_EXECUTOR_MAX_WORKERS = int(
+            os.getenv("SQLDB_EXECUTOR_MAX_WORKERS", str(self.SQL_POOL_MAX_SIZE))
+        )
+
+        # Client roster cache for /api/users (seconds, 0 disables caching)
+        self.USERS_CACHE_TTL_SECONDS = float(os.getenv("USERS_CACHE_TTL_SECONDS", "300"))
+        # Search filters built from a user's AAD groups, cached per access token
+        self.USER_GROUPS_CACHE_TTL_SECONDS = float(
+            os.getenv("USER_GROUPS_CACHE_TTL_SECONDS", "300")
+        )
+        self.USER_GROUPS_CACHE_MAX_ENTRIES = int(
+            os.getenv("USER_GROUPS_CACHE_MAX_ENTRIES", "1024")
+        )
+        self.GRAPH_REQUEST_TIMEOUT_SECONDS = float(
+            os.getenv("GRAPH_REQUEST_TIMEOUT_SECONDS", "10")
+        )
+        # Interval for rolling sample data dates forward (seconds, 0 disables)
+        self.SAMPLE_DATA_MAINTENANCE_INTERVAL_SECONDS = float(
+            os.getenv("SAMPLE_DATA_MAINTENANCE_INTERVAL_SECONDS", "3600")
+        )
+        # Principal ids allowed to call the admin endpoints (comma separated)
+        self.ADMIN_PRINCIPAL_IDS = [
+            principal_id.strip()
+            for principal_id in os.getenv("ADMIN_PRINCIPAL_IDS", "").split(",")
+            if principal_id.strip()
+        ]
+
+        # Uvicorn worker processes (uvicorn reads WEB_CONCURRENCY itself). With more
+        # than one worker a leader owns the agent lifecycle and agents are reconciled
+        self.WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+        self.AGENT_LEADER_LOCK_FILE = os.getenv(
+            "AGENT_LEADER_LOCK_FILE", "/tmp/wealth-advisor-agents.lock"
+        )
+        self.AGENT_LEADER_WAIT_SECONDS = float(
+            os.getenv("AGENT_LEADER_WAIT_SECONDS", "300")
+        )
+        # Reuse agents with a matching definition across restarts instead of
+        # creating and deleting them per process; stale ones are deleted after the grace period
+        self.AGENT_RECONCILE = (
+            os.getenv("AGENT_RECONCILE", "false").lower() == "true"
+            or self.WEB_CONCURRENCY > 1
+        )
+        self.AGENT_STALE_GRACE_SECONDS = float(
+            os.getenv("AGENT_STALE_GRACE_SECONDS", "3600")
+        )
+        # How often the owning process refreshes last_seen on its reconciled
+        # agents; keep well below AGENT_STALE_GRACE_SECONDS
+        self.AGENT_HEARTBEAT_SECONDS = float(
+            os.getenv("AGENT_HEARTBEAT_SECONDS", "300")
+        )
+        # Await only the WealthAdvisor agent at startup and warm the others in the background
+        self.AGENT_BACKGROUND_WARMUP = (
+            os.getenv("AGENT_BACKGROUND_WARMUP", "false").lower() == "true"
+        )
+        # Pre-created agent threads per plugin agent, and their max idle age (seconds)
+        self.AGENT_THREAD_POOL_SIZE = int(os.getenv("AGENT_THREAD_POOL_SIZE", "4"))
+        self.AGENT_THREAD_TTL_SECONDS = float(os.getenv("AGENT_THREAD_TTL_SECONDS", "900"))
+
         # System Prompts
         self.SQL_SYSTEM_PROMPT = os.environ.get("AZURE_SQL_SYSTEM_PROMPT")
         self.CALL_TRANSCRIPT_SYSTEM_PROMPT = os.environ.get(
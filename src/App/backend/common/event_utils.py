@@ -1,31 +1,200 @@
 import logging
+import queue
+import random
+import threading
+from typing import Callable, Dict, Optional
 
 from azure.monitor.events.extension import track_event
+from opentelemetry import context
 
 from backend.common.config import config
 
 
+def parse_sample_rates(value: str) -> Dict[str, float]:
+    """Parse ``"event_a=0.1,event_b=0"`` into a per-event sample rate map."""
+    rates = {}
+    for item in (value or "").split(","):
+        name, _, rate = item.partition("=")
+        if name.strip() and rate.strip():
+            try:
+                rates[name.strip()] = min(1.0, max(0.0, float(rate)))
+            except ValueError:
+                logging.warning(f"Ignoring invalid telemetry sample rate: {item}")
+    return rates
+
+
+class EventPipeline:
+    """Non-blocking buffer between request handlers and ``track_event``.
+
+    Events are sampled and put on a bounded queue without waiting; a daemon
+    thread drains the queue in batches and sends them. Each event carries the
+    OpenTelemetry context it was raised in, so it is still exported under the
+    emitting request's operation. When the queue is full new events are
+    dropped and counted instead of slowing the caller down.
+    """
+
+    def __init__(
+        self,
+        sink: Callable[[str, dict], None],
+        max_queue: int = 10000,
+        batch_size: int = 100,
+        flush_interval: float = 1.0,
+        sample_rates: Optional[Dict[str, float]] = None,
+        default_sample_rate: float = 1.0,
+    ):
+        self._sink = sink
+        self._queue = queue.Queue(maxsize=max(1, max_queue))
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.sample_rates = sample_rates or {}
+        self.default_sample_rate = default_sample_rate
+        self._counts_lock = threading.Lock()
+        self._counts = {"enqueued": 0, "sent": 0, "sampled_out": 0, "dropped": 0, "errors": 0}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _count(self, key: str, n: int = 1):
+        with self._counts_lock:
+            self._counts[key] += n
+
+    def enqueue(self, event_name: str, event_data: dict) -> bool:
+        """Queue an event for sending. Returns False if it was sampled out or dropped."""
+        rate = self.sample_rates.get(event_name, self.default_sample_rate)
+        if rate < 1.0 and random.random() >= rate:
+            self._count("sampled_out")
+            return False
+        try:
+            self._queue.put_nowait((event_name, event_data, context.get_current()))
+        except queue.Full:
+            self._count("dropped")
+            return False
+        self._count("enqueued")
+        return True
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="telemetry-flusher", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the flusher after sending what is already queued."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            self._send_batch([first] + self._drain(self.batch_size - 1))
+
+    def _drain(self, limit: int):
+        batch = []
+        while len(batch) < limit:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def flush(self):
+        """Send everything currently queued on the calling thread."""
+        while True:
+            batch = self._drain(self.batch_size)
+            if not batch:
+                return
+            self._send_batch(batch)
+
+    def _send_batch(self, batch):
+        for event_name, event_data, event_context in batch:
+            token = context.attach(event_context)
+            try:
+                self._sink(event_name, event_data)
+                self._count("sent")
+            except AttributeError as e:
+                # Handle the 'ProxyLogger' object has no attribute 'resource' error
+                self._count("errors")
+                logging.warning(f"ProxyLogger error in track_event: {e}")
+            except Exception as e:
+                self._count("errors")
+                logging.warning(f"Error in track_event: {e}")
+            finally:
+                context.detach(token)
+
+    def stats(self) -> dict:
+        with self._counts_lock:
+            counts = dict(self._counts)
+        counts["queued"] = self._queue.qsize()
+        return counts
+
+
+_pipeline: Optional[EventPipeline] = None
+_resolved = False
+_lock = threading.Lock()
+
+
+def get_event_pipeline() -> Optional[EventPipeline]:
+    """Return the process-wide event pipeline, or None if telemetry is off.
+
+    Whether Application Insights is configured is decided once, on first use.
+    """
+    global _pipeline, _resolved
+    if _resolved:
+        return _pipeline
+    with _lock:
+        if not _resolved:
+            if config.APPLICATIONINSIGHTS_CONNECTION_STRING:
+                _pipeline = EventPipeline(
+                    track_event,
+                    max_queue=config.TELEMETRY_QUEUE_SIZE,
+                    batch_size=config.TELEMETRY_BATCH_SIZE,
+                    flush_interval=config.TELEMETRY_FLUSH_INTERVAL_SECONDS,
+                    sample_rates=parse_sample_rates(config.TELEMETRY_SAMPLE_RATES),
+                    default_sample_rate=config.TELEMETRY_DEFAULT_SAMPLE_RATE,
+                )
+                _pipeline.start()
+            else:
+                logging.warning(
+                    "Application Insights is not configured; custom events are disabled"
+                )
+            _resolved = True
+    return _pipeline
+
+
+def shutdown_event_pipeline():
+    """Flush and stop the event pipeline; events tracked afterwards are dropped."""
+    global _pipeline
+    with _lock:
+        pipeline, _pipeline = _pipeline, None
+    if pipeline is not None:
+        pipeline.stop()
+
+
+def _reset_event_pipeline():
+    """Stop the pipeline and forget the configuration check. For tests."""
+    global _resolved
+    shutdown_event_pipeline()
+    with _lock:
+        _resolved = False
+
+
 def track_event_if_configured(event_name: str, event_data: dict):
     """Track an event if Application Insights is configured.
 
-    This function safely wraps the Azure Monitor track_event function
-    to handle potential errors with the ProxyLogger.
+    The event is queued for the background flusher, so this never blocks on
+    the exporter. Without Application Insights it is a no-op.
 
     Args:
         event_name: The name of the event to track
         event_data: Dictionary of event data/dimensions
     """
-    try:
-        instrumentation_key = config.APPLICATIONINSIGHTS_CONNECTION_STRING
-        if instrumentation_key:
-            track_event(event_name, event_data)
-        else:
-            logging.warning(
-                f"Skipping track_event for {event_name} as Application Insights is not configured"
-            )
-    except AttributeError as e:
-        # Handle the 'ProxyLogger' object has no attribute 'resource' error
-        logging.warning(f"ProxyLogger error in track_event: {e}")
-    except Exception as e:
-        # Catch any other exceptions to prevent them from bubbling up
-        logging.warning(f"Error in track_event: {e}")
+    pipeline = get_event_pipeline()
+    if pipeline is not None:
+        pipeline.enqueue(event_name, event_data)
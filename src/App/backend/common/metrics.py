@@ -0,0 +1,165 @@
+"""
+Per-stage latency of the chat pipeline.
+
+``stage`` wraps one step of a chat request (client lookup, agent invoke, SQL
+generation and execution, search run) in an OpenTelemetry span and records
+its duration in the ``chat.stage.duration`` histogram, which the Azure Monitor
+pipeline exports when Application Insights is configured. The same durations
+are aggregated in process so ``/metrics`` can serve them in the Prometheus
+text format for load tests that run without Azure, next to point-in-time
+gauges such as SQL executor and connection pool occupancy.
+"""
+
+import asyncio
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Tuple
+
+from opentelemetry import metrics, trace
+from opentelemetry.trace import Status, StatusCode
+
+# Upper bounds in seconds, from fast cache hits to slow agent runs
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+
+tracer = trace.get_tracer(__name__)
+_meter = metrics.get_meter(__name__)
+_duration_histogram = _meter.create_histogram(
+    "chat.stage.duration", unit="ms", description="Duration of chat pipeline stages"
+)
+
+
+class StageHistograms:
+    """
+    Cumulative histograms of stage durations keyed by stage and outcome.
+    """
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, str], list] = {}
+
+    def observe(self, stage: str, seconds: float, outcome: str = "ok"):
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get((stage, outcome))
+            if series is None:
+                # Bucket counts, then +Inf count and sum
+                series = [0] * (len(self.buckets) + 1) + [0.0]
+                self._series[(stage, outcome)] = series
+            series[index] += 1
+            series[-1] += seconds
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    def render_prometheus(self) -> str:
+        name = "chat_stage_duration_seconds"
+        lines = [
+            f"# HELP {name} Duration of chat pipeline stages.",
+            f"# TYPE {name} histogram",
+        ]
+        with self._lock:
+            snapshot = {key: list(series) for key, series in self._series.items()}
+        for (stage, outcome), series in sorted(snapshot.items()):
+            labels = f'stage="{stage}",outcome="{outcome}"'
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            cumulative += series[len(self.buckets)]
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {cumulative}')
+            lines.append(f"{name}_sum{{{labels}}} {series[-1]}")
+            lines.append(f"{name}_count{{{labels}}} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+
+stage_histograms = StageHistograms()
+
+
+def render_gauges(prefix: str, stats: dict) -> str:
+    """
+    Render a (nested) dict of numeric stats as Prometheus gauges, e.g.
+    ``{"pool": {"idle": 2}}`` with prefix ``sql`` as ``sql_pool_idle 2``.
+    """
+    lines = []
+    for key, value in stats.items():
+        name = f"{prefix}_{key}"
+        if isinstance(value, dict):
+            lines.append(render_gauges(name, value).rstrip("\n"))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value}")
+    return "\n".join(line for line in lines if line) + "\n" if lines else ""
+
+
+def record_stage(stage: str, seconds: float, outcome: str = "ok"):
+    """
+    Record a stage duration measured elsewhere, such as time to first token.
+    """
+    stage_histograms.observe(stage, seconds, outcome)
+    _duration_histogram.record(seconds * 1000, {"stage": stage, "outcome": outcome})
+
+
+def _outcome(error) -> str:
+    if error is None:
+        return "ok"
+    # Cancellation is an abandoned request, not a failure of the stage
+    if isinstance(error, (asyncio.CancelledError, GeneratorExit)):
+        return "cancelled"
+    return "error"
+
+
+@contextmanager
+def stage(name: str, **attributes):
+    """
+    Time a pipeline stage in a span and the stage histograms.
+
+    The span is made current, so use this within one task and not across the
+    yields of a generator; ``StageTimer`` covers that case.
+    """
+    start = time.perf_counter()
+    error = None
+    with tracer.start_as_current_span(
+        f"chat.{name}",
+        attributes=attributes,
+        record_exception=False,
+        set_status_on_exception=False,
+    ) as span:
+        try:
+            yield span
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            _end_span(span, error)
+            record_stage(name, time.perf_counter() - start, _outcome(error))
+
+
+class StageTimer:
+    """
+    A stage that starts and ends at arbitrary points, such as across the
+    yields of a streaming generator. Its span is never made current.
+    """
+
+    def __init__(self, name: str, **attributes):
+        self.name = name
+        self._start = time.perf_counter()
+        self._span = tracer.start_span(f"chat.{name}", attributes=attributes)
+        self._done = False
+
+    def end(self, error=None):
+        if self._done:
+            return
+        self._done = True
+        _end_span(self._span, error)
+        self._span.end()
+        record_stage(self.name, time.perf_counter() - self._start, _outcome(error))
+
+
+def _end_span(span, error):
+    if _outcome(error) == "error":
+        span.record_exception(error)
+        span.set_status(Status(StatusCode.ERROR, str(error)))
@@ -0,0 +1,202 @@
+"""
+Server-Sent Events transport for streamed chat responses.
+
+NDJSON responses are buffered by some proxies, while ``text/event-stream`` is
+flushed as it is written. When a client asks for ``text/event-stream`` the
+response frames are produced by a background task into a ``ReplayBuffer`` and
+sent as SSE events with ids of the form ``<stream id>:<sequence>``. Idle gaps
+are filled with comment heartbeats so long tool calls do not look like hung
+connections. A client that reconnects with ``Last-Event-ID`` is replayed the
+events it missed from the buffer and then follows the live stream. Buffers
+are kept in process memory for a short time after the stream completes. A
+stream that nobody follows for ``orphan_timeout`` seconds is cancelled, so an
+abandoned chat stops consuming the agent.
+"""
+
+import asyncio
+import json
+import logging
+import time
+import uuid
+from collections import deque
+from typing import AsyncIterable, AsyncIterator, Dict, Optional, Tuple
+
+EVENT_STREAM_MIMETYPE = "text/event-stream"
+HEARTBEAT = b": heartbeat\n\n"
+
+
+def wants_event_stream(accept: str) -> bool:
+    return EVENT_STREAM_MIMETYPE in (accept or "")
+
+
+def format_event(data, event_id: Optional[str] = None, event: Optional[str] = None) -> bytes:
+    """
+    Encode one SSE event. ``data`` is a JSON line as str or bytes.
+    """
+    if isinstance(data, bytes):
+        data = data.decode("utf-8")
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if event is not None:
+        lines.append(f"event: {event}")
+    lines.extend(f"data: {line}" for line in data.rstrip("\n").split("\n"))
+    return ("\n".join(lines) + "\n\n").encode("utf-8")
+
+
+def parse_event_id(last_event_id: str) -> Optional[Tuple[str, int]]:
+    stream_id, _, seq = (last_event_id or "").strip().rpartition(":")
+    if not stream_id or not seq.isdigit():
+        return None
+    return stream_id, int(seq)
+
+
+class ReplayBuffer:
+    """
+    The most recent frames of one stream, followed by any number of readers.
+    """
+
+    def __init__(self, stream_id: str, max_events: int, orphan_timeout: float = 0):
+        self.stream_id = stream_id
+        self.orphan_timeout = orphan_timeout
+        self._followers = 0
+        self._events = deque(maxlen=max(1, max_events))
+        self._seq = 0
+        self._changed = asyncio.Event()
+        self.closed = False
+        self.closed_at: Optional[float] = None
+        self.error: Optional[str] = None
+        self.task: Optional[asyncio.Task] = None
+
+    def append(self, data):
+        self._seq += 1
+        self._events.append((self._seq, data))
+        self._notify()
+
+    def close(self, error: Optional[str] = None):
+        self.closed = True
+        self.closed_at = time.monotonic()
+        self.error = error
+        self._notify()
+
+    def _notify(self):
+        # Wake current readers; later readers wait on a fresh event
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def can_resume(self, after: int) -> bool:
+        first_seq = self._events[0][0] if self._events else self._seq + 1
+        return first_seq <= after + 1 and after <= self._seq
+
+    async def pump(self, frames: AsyncIterable):
+        """
+        Append every frame from ``frames``, then close the buffer.
+        """
+        try:
+            async for frame in frames:
+                self.append(frame)
+        except asyncio.CancelledError:
+            self.close(error="Stream cancelled")
+            raise
+        except Exception as e:
+            logging.exception("Exception while generating event stream")
+            self.close(error=str(e))
+        else:
+            self.close()
+
+    async def follow(self, after: int = 0, heartbeat: float = 0) -> AsyncIterator[Optional[Tuple[int, object]]]:
+        """
+        Yield ``(seq, frame)`` for frames after ``after`` until the buffer is
+        closed, and ``None`` whenever ``heartbeat`` seconds pass without one.
+        """
+        self._followers += 1
+        try:
+            async for item in self._follow(after, heartbeat):
+                yield item
+        finally:
+            self._followers -= 1
+            if self._followers == 0 and not self.closed and self.orphan_timeout > 0:
+                asyncio.get_running_loop().call_later(
+                    self.orphan_timeout, self._cancel_if_orphaned
+                )
+
+    def _cancel_if_orphaned(self):
+        if self._followers == 0 and not self.closed and self.task is not None:
+            logging.info(f"Cancelling event stream {self.stream_id} with no reader")
+            self.task.cancel()
+
+    async def _follow(self, after: int, heartbeat: float):
+        while True:
+            if not self.can_resume(after):
+                raise LookupError(f"Events after {after} are no longer buffered")
+            for seq, data in list(self._events):
+                if seq > after:
+                    after = seq
+                    yield seq, data
+            if self._seq > after:
+                continue
+            if self.closed:
+                return
+            changed = self._changed
+            try:
+                await asyncio.wait_for(changed.wait(), heartbeat or None)
+            except asyncio.TimeoutError:
+                yield None
+
+
+class ReplayRegistry:
+    """
+    In-process replay buffers by stream id, expired ``ttl`` seconds after
+    their stream completes.
+    """
+
+    def __init__(self, max_events: int = 512, ttl: float = 60, orphan_timeout: float = 0):
+        self.max_events = max_events
+        self.ttl = ttl
+        self.orphan_timeout = orphan_timeout
+        self._buffers: Dict[str, ReplayBuffer] = {}
+
+    def start(self, frames: AsyncIterable) -> ReplayBuffer:
+        self.prune()
+        buffer = ReplayBuffer(uuid.uuid4().hex, self.max_events, self.orphan_timeout)
+        buffer.task = asyncio.create_task(buffer.pump(frames))
+        self._buffers[buffer.stream_id] = buffer
+        return buffer
+
+    def get(self, stream_id: str) -> Optional[ReplayBuffer]:
+        self.prune()
+        return self._buffers.get(stream_id)
+
+    async def close(self):
+        """
+        Cancel streams that are still being produced.
+        """
+        tasks = [b.task for b in self._buffers.values() if b.task and not b.task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._buffers.clear()
+
+    def prune(self):
+        cutoff = time.monotonic() - self.ttl
+        for stream_id, buffer in list(self._buffers.items()):
+            if buffer.closed and buffer.closed_at < cutoff:
+                del self._buffers[stream_id]
+
+
+async def event_stream(buffer: ReplayBuffer, after: int = 0, heartbeat: float = 15) -> AsyncIterator[bytes]:
+    """
+    Encode a replay buffer as SSE events, starting after sequence ``after``.
+    """
+    try:
+        async for item in buffer.follow(after, heartbeat):
+            if item is None:
+                yield HEARTBEAT
+            else:
+                seq, data = item
+                yield format_event(data, event_id=f"{buffer.stream_id}:{seq}")
+    except LookupError as e:
+        yield format_event(json.dumps({"error": str(e), "code": "events_evicted"}), event="error")
+        return
+    if buffer.error:
+        yield format_event(json.dumps({"error": buffer.error}), event="error")
@@ -0,0 +1,94 @@
+"""
+Merge small streamed deltas into fewer, larger frames.
+
+Model and agent streams emit a delta every few characters, and each one
+becomes its own NDJSON line and socket write. ``coalesce_deltas`` forwards
+the first delta untouched, so time to first token is unchanged, then buffers
+the rest and flushes when the buffer reaches ``max_bytes``, when ``max_ms``
+have passed since the first buffered delta (even if the upstream is stalled
+in a tool call), or at the end of a sentence. Items that are not text, such
+as tool progress events, flush the buffer and are forwarded in order.
+"""
+
+import asyncio
+from typing import AsyncIterable, AsyncIterator
+
+SENTENCE_ENDINGS = (".", "!", "?", "\n")
+
+
+async def coalesce_deltas(
+    deltas: AsyncIterable[str],
+    max_bytes: int = 0,
+    max_ms: float = 0,
+    sentence_boundary: bool = False,
+) -> AsyncIterator[str]:
+    """
+    Yield the text of ``deltas`` merged according to the flush policy.
+
+    Empty deltas are dropped. With no policy configured every delta is
+    forwarded as is.
+    """
+    if max_bytes <= 0 and max_ms <= 0 and not sentence_boundary:
+        async for text in deltas:
+            if text:
+                yield text
+        return
+
+    loop = asyncio.get_running_loop()
+    iterator = deltas.__aiter__()
+    pending = None
+    buffer = []
+    size = 0
+    deadline = None
+    first = True
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(iterator.__anext__())
+            timeout = None
+            if buffer and deadline is not None:
+                timeout = max(0.0, deadline - loop.time())
+            # asyncio.wait leaves the pending read running on timeout, unlike wait_for
+            done, _ = await asyncio.wait({pending}, timeout=timeout)
+            if not done:
+                yield "".join(buffer)
+                buffer, size, deadline = [], 0, None
+                continue
+
+            read, pending = pending, None
+            try:
+                text = read.result()
+            except StopAsyncIteration:
+                break
+            if not text:
+                continue
+            if not isinstance(text, str):
+                if buffer:
+                    yield "".join(buffer)
+                    buffer, size, deadline = [], 0, None
+                yield text
+                continue
+            if first:
+                first = False
+                yield text
+                continue
+
+            buffer.append(text)
+            size += len(text.encode("utf-8"))
+            if deadline is None and max_ms > 0:
+                deadline = loop.time() + max_ms / 1000
+            if (
+                (max_bytes > 0 and size >= max_bytes)
+                or (deadline is not None and loop.time() >= deadline)
+                or (sentence_boundary and text.rstrip(" ").endswith(SENTENCE_ENDINGS))
+            ):
+                yield "".join(buffer)
+                buffer, size, deadline = [], 0, None
+
+        if buffer:
+            yield "".join(buffer)
+    finally:
+        if pending is not None:
+            # Propagate cancellation into the upstream and wait for its cleanup
+            pending.cancel()
+            await asyncio.gather(pending, return_exceptions=True)
@@ -1,8 +1,12 @@
+import asyncio
 import dataclasses
+import hashlib
 import json
 import logging
+import time
+from typing import Dict, Optional, Tuple
 
-import requests
+import aiohttp
 
 from backend.common.config import config
 
@@ -12,6 +16,15 @@ if DEBUG.lower() == "true":
 
 AZURE_SEARCH_PERMITTED_GROUPS_COLUMN = config.AZURE_SEARCH_PERMITTED_GROUPS_COLUMN
 
+GRAPH_GROUPS_ENDPOINT = (
+    "https://graph.microsoft.com/v1.0/me/transitiveMemberOf?$select=id&$top=999"
+)
+
+# Shared Graph session and per-token cache of search filter strings
+_graph_session: Optional[aiohttp.ClientSession] = None
+_filter_cache: Dict[str, Tuple[str, float]] = {}
+_filter_inflight: Dict[str, asyncio.Future] = {}
+
 
 class JSONEncoder(json.JSONEncoder):
     def default(self, o):
@@ -29,6 +42,42 @@ async def format_as_ndjson(r):
         yield json.dumps({"error": str(error)})
 
 
+SECRET_PARAMS = frozenset(
+    ["key", "connection_string", "embedding_key", "encoded_api_key", "api_key"]
+)
+
+
+def redact_secrets(obj, secret_keys=SECRET_PARAMS):
+    """
+    Return a copy of nested dicts and lists with secret values masked.
+
+    Only containers are copied; leaf values are shared with the original.
+    """
+    if isinstance(obj, dict):
+        return {
+            k: "*****" if k in secret_keys and v else redact_secrets(v, secret_keys)
+            for k, v in obj.items()
+        }
+    if isinstance(obj, list):
+        return [redact_secrets(item, secret_keys) for item in obj]
+    return obj
+
+
+class RedactedJSON:
+    """
+    Log argument that redacts and serializes its value only when formatted,
+    so disabled debug logging costs nothing beyond the level check.
+    """
+
+    __slots__ = ("obj",)
+
+    def __init__(self, obj):
+        self.obj = obj
+
+    def __str__(self):
+        return json.dumps(redact_secrets(self.obj), indent=4, cls=JSONEncoder)
+
+
 def parse_multi_columns(columns: str) -> list:
     if "|" in columns:
         return columns.split("|")
@@ -36,36 +85,50 @@ def parse_multi_columns(columns: str) -> list:
         return columns.split(",")
 
 
-def fetchUserGroups(userToken, nextLink=None):
-    # Recursively fetch group membership
-    if nextLink:
-        endpoint = nextLink
-    else:
-        endpoint = "https://graph.microsoft.com/v1.0/me/transitiveMemberOf?$select=id"
+def get_graph_session() -> aiohttp.ClientSession:
+    global _graph_session
+    if _graph_session is None or _graph_session.closed:
+        _graph_session = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=config.GRAPH_REQUEST_TIMEOUT_SECONDS)
+        )
+    return _graph_session
+
+
+async def close_graph_session():
+    global _graph_session
+    if _graph_session is not None:
+        await _graph_session.close()
+        _graph_session = None
 
+
+async def _fetch_user_groups(userToken):
+    # Graph only exposes the next page through @odata.nextLink, so pages are
+    # followed in order; $top=999 keeps the number of round trips small
     headers = {"Authorization": "bearer " + userToken}
-    try:
-        r = requests.get(endpoint, headers=headers)
-        if r.status_code != 200:
-            logging.error(f"Error fetching user groups: {r.status_code} {r.text}")
-            return []
+    session = get_graph_session()
+    groups = []
+    endpoint = GRAPH_GROUPS_ENDPOINT
+    while endpoint:
+        async with session.get(endpoint, headers=headers) as r:
+            if r.status != 200:
+                raise RuntimeError(
+                    f"Error fetching user groups: {r.status} {await r.text()}"
+                )
+            page = await r.json()
+        groups.extend(page.get("value", []))
+        endpoint = page.get("@odata.nextLink")
+    return groups
 
-        r = r.json()
-        if "@odata.nextLink" in r:
-            nextLinkData = fetchUserGroups(userToken, r["@odata.nextLink"])
-            r["value"].extend(nextLinkData)
 
-        return r["value"]
+async def fetchUserGroups(userToken):
+    try:
+        return await _fetch_user_groups(userToken)
     except Exception as e:
         logging.error(f"Exception in fetchUserGroups: {e}")
         return []
 
 
-def generateFilterString(userToken):
-    # Get list of groups user is a member of
-    userGroups = fetchUserGroups(userToken)
-
-    # Construct filter string
+def _build_filter_string(userGroups):
     if not userGroups:
         logging.debug("No user groups found")
 
@@ -73,6 +136,60 @@ def generateFilterString(userToken):
     return f"{AZURE_SEARCH_PERMITTED_GROUPS_COLUMN}/any(g:search.in(g, '{group_ids}'))"
 
 
+def _token_key(userToken):
+    return hashlib.sha256(userToken.encode("utf-8")).hexdigest()
+
+
+def clear_filter_cache():
+    _filter_cache.clear()
+
+
+async def generateFilterString(userToken):
+    """
+    Build the group filter for a user, cached per access token.
+
+    Concurrent requests with the same token share one Graph lookup. Failed
+    lookups fall back to an empty group list and are not cached.
+    """
+    key = _token_key(userToken)
+    cached = _filter_cache.get(key)
+    if cached and cached[1] > time.monotonic():
+        return cached[0]
+
+    task = _filter_inflight.get(key)
+    if task is None:
+        # Run the lookup as its own task so a cancelled request does not
+        # cancel it for the other requests waiting on the same token
+        task = asyncio.ensure_future(_load_filter_string(key, userToken))
+        _filter_inflight[key] = task
+        task.add_done_callback(lambda _: _filter_inflight.pop(key, None))
+    return await asyncio.shield(task)
+
+
+async def _load_filter_string(key, userToken):
+    try:
+        filter_string = _build_filter_string(await _fetch_user_groups(userToken))
+    except Exception as e:
+        logging.error(f"Exception in fetchUserGroups: {e}")
+        return _build_filter_string([])
+    _store_filter(key, filter_string)
+    return filter_string
+
+
+def _store_filter(key, filter_string):
+    ttl = config.USER_GROUPS_CACHE_TTL_SECONDS
+    if ttl <= 0:
+        return
+    now = time.monotonic()
+    if len(_filter_cache) >= config.USER_GROUPS_CACHE_MAX_ENTRIES:
+        for expired in [k for k, (_, exp) in _filter_cache.items() if exp <= now]:
+            del _filter_cache[expired]
+        while len(_filter_cache) >= config.USER_GROUPS_CACHE_MAX_ENTRIES:
+            # Evict the oldest entry
+            del _filter_cache[next(iter(_filter_cache))]
+    _filter_cache[key] = (filter_string, now + ttl)
+
+
 def format_non_streaming_response(chatCompletion, history_metadata, apim_request_id):
     response_obj = {
         "id": chatCompletion.id,
@@ -142,6 +259,56 @@ def format_stream_response(chatCompletionChunk, history_metadata, apim_request_i
     return {}
 
 
+class StreamChunkEncoder:
+    """
+    Encode assistant deltas as NDJSON lines in the format_stream_response shape.
+
+    The envelope is the same for every chunk of a stream, so it is serialized
+    once into byte prefix and suffix; each chunk only encodes its delta text.
+    """
+
+    __slots__ = ("_head", "_prefix", "_suffix", "_progress_suffix")
+
+    EMPTY = b"{}\n"
+
+    def __init__(self, chunk_id, model, created, history_metadata, apim_request_id):
+        envelope = json.dumps(
+            {
+                "id": chunk_id,
+                "model": model,
+                "created": created,
+                "object": "extensions.chat.completion.chunk",
+            }
+        )
+        tail = (
+            ', "history_metadata": '
+            + json.dumps(history_metadata, cls=JSONEncoder)
+            + ', "apim-request-id": '
+            + json.dumps(apim_request_id)
+            + "}\n"
+        )
+        self._head = (envelope[:-1] + ', "choices": [], "progress": ').encode("utf-8")
+        self._prefix = (
+            envelope[:-1] + ', "choices": [{"messages": [{"role": "assistant", "content": '
+        ).encode("utf-8")
+        self._suffix = ("}]}]" + tail).encode("utf-8")
+        self._progress_suffix = tail.encode("utf-8")
+
+    def encode(self, text) -> bytes:
+        if not text:
+            return self.EMPTY
+        return b"".join((self._prefix, json.dumps(text).encode("utf-8"), self._suffix))
+
+    def encode_progress(self, progress) -> bytes:
+        """
+        Encode a progress event as a chunk with no messages and a ``progress``
+        field. Clients must skip such frames rather than treat them as empty
+        answers; the chat frontend does so with ``isProgressFrame``.
+        """
+        payload = json.dumps(progress, cls=JSONEncoder).encode("utf-8")
+        return b"".join((self._head, payload, self._progress_suffix))
+
+
 def format_pf_non_streaming_response(
     chatCompletion,
     history_metadata,
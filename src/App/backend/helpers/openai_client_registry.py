@@ -0,0 +1,92 @@
+"""
+App-scoped registry of pooled Azure OpenAI clients.
+
+Building an AIProjectClient and its OpenAI client on every request means a new
+credential, a new token and a new TLS connection each time. The registry keeps
+one async OpenAI client (and therefore one keep-alive HTTP pool and one cached
+bearer token) per endpoint and API version for the lifetime of the app.
+"""
+
+import asyncio
+import logging
+from typing import Dict, Optional, Tuple
+
+from azure.ai.projects.aio import AIProjectClient
+
+from backend.common.config import config
+from backend.common.event_utils import track_event_if_configured
+from backend.helpers.azure_credential_utils import get_azure_credential_async
+
+
+class OpenAIClientRegistry:
+    """
+    Holds one AsyncAzureOpenAI client per (endpoint, api_version) pair.
+
+    Created in the app's ``before_serving`` hook and closed in ``after_serving``.
+    """
+
+    def __init__(self, client_id: Optional[str] = None):
+        self._client_id = client_id if client_id is not None else config.MID_ID
+        self._lock = asyncio.Lock()
+        self._entries: Dict[Tuple[str, str], dict] = {}
+
+    async def get_client(self, endpoint: str, api_version: str):
+        """
+        Return the pooled OpenAI client for the endpoint and API version,
+        creating it on first use.
+        """
+        key = (endpoint, api_version)
+        entry = self._entries.get(key)
+        if entry is not None:
+            return entry["openai_client"]
+
+        async with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                credential = await get_azure_credential_async(self._client_id)
+                project_client = AIProjectClient(
+                    endpoint=endpoint,
+                    credential=credential,
+                    api_version=api_version,
+                )
+                try:
+                    openai_client = await project_client.get_openai_client(
+                        api_version=api_version
+                    )
+                except Exception:
+                    await project_client.close()
+                    await credential.close()
+                    raise
+                entry = {
+                    "credential": credential,
+                    "project_client": project_client,
+                    "openai_client": openai_client,
+                }
+                self._entries[key] = entry
+                logging.info(
+                    f"Created pooled OpenAI client for {endpoint} (api-version {api_version})"
+                )
+                track_event_if_configured(
+                    "AzureAIProjectsClientInitialized",
+                    {
+                        "status": "success",
+                        "endpoint": endpoint,
+                        "use_managed_identity": True,
+                    },
+                )
+        return entry["openai_client"]
+
+    async def close(self):
+        """
+        Close every pooled client along with its project client and credential.
+        """
+        async with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+
+        for entry in entries:
+            for name in ("openai_client", "project_client", "credential"):
+                try:
+                    await entry[name].close()
+                except Exception as e:
+                    logging.warning(f"Error closing pooled {name}: {e}")
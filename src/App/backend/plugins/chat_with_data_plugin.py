@@ -1,18 +1,23 @@
+import asyncio
 import logging
 from typing import Annotated
 
 from azure.ai.agents.models import (
     Agent,
+    AsyncToolSet,
     AzureAISearchQueryType,
     AzureAISearchTool,
     MessageRole,
 )
 from azure.ai.projects import AIProjectClient
+from azure.ai.projects.aio import AIProjectClient as AsyncAIProjectClient
 from backend.helpers.azure_credential_utils import get_azure_credential
 from semantic_kernel.functions.kernel_function_decorator import kernel_function
 
+from backend.agents.agent_runs import cancel_active_runs
 from backend.common.config import config
-from backend.services.sqldb_service import get_connection
+from backend.common.metrics import stage
+from backend.services.sqldb_service import fetch_all
 
 # --------------------------
 # ChatWithDataPlugin Class
@@ -40,7 +45,7 @@ class ChatWithDataPlugin:
         if not input or not input.strip():
             return "Error: Query input is required"
 
-        thread = None
+        thread_id = None
         try:
             # TEMPORARY: Use AgentFactory directly to debug the issue
             logging.info(f"Using AgentFactory directly for SQL agent for ClientId: {ClientId}")
@@ -50,31 +55,33 @@ class ChatWithDataPlugin:
             logging.info(f"SQL agent retrieved: {agent_info is not None}")
             agent = agent_info["agent"]
             project_client = agent_info["client"]
+            thread_pool = agent_info["thread_pool"]
 
-            thread = project_client.agents.threads.create()
+            thread_id = await thread_pool.acquire()
 
             # Send question as message
-            project_client.agents.messages.create(
-                thread_id=thread.id,
+            await project_client.agents.messages.create(
+                thread_id=thread_id,
                 role=MessageRole.USER,
                 content=f"ClientId: {ClientId}\nQuestion: {input}",
             )
 
-            # Run the agent
-            run = project_client.agents.runs.create_and_process(
-                thread_id=thread.id,
-                agent_id=agent.id,
-                temperature=0,
-            )
+            with stage("sql_generation"):
+                # Run the agent
+                run = await project_client.agents.runs.create_and_process(
+                    thread_id=thread_id,
+                    agent_id=agent.id,
+                    temperature=0,
+                )
 
-            if run.status == "failed":
-                return f"Error: Agent run failed: {run.last_error}"
+                if run.status == "failed":
+                    return f"Error: Agent run failed: {run.last_error}"
 
-            # Get SQL query from the agent's final response
-            message = project_client.agents.messages.get_last_message_text_by_role(
-                thread_id=thread.id,
-                role=MessageRole.AGENT
-            )
+                # Get SQL query from the agent's final response
+                message = await project_client.agents.messages.get_last_message_text_by_role(
+                    thread_id=thread_id,
+                    role=MessageRole.AGENT
+                )
             sql_query = message.text.value.strip() if message else None
             logging.info(f"Generated SQL query: {sql_query}")
 
@@ -85,11 +92,9 @@ class ChatWithDataPlugin:
             sql_query = sql_query.replace("```sql", "").replace("```", "")
             logging.info(f"Cleaned SQL query: {sql_query}")
 
-            # Execute the query
-            conn = get_connection()
-            cursor = conn.cursor()
-            cursor.execute(sql_query)
-            rows = cursor.fetchall()
+            # Execute the query on a pooled connection in the SQL executor
+            with stage("sql_execution"):
+                rows = await fetch_all(sql_query)
             logging.info(f"Query returned {len(rows)} rows")
 
             if not rows:
@@ -98,20 +103,18 @@ class ChatWithDataPlugin:
                 result = "\n".join(str(row) for row in rows)
                 logging.info(f"Result preview: {result[:200]}...")
 
-            conn.close()
-
             return result[:20000] if len(result) > 20000 else result
+        except asyncio.CancelledError:
+            if thread_id:
+                await cancel_active_runs(project_client.agents, thread_id)
+            raise
         except Exception as e:
             logging.exception("Error in get_SQL_Response")
             return f"Error retrieving SQL data: {str(e)}"
         finally:
-            if thread:
-                try:
-                    logging.info(f"Attempting to delete thread {thread.id}")
-                    await project_client.agents.threads.delete(thread.id)
-                    logging.info(f"Thread {thread.id} deleted successfully")
-                except Exception as e:
-                    logging.error(f"Error deleting thread {thread.id}: {str(e)}")
+            if thread_id:
+                # Deleted in the background, off the response path
+                thread_pool.release(thread_id)
 
     @kernel_function(
         name="ChatWithCallTranscripts",
@@ -130,7 +133,7 @@ class ChatWithDataPlugin:
         if not question or not question.strip():
             return "Error: Question input is required"
 
-        thread = None
+        thread_id = None
         try:
             response_text = ""
 
@@ -139,79 +142,62 @@ class ChatWithDataPlugin:
             agent_info = await AgentFactory.get_search_agent()
 
             agent: Agent = agent_info["agent"]
-            project_client: AIProjectClient = agent_info["client"]
+            project_client: AsyncAIProjectClient = agent_info["client"]
+            thread_pool = agent_info["thread_pool"]
 
             try:
-                field_mapping = {
-                    "contentFields": ["content"],
-                    "urlField": "sourceurl",
-                    "titleField": "chunk_id",
-                    "vector_fields": ["contentVector"],
-                }
-
-                project_index = project_client.indexes.create_or_update(
-                    name=f"project-index-{config.AZURE_SEARCH_INDEX}",
-                    version="1",
-                    index={
-                        "connectionName": config.AZURE_SEARCH_CONNECTION_NAME,
-                        "indexName": config.AZURE_SEARCH_INDEX,
-                        "type": "AzureSearch",
-                        "fieldMapping": field_mapping,
-                    },
-                )
-
+                # The client filter is scoped to this run; the shared agent is never updated
+                escaped_client_id = ClientId.replace("'", "''")
                 ai_search_tool = AzureAISearchTool(
-                    index_asset_id=f"{project_index.name}/versions/{project_index.version}",
+                    index_asset_id=agent_info["index_asset_id"],
                     index_connection_id=None,
                     index_name=None,
                     query_type=AzureAISearchQueryType.VECTOR_SIMPLE_HYBRID,
-                    filter=f"client_id eq '{ClientId}'",
-                )
-
-                agent = project_client.agents.update_agent(
-                    agent_id=agent.id,
-                    tools=ai_search_tool.definitions,
-                    tool_resources=ai_search_tool.resources,
+                    filter=f"client_id eq '{escaped_client_id}'",
                 )
+                toolset = AsyncToolSet()
+                toolset.add(ai_search_tool)
 
-                thread = project_client.agents.threads.create()
+                thread_id = await thread_pool.acquire()
 
-                project_client.agents.messages.create(
-                    thread_id=thread.id,
+                await project_client.agents.messages.create(
+                    thread_id=thread_id,
                     role=MessageRole.USER,
                     content=question,
                 )
 
-                run = project_client.agents.runs.create_and_process(
-                    thread_id=thread.id,
-                    agent_id=agent.id,
-                    tool_choice={"type": "azure_ai_search"},
-                    temperature=0.0,
-                )
+                with stage("search_run"):
+                    run = await project_client.agents.runs.create_and_process(
+                        thread_id=thread_id,
+                        agent_id=agent.id,
+                        toolset=toolset,
+                        tool_choice={"type": "azure_ai_search"},
+                        temperature=0.0,
+                    )
 
                 if run.status == "failed":
                     logging.error(f"AI Search Agent Run failed: {run.last_error}")
                     return "Error retrieving data from call transcripts"
                 else:
                     message = (
-                        project_client.agents.messages.get_last_message_text_by_role(
-                            thread_id=thread.id, role=MessageRole.AGENT
+                        await project_client.agents.messages.get_last_message_text_by_role(
+                            thread_id=thread_id, role=MessageRole.AGENT
                         )
                     )
                     if message:
                         response_text = message.text.value
 
+            except asyncio.CancelledError:
+                if thread_id:
+                    await cancel_active_runs(project_client.agents, thread_id)
+                raise
             except Exception as e:
                 logging.error(f"Error in AI Search Tool: {str(e)}")
                 return "Error retrieving data from call transcripts"
 
             finally:
-                if thread:
-                    try:
-                        await project_client.agents.threads.delete(thread.id)
-                        logging.info(f"Thread {thread.id} deleted successfully")
-                    except Exception as e:
-                        logging.error(f"Error deleting thread {thread.id}: {str(e)}")
+                if thread_id:
+                    thread_pool.release(thread_id)
 
             if not response_text.strip():
                 return "No data found for that client."
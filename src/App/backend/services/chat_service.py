@@ -1,22 +1,36 @@
+import asyncio
+import time
+
 from quart import current_app
 from semantic_kernel.agents import AzureAIAgent, AzureAIAgentThread
 from semantic_kernel.contents.chat_message_content import ChatMessageContent
 from semantic_kernel.contents.utils.author_role import AuthorRole
 
+from backend.agents.agent_runs import cancel_active_runs
+from backend.agents.tool_progress import ToolProgress, progress_queue, tool_label
 from backend.common.config import config
+from backend.common.metrics import StageTimer, stage
 from backend.services.sqldb_service import get_client_name_from_db
 
 
+_STREAM_END = object()
+
+
 async def stream_response_from_wealth_assistant(query: str, client_id: str):
     """
     Streams real-time chat response from the Wealth Assistant.
     Uses Semantic Kernel agent with SQL and Azure Cognitive Search based on the client ID.
+
+    The generator yields delta text strings, and ToolProgress events while the
+    agent's tools run, repeated every TOOL_PROGRESS_INTERVAL_SECONDS.
     """
+    thread = None
     try:
         # Dynamically get the name from the database
-        selected_client_name = get_client_name_from_db(
-            client_id
-        )  # Optionally fetch from DB
+        with stage("client_name_lookup"):
+            selected_client_name = await get_client_name_from_db(
+                client_id
+            )  # Optionally fetch from DB
 
         # Prepare fallback instructions with the single-line prompt
         additional_instructions = config.STREAM_TEXT_SYSTEM_PROMPT
@@ -39,7 +53,8 @@ async def stream_response_from_wealth_assistant(query: str, client_id: str):
 
         agent: AzureAIAgent = current_app.wealth_advisor_agent
 
-        thread: AzureAIAgentThread = None
+        # Created by the agent on first use; held here so an abandoned run can be cancelled
+        thread = AzureAIAgentThread(client=agent.client)
         message = ChatMessageContent(role=AuthorRole.USER, content=query)
         sk_response = agent.invoke_stream(
             messages=[message],
@@ -48,17 +63,71 @@ async def stream_response_from_wealth_assistant(query: str, client_id: str):
         )
 
         async def generate():
+            queue = asyncio.Queue()
+            last_chunk = None
+            invoke_timer = StageTimer("agent_invoke")
+
+            async def pump():
+                nonlocal last_chunk
+                try:
+                    async for chunk in sk_response:
+                        last_chunk = chunk
+                        if chunk and chunk.content:
+                            queue.put_nowait(chunk.content)  # just the deltaText
+                except Exception as e:
+                    queue.put_nowait(e)
+                finally:
+                    queue.put_nowait(_STREAM_END)
+
+            # The agent stream runs in its own task so progress can be reported
+            # while a tool call blocks it; the task inherits the progress queue
+            token = progress_queue.set(queue)
+            try:
+                pump_task = asyncio.create_task(pump())
+            finally:
+                progress_queue.reset(token)
+
+            interval = config.TOOL_PROGRESS_INTERVAL_SECONDS
+            running_tools = {}
+            completed = False
+            error = None
             try:
-                # yields deltaText strings one-by-one
-                async for chunk in sk_response:
-                    if not chunk or not chunk.content:
+                while True:
+                    timeout = interval if running_tools and interval > 0 else None
+                    try:
+                        item = await asyncio.wait_for(queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        now = time.monotonic()
+                        for name, started in running_tools.items():
+                            elapsed_ms = int((now - started) * 1000)
+                            yield ToolProgress(name, "running", tool_label(name), elapsed_ms)
                         continue
-                    yield chunk.content  # just the deltaText
+                    if item is _STREAM_END:
+                        completed = True
+                        break
+                    if isinstance(item, Exception):
+                        raise item
+                    if isinstance(item, ToolProgress):
+                        if item.status == "started":
+                            running_tools[item.tool] = time.monotonic()
+                        else:
+                            running_tools.pop(item.tool, None)
+                    yield item
+            except BaseException as e:
+                error = e
+                raise
             finally:
-                thread = chunk.thread if chunk else None
-                await thread.delete() if thread else None
+                invoke_timer.end(error)
+                if not pump_task.done():
+                    pump_task.cancel()
+                await asyncio.gather(pump_task, return_exceptions=True)
+                if not completed and thread.id:
+                    # The client went away or the stream failed mid-run
+                    await cancel_active_runs(agent.client.agents, thread.id)
+                used_thread = last_chunk.thread if last_chunk else thread
+                await used_thread.delete() if used_thread and used_thread.id else None
 
         return generate
     except Exception as e:
-        await thread.delete() if thread else None
+        await thread.delete() if thread and thread.id else None
         raise e
@@ -0,0 +1,96 @@
+"""
+In-process TTL cache for the formatted client roster served by /api/users.
+
+The roster query joins and windows over every client, asset and meeting row,
+and the frontend asks for it on every page load. The cache keeps the formatted
+rows for a configurable TTL, lets concurrent misses share a single query, and
+derives an ETag from the content so unchanged rosters can be answered with 304.
+It also indexes client names so chat turns can resolve them without SQL.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+
+class ClientRosterCache:
+    """
+    Caches the result of ``loader`` for ``ttl`` seconds.
+
+    A ``ttl`` of 0 disables caching but still coalesces concurrent loads.
+    """
+
+    def __init__(self, loader: Callable[[], Awaitable[List[dict]]], ttl: float = 300):
+        self._loader = loader
+        self.ttl = ttl
+        self._users: Optional[List[dict]] = None
+        self._etag: Optional[str] = None
+        self._client_names: dict = {}
+        self._loaded_at = 0.0
+        self._generation = 0
+        self._inflight: Optional[asyncio.Future] = None
+
+    @property
+    def is_fresh(self) -> bool:
+        return (
+            self._users is not None
+            and self.ttl > 0
+            and time.monotonic() - self._loaded_at < self.ttl
+        )
+
+    async def get(self) -> Tuple[List[dict], str]:
+        """
+        Return ``(users, etag)``, loading the roster if the cache is stale.
+        """
+        if self.is_fresh:
+            return self._users, self._etag
+
+        if self._inflight is None:
+            self._inflight = asyncio.ensure_future(self._load(self._generation))
+            self._inflight.add_done_callback(self._clear_inflight)
+        # Shield so one cancelled caller does not cancel the shared load
+        return await asyncio.shield(self._inflight)
+
+    def _clear_inflight(self, future: asyncio.Future):
+        if self._inflight is future:
+            self._inflight = None
+
+    async def _load(self, generation: int) -> Tuple[List[dict], str]:
+        users = await self._loader()
+        etag = self.compute_etag(users)
+        # An invalidation during the load means the result may already be stale
+        if generation == self._generation:
+            self._users = users
+            self._etag = etag
+            self._client_names = {
+                str(user.get("ClientId")): user.get("ClientName") for user in users
+            }
+            self._loaded_at = time.monotonic()
+        return users, etag
+
+    def get_client_name(self, client_id) -> Optional[str]:
+        """
+        Return the cached name for ``client_id``, or None on a miss.
+        """
+        if not self.is_fresh:
+            return None
+        return self._client_names.get(str(client_id))
+
+    def invalidate(self):
+        """
+        Drop the cached roster so the next request reloads it.
+        """
+        self._generation += 1
+        self._users = None
+        self._etag = None
+        self._client_names = {}
+        self._inflight = None
+        logging.info("Client roster cache invalidated")
+
+    @staticmethod
+    def compute_etag(users: List[dict]) -> str:
+        payload = json.dumps(users, sort_keys=True, default=str).encode("utf-8")
+        return hashlib.sha256(payload).hexdigest()[:32]
@@ -20,6 +20,8 @@ class CosmosConversationClient:
         self.database_name = database_name
         self.container_name = container_name
         self.enable_message_feedback = enable_message_feedback
+        # Result of the last ensure() call as (success, message); None until checked
+        self.health = None
         try:
             self.cosmosdb_client = CosmosClient(
                 self.cosmosdb_endpoint, credential=credential
@@ -67,6 +69,26 @@ class CosmosConversationClient:
 
         return True, "CosmosDB client initialized successfully"
 
+    async def check_health(self):
+        """
+        Run ensure() and cache the result on the client.
+        """
+        self.health = await self.ensure()
+        return self.health
+
+    async def get_health(self):
+        """
+        Return the cached health state without a round trip to CosmosDB.
+
+        The check is only re-run if it has never run or the last one failed.
+        """
+        if self.health is None or not self.health[0]:
+            return await self.check_health()
+        return self.health
+
+    async def close(self):
+        await self.cosmosdb_client.close()
+
     async def create_conversation(self, user_id, title=""):
         conversation = {
             "id": str(uuid.uuid4()),
@@ -0,0 +1,115 @@
+"""
+Background scheduler for periodic maintenance jobs.
+
+Jobs run on the app's event loop, started from ``before_serving`` and stopped
+in ``after_serving``, so maintenance work such as rolling the sample data
+dates forward never runs inside a user request. Each job has its own lock,
+which keeps a slow run from overlapping the next tick or a manual trigger.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+from backend.common.event_utils import track_event_if_configured
+
+
+class MaintenanceJob:
+    """
+    A named coroutine function run every ``interval`` seconds.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[], Awaitable],
+        interval: float,
+        run_on_start: bool = True,
+    ):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.run_on_start = run_on_start
+        self.lock = asyncio.Lock()
+        self.last_run: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.task: Optional[asyncio.Task] = None
+
+    async def run_once(self):
+        """
+        Run the job now unless a run is already in progress.
+
+        Returns False if the run was skipped because the job was busy.
+        """
+        if self.lock.locked():
+            logging.info(f"Maintenance job {self.name} already running, skipping")
+            return False
+        async with self.lock:
+            start = time.monotonic()
+            try:
+                await self.func()
+                self.last_error = None
+                track_event_if_configured(
+                    "MaintenanceJob_Success",
+                    {"job": self.name, "duration_ms": int((time.monotonic() - start) * 1000)},
+                )
+            except Exception as e:
+                self.last_error = str(e)
+                logging.exception(f"Maintenance job {self.name} failed")
+                track_event_if_configured(
+                    "MaintenanceJob_Failed", {"job": self.name, "error": str(e)}
+                )
+            finally:
+                self.last_run = time.time()
+        return True
+
+    async def _loop(self):
+        if not self.run_on_start:
+            await asyncio.sleep(self.interval)
+        while True:
+            await self.run_once()
+            await asyncio.sleep(self.interval)
+
+
+class MaintenanceScheduler:
+    """
+    Owns the background tasks for a set of maintenance jobs.
+    """
+
+    def __init__(self):
+        self.jobs: Dict[str, MaintenanceJob] = {}
+
+    def add_job(
+        self,
+        name: str,
+        func: Callable[[], Awaitable],
+        interval: float,
+        run_on_start: bool = True,
+    ) -> Optional[MaintenanceJob]:
+        """
+        Register a job. Jobs with a non-positive interval are disabled.
+        """
+        if interval <= 0:
+            logging.info(f"Maintenance job {name} disabled")
+            return None
+        job = MaintenanceJob(name, func, interval, run_on_start=run_on_start)
+        self.jobs[name] = job
+        return job
+
+    def start(self):
+        for job in self.jobs.values():
+            if job.task is None:
+                job.task = asyncio.create_task(job._loop(), name=f"maintenance-{job.name}")
+                logging.info(f"Started maintenance job {job.name} every {job.interval}s")
+
+    async def run_now(self, name: str) -> bool:
+        return await self.jobs[name].run_once()
+
+    async def stop(self):
+        tasks = [job.task for job in self.jobs.values() if job.task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for job in self.jobs.values():
+            job.task = None
@@ -0,0 +1,305 @@
+"""
+Bounded asyncio pool of pyodbc connections to Azure SQL.
+
+Opening a connection to Azure SQL (AAD token, TLS, login) costs more than the
+queries the app runs, so connections are kept open and shared. Each pooled
+connection remembers when its access token expires and is recycled before
+that, connections left idle too long are evicted, and callers wait for a free
+connection asynchronously instead of blocking the event loop. Returned
+connections are rolled back so no open transaction reaches the next borrower,
+and connections are closed on the executor, never while holding the pool lock.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Optional, Tuple
+
+import pyodbc
+
+
+class PooledConnection:
+    """
+    A pyodbc connection plus the bookkeeping the pool needs to recycle it.
+    """
+
+    def __init__(self, conn, expires_on: Optional[float] = None):
+        self.conn = conn
+        self.expires_on = expires_on
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+    def close(self):
+        try:
+            self.conn.close()
+        except Exception as e:
+            logging.warning(f"Error closing pooled SQL connection: {e}")
+
+
+class SQLConnectionPool:
+    """
+    Async pool of SQL connections with min/max sizing, idle eviction and
+    token-aware recycling.
+
+    ``connect`` is a blocking callable returning ``(connection, expires_on)``
+    where ``expires_on`` is the epoch time the access token used by the
+    connection expires, or ``None`` if the connection does not use a token.
+    ``run_blocking`` is an async callable used to run ``connect``, ``rollback``
+    and ``close`` off the event loop; the loop's default executor is used when
+    it is not given.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], Tuple[object, Optional[float]]],
+        min_size: int = 1,
+        max_size: int = 10,
+        idle_timeout: float = 300,
+        token_refresh_margin: float = 300,
+        acquire_timeout: float = 30,
+        max_retries: int = 5,
+        retry_delay: float = 2,
+        run_blocking: Optional[Callable[..., Awaitable]] = None,
+    ):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self._connect = connect
+        self._run_blocking = run_blocking
+        self.min_size = max(0, min(min_size, max_size))
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.token_refresh_margin = token_refresh_margin
+        self.acquire_timeout = acquire_timeout
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+
+        self._idle = deque()
+        self._size = 0
+        self._closed = False
+        self._condition: Optional[asyncio.Condition] = None
+        self._eviction_task: Optional[asyncio.Task] = None
+
+    @property
+    def size(self) -> int:
+        """Number of open connections, idle and in use."""
+        return self._size
+
+    @property
+    def idle_count(self) -> int:
+        return len(self._idle)
+
+    def _get_condition(self) -> asyncio.Condition:
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        return self._condition
+
+    def _is_reusable(self, pooled: PooledConnection) -> bool:
+        if pooled.expires_on is not None:
+            if pooled.expires_on - self.token_refresh_margin <= time.time():
+                return False
+        return time.monotonic() - pooled.last_used < self.idle_timeout
+
+    async def _run(self, fn):
+        if self._run_blocking is not None:
+            return await self._run_blocking(fn)
+        return await asyncio.get_running_loop().run_in_executor(None, fn)
+
+    async def _open(self) -> PooledConnection:
+        retry_delay = self.retry_delay
+        for attempt in range(self.max_retries):
+            try:
+                conn, expires_on = await self._run(self._connect)
+                return PooledConnection(conn, expires_on)
+            except pyodbc.Error as e:
+                if attempt >= self.max_retries - 1:
+                    raise
+                logging.warning(
+                    f"SQL connection attempt {attempt + 1} failed, retrying in {retry_delay} seconds: {e}"
+                )
+                await asyncio.sleep(retry_delay)
+                retry_delay *= 2  # Exponential backoff
+
+    async def start(self):
+        """
+        Open ``min_size`` connections and start the idle eviction task.
+        """
+        self._closed = False
+        if self._eviction_task is None and self.idle_timeout > 0:
+            self._eviction_task = asyncio.create_task(self._evict_periodically())
+        await self._fill_to_min()
+
+    async def _fill_to_min(self):
+        condition = self._get_condition()
+        while not self._closed:
+            async with condition:
+                if self._size >= self.min_size:
+                    return
+                self._size += 1
+            try:
+                pooled = await self._open()
+            except BaseException:
+                async with condition:
+                    self._size -= 1
+                    condition.notify()
+                raise
+            async with condition:
+                self._idle.append(pooled)
+                condition.notify()
+
+    async def acquire(self) -> PooledConnection:
+        """
+        Borrow a connection, waiting asynchronously if the pool is at capacity.
+        """
+        if self._closed:
+            raise RuntimeError("SQL connection pool is closed")
+
+        condition = self._get_condition()
+        deadline = time.monotonic() + self.acquire_timeout
+        stale = []
+        try:
+            async with condition:
+                while True:
+                    while self._idle:
+                        pooled = self._idle.pop()
+                        if self._is_reusable(pooled):
+                            return pooled
+                        stale.append(self._forget(pooled))
+                    if self._size < self.max_size:
+                        # Reserve the slot before leaving the lock to open the connection
+                        self._size += 1
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError(
+                            f"Timed out waiting for a SQL connection (max_size={self.max_size})"
+                        )
+                    try:
+                        await asyncio.wait_for(condition.wait(), remaining)
+                    except asyncio.TimeoutError:
+                        pass
+        finally:
+            await self._close(stale)
+
+        try:
+            return await self._open()
+        except BaseException:
+            async with condition:
+                self._size -= 1
+                condition.notify()
+            raise
+
+    async def release(self, pooled: PooledConnection, discard: bool = False):
+        """
+        Return a borrowed connection. It is rolled back first so a failed or
+        unfinished transaction does not leak to the next borrower; broken or
+        expiring connections, and ones that fail to roll back, are closed.
+        """
+        cancelled = None
+        if not discard and not self._closed:
+            try:
+                await self._run(pooled.conn.rollback)
+            except asyncio.CancelledError as e:
+                # The connection's state is unknown, so it cannot be reused
+                discard, cancelled = True, e
+            except Exception as e:
+                logging.warning(f"Discarding SQL connection that failed to roll back: {e}")
+                discard = True
+
+        condition = self._get_condition()
+        to_close = []
+        async with condition:
+            pooled.last_used = time.monotonic()
+            if discard or self._closed or not self._is_reusable(pooled):
+                to_close.append(self._forget(pooled))
+            else:
+                self._idle.append(pooled)
+            condition.notify()
+        await self._close(to_close)
+        if cancelled is not None:
+            raise cancelled
+
+    def _forget(self, pooled: PooledConnection) -> PooledConnection:
+        # Frees the slot; the caller closes the connection after leaving the lock
+        self._size -= 1
+        return pooled
+
+    async def _close(self, connections):
+        if not connections:
+            return
+
+        def close_all():
+            for pooled in connections:
+                pooled.close()
+
+        try:
+            await self._run(close_all)
+        except Exception as e:
+            logging.warning(f"Error closing SQL connections: {e}")
+
+    @asynccontextmanager
+    async def connection(self):
+        """
+        Async context manager yielding a pooled pyodbc connection.
+
+        A connection that raised a pyodbc error is not returned to the pool.
+        """
+        pooled = await self.acquire()
+        discard = False
+        try:
+            yield pooled.conn
+        except pyodbc.Error:
+            discard = True
+            raise
+        finally:
+            await self.release(pooled, discard=discard)
+
+    async def evict_idle(self):
+        """
+        Close idle connections that outlived ``idle_timeout`` or whose token is
+        about to expire, then reopen connections up to ``min_size``.
+        """
+        condition = self._get_condition()
+        stale = []
+        async with condition:
+            keep = deque()
+            while self._idle:
+                pooled = self._idle.popleft()
+                if self._is_reusable(pooled):
+                    keep.append(pooled)
+                else:
+                    stale.append(self._forget(pooled))
+            self._idle = keep
+        await self._close(stale)
+        await self._fill_to_min()
+
+    async def _evict_periodically(self):
+        interval = max(1.0, min(self.idle_timeout, self.token_refresh_margin) / 2)
+        while not self._closed:
+            await asyncio.sleep(interval)
+            try:
+                await self.evict_idle()
+            except Exception:
+                logging.exception("Error evicting idle SQL connections")
+
+    async def close(self):
+        """
+        Close all idle connections and stop the eviction task. Connections still
+        borrowed are closed when they are released.
+        """
+        self._closed = True
+        if self._eviction_task is not None:
+            self._eviction_task.cancel()
+            try:
+                await self._eviction_task
+            except asyncio.CancelledError:
+                pass
+            self._eviction_task = None
+        condition = self._get_condition()
+        idle = []
+        async with condition:
+            while self._idle:
+                idle.append(self._forget(self._idle.pop()))
+            condition.notify_all()
+        await self._close(idle)
@@ -0,0 +1,96 @@
+"""
+Dedicated thread pool for blocking pyodbc calls.
+
+pyodbc releases the GIL while it waits on the server, but the calls themselves
+are synchronous. Running them directly in a coroutine stalls the event loop,
+and with it every chat stream served by the worker. SQLExecutor runs them on a
+sized thread pool of their own and keeps queue-depth and wait-time counters so
+saturation is visible instead of showing up as stream jitter.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class SQLExecutor:
+    """
+    Runs blocking database callables on a dedicated ThreadPoolExecutor.
+    """
+
+    def __init__(self, max_workers: int = 10, slow_wait_threshold: float = 1.0):
+        self.max_workers = max_workers
+        self.slow_wait_threshold = slow_wait_threshold
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="sqldb"
+        )
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+        self._failed = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    async def run(self, fn, *args, **kwargs):
+        """
+        Run ``fn(*args, **kwargs)`` on the SQL thread pool and await its result.
+        """
+        submitted_at = time.monotonic()
+        with self._lock:
+            self._queued += 1
+
+        def _call():
+            wait = time.monotonic() - submitted_at
+            with self._lock:
+                self._queued -= 1
+                self._running += 1
+                self._total_wait += wait
+                self._max_wait = max(self._max_wait, wait)
+            if wait > self.slow_wait_threshold:
+                logging.warning(
+                    f"SQL call waited {wait:.3f}s for a worker thread (max_workers={self.max_workers})"
+                )
+            failed = False
+            try:
+                return fn(*args, **kwargs)
+            except BaseException:
+                failed = True
+                raise
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self._completed += 1
+                    if failed:
+                        self._failed += 1
+
+        future = self._executor.submit(_call)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # A call cancelled before it reached a worker never runs _call
+            if future.cancel():
+                with self._lock:
+                    self._queued -= 1
+            raise
+
+    def stats(self) -> dict:
+        """
+        Snapshot of queue depth, concurrency and worker wait times.
+        """
+        with self._lock:
+            started = self._completed + self._running
+            return {
+                "max_workers": self.max_workers,
+                "queue_depth": self._queued,
+                "running": self._running,
+                "completed": self._completed,
+                "failed": self._failed,
+                "avg_wait_ms": (self._total_wait / started * 1000) if started else 0.0,
+                "max_wait_ms": self._max_wait * 1000,
+            }
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
@@ -1,14 +1,17 @@
 # db.py
+import asyncio
 import logging
 import struct
+import threading
 
 import pyodbc
 from backend.helpers.azure_credential_utils import get_azure_credential
 from dotenv import load_dotenv
 
 from backend.common.config import config
-
-import time
+from backend.services.client_roster_cache import ClientRosterCache
+from backend.services.sql_connection_pool import SQLConnectionPool
+from backend.services.sql_executor import SQLExecutor
 
 load_dotenv()
 
@@ -19,6 +22,16 @@ username = config.SQL_USERNAME
 password = config.SQL_PASSWORD
 mid_id = config.SQL_MID_ID
 
+SQL_COPT_SS_ACCESS_TOKEN = (
+    1256  # This connection option is defined by Microsoft in msodbcsql.h
+)
+
+SAMPLE_DATA_LOCK_RESOURCE = "sample_data_maintenance"
+
+_pool = None
+_executor = None
+_roster_cache = None
+
 
 def dict_cursor(cursor):
     """
@@ -34,80 +47,234 @@ def dict_cursor(cursor):
     return [dict(zip(columns, row)) for row in cursor.fetchall()]
 
 
-def get_connection():
-    max_retries = 5
-    retry_delay = 2
+def open_connection():
+    """
+    Opens a single SQL connection, preferring an AAD access token and falling
+    back to username & password.
 
-    for attempt in range(max_retries):
-        try:
-            credential = get_azure_credential(client_id=mid_id)
+    Returns:
+        A tuple of (connection, token expiry as epoch seconds or None).
+    """
+    try:
+        credential = get_azure_credential(client_id=mid_id)
 
-            token_bytes = credential.get_token(
-                "https://database.windows.net/.default"
-            ).token.encode("utf-16-LE")
-            token_struct = struct.pack(
-                f"<I{len(token_bytes)}s", len(token_bytes), token_bytes
-            )
-            SQL_COPT_SS_ACCESS_TOKEN = (
-                1256  # This connection option is defined by Microsoft in msodbcsql.h
-            )
+        access_token = credential.get_token("https://database.windows.net/.default")
+        token_bytes = access_token.token.encode("utf-16-LE")
+        token_struct = struct.pack(
+            f"<I{len(token_bytes)}s", len(token_bytes), token_bytes
+        )
 
-            # Set up the connection
-            connection_string = f"DRIVER={driver};SERVER={server};DATABASE={database};"
+        # Set up the connection
+        connection_string = f"DRIVER={driver};SERVER={server};DATABASE={database};"
+        conn = pyodbc.connect(
+            connection_string, attrs_before={SQL_COPT_SS_ACCESS_TOKEN: token_struct}
+        )
+        expires_on = getattr(access_token, "expires_on", None)
+        return conn, expires_on if isinstance(expires_on, (int, float)) else None
+    except pyodbc.Error as e:
+        logging.error(f"Failed with Default Credential: {str(e)}")
+        try:
             conn = pyodbc.connect(
-                connection_string, attrs_before={SQL_COPT_SS_ACCESS_TOKEN: token_struct}
+                f"DRIVER={driver};SERVER={server};DATABASE={database};UID={username};PWD={password}",
+                timeout=5,
             )
-            return conn
+            logging.info("Connected using Username & Password")
+            return conn, None
         except pyodbc.Error as e:
-            logging.error(f"Failed with Default Credential: {str(e)}")
-            try:
-                conn = pyodbc.connect(
-                    f"DRIVER={driver};SERVER={server};DATABASE={database};UID={username};PWD={password}",
-                    timeout=5,
-                )
-                logging.info("Connected using Username & Password")
-                return conn
-            except pyodbc.Error as e:
-                logging.error(f"Failed with Username & Password: {str(e)}")
+            logging.error(f"Failed with Username & Password: {str(e)}")
+            raise e
+
 
-                if attempt < max_retries - 1:
-                    logging.info(f"Retrying in {retry_delay} seconds...")
-                    time.sleep(retry_delay)
-                    retry_delay *= 2  # Exponential backoff
-                else:
-                    raise e
+def get_executor() -> SQLExecutor:
+    """
+    Returns the process-wide executor for blocking pyodbc calls.
+    """
+    global _executor
+    if _executor is None:
+        _executor = SQLExecutor(max_workers=config.SQL_EXECUTOR_MAX_WORKERS)
+    return _executor
 
 
-def get_client_name_from_db(client_id: str) -> str:
+async def run_blocking(fn, *args, **kwargs):
     """
-    Connects to your SQL database and returns the client name for the given client_id.
+    Runs a blocking database callable on the SQL executor, off the event loop.
     """
+    return await get_executor().run(fn, *args, **kwargs)
 
-    conn = get_connection()
-    cursor = conn.cursor()
-    sql = "SELECT Client FROM Clients WHERE ClientId = ?"
-    cursor.execute(sql, (client_id,))
-    row = cursor.fetchone()
-    conn.close()
+
+def get_pool() -> SQLConnectionPool:
+    """
+    Returns the process-wide SQL connection pool, creating it on first use.
+    """
+    global _pool
+    if _pool is None:
+        _pool = SQLConnectionPool(
+            open_connection,
+            min_size=config.SQL_POOL_MIN_SIZE,
+            max_size=config.SQL_POOL_MAX_SIZE,
+            idle_timeout=config.SQL_POOL_IDLE_TIMEOUT,
+            token_refresh_margin=config.SQL_POOL_TOKEN_REFRESH_MARGIN,
+            acquire_timeout=config.SQL_POOL_ACQUIRE_TIMEOUT,
+            run_blocking=run_blocking,
+        )
+    return _pool
+
+
+def pooled_connection():
+    """
+    Async context manager that borrows a connection from the pool.
+
+    Usage:
+        async with pooled_connection() as conn:
+            cursor = conn.cursor()
+    """
+    return get_pool().connection()
+
+
+async def init_pool():
+    """
+    Warms the pool up to its minimum size and starts idle eviction.
+    """
+    await get_pool().start()
+
+
+async def close_pool():
+    """
+    Closes the pool and all of its idle connections, then stops the SQL executor.
+    """
+    global _pool, _executor
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+    if _executor is not None:
+        _executor.shutdown(wait=False)
+        _executor = None
+
+
+def get_stats() -> dict:
+    """
+    Returns executor queue depth and wait times plus pool occupancy.
+    """
+    stats = {"executor": get_executor().stats()}
+    if _pool is not None:
+        stats["pool"] = {
+            "size": _pool.size,
+            "idle": _pool.idle_count,
+            "max_size": _pool.max_size,
+        }
+    return stats
+
+
+async def fetch_all(sql_query: str):
+    """
+    Runs a query on a pooled connection in the SQL executor and returns all rows.
+
+    If the caller is cancelled the statement is cancelled on the server, and the
+    worker is awaited so the connection is idle again before it is released.
+    """
+    async with pooled_connection() as conn:
+        cursor = conn.cursor()
+        cancelled = threading.Event()
+        query = asyncio.ensure_future(
+            run_blocking(_fetch_all, cursor, sql_query, cancelled)
+        )
+        try:
+            return await asyncio.shield(query)
+        except asyncio.CancelledError:
+            cancelled.set()
+            cursor.cancel()
+            await asyncio.gather(query, return_exceptions=True)
+            raise
+
+
+def _fetch_all(cursor, sql_query, cancelled=None):
+    try:
+        if cancelled is not None and cancelled.is_set():
+            raise RuntimeError("Query cancelled before it started")
+        cursor.execute(sql_query)
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+
+
+def get_roster_cache() -> ClientRosterCache:
+    """
+    Returns the process-wide cache of the client roster.
+    """
+    global _roster_cache
+    if _roster_cache is None:
+        _roster_cache = ClientRosterCache(
+            _load_client_data, ttl=config.USERS_CACHE_TTL_SECONDS
+        )
+    return _roster_cache
+
+
+async def _load_client_data():
+    return await get_client_data()
+
+
+async def get_cached_client_data():
+    """
+    Returns the client roster and its ETag, served from the roster cache.
+    """
+    return await get_roster_cache().get()
+
+
+def invalidate_client_data_cache():
+    """
+    Drops the cached client roster and client names.
+    """
+    get_roster_cache().invalidate()
+
+
+async def get_client_name_from_db(client_id: str) -> str:
+    """
+    Returns the client name for the given client_id, from the roster cache when
+    it is warm and otherwise from a pooled connection.
+    """
+    cached_name = get_roster_cache().get_client_name(client_id)
+    if cached_name:
+        return cached_name
+
+    async with pooled_connection() as conn:
+        row = await run_blocking(_fetch_client_name, conn, client_id)
     if row:
         return row[0]  # The 'Client' column
     else:
         return ""
 
 
-def get_client_data():
+def _fetch_client_name(conn, client_id):
+    cursor = conn.cursor()
+    sql = "SELECT Client FROM Clients WHERE ClientId = ?"
+    cursor.execute(sql, (client_id,))
+    row = cursor.fetchone()
+    cursor.close()
+    return row
+
+
+async def get_client_data():
     """
     Fetches client data with their meeting information and asset values.
-    Updates sample data if necessary.
+    Read-only; sample data dates are rolled forward by roll_sample_data_dates().
 
     Returns:
         list: A list of dictionaries containing client information
     """
-    conn = None
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        sql_stmt = """
+        async with pooled_connection() as conn:
+            return await run_blocking(_query_client_data, conn)
+    except Exception as e:
+        logging.exception("Exception occurred in get_client_data")
+        raise e
+
+
+def _query_client_data(conn):
+    """
+    Runs the client roster query on the given connection and formats the rows.
+    """
+    cursor = conn.cursor()
+    sql_stmt = """
         SELECT
             ClientId,
             Client,
@@ -152,40 +319,70 @@ def get_client_data():
         WHERE NextMeeting IS NOT NULL
         ORDER BY NextMeeting ASC;
         """
-        cursor.execute(sql_stmt)
-        rows = dict_cursor(cursor)
+    cursor.execute(sql_stmt)
+    rows = dict_cursor(cursor)
+
+    formatted_users = []
+    for row in rows:
+        user = {
+            "ClientId": row["ClientId"],
+            "ClientName": row["Client"],
+            "ClientEmail": row["Email"],
+            "AssetValue": row["AssetValue"],
+            "NextMeeting": row["NextMeetingFormatted"],
+            "NextMeetingTime": row["NextMeetingStartTime"],
+            "NextMeetingEndTime": row["NextMeetingEndTime"],
+            "LastMeeting": row["LastMeetingDateFormatted"],
+            "LastMeetingStartTime": row["LastMeetingStartTime"],
+            "LastMeetingEndTime": row["LastMeetingEndTime"],
+            "ClientSummary": row["ClientSummary"],
+        }
+        formatted_users.append(user)
+
+    return formatted_users
+
+
+async def roll_sample_data_dates() -> bool:
+    """
+    Rolls the sample data dates forward when too few clients have an upcoming
+    meeting. Run by the maintenance scheduler, never from a request.
 
-        if len(rows) <= 6:
-            update_sample_data(conn)
-            cursor = conn.cursor()
-            cursor.execute(sql_stmt)
-            rows = dict_cursor(cursor)
-
-        formatted_users = []
-        for row in rows:
-            user = {
-                "ClientId": row["ClientId"],
-                "ClientName": row["Client"],
-                "ClientEmail": row["Email"],
-                "AssetValue": row["AssetValue"],
-                "NextMeeting": row["NextMeetingFormatted"],
-                "NextMeetingTime": row["NextMeetingStartTime"],
-                "NextMeetingEndTime": row["NextMeetingEndTime"],
-                "LastMeeting": row["LastMeetingDateFormatted"],
-                "LastMeetingStartTime": row["LastMeetingStartTime"],
-                "LastMeetingEndTime": row["LastMeetingEndTime"],
-                "ClientSummary": row["ClientSummary"],
-            }
-            formatted_users.append(user)
-
-        return formatted_users
+    Returns:
+        True if the sample data was updated.
+    """
+    async with pooled_connection() as conn:
+        updated = await run_blocking(_roll_sample_data_dates, conn)
+    if updated:
+        invalidate_client_data_cache()
+    return updated
 
-    except Exception as e:
-        logging.exception("Exception occurred in get_client_data")
-        raise e
+
+def _roll_sample_data_dates(conn) -> bool:
+    cursor = conn.cursor()
+    # Session-level app lock so only one worker or instance rolls the dates
+    cursor.execute(
+        f"""
+        DECLARE @result int;
+        EXEC @result = sp_getapplock @Resource = '{SAMPLE_DATA_LOCK_RESOURCE}',
+            @LockMode = 'Exclusive', @LockOwner = 'Session', @LockTimeout = 0;
+        SELECT @result;
+        """
+    )
+    lock_row = cursor.fetchone()
+    if lock_row is None or lock_row[0] < 0:
+        logging.info("Sample data maintenance is running elsewhere, skipping")
+        return False
+    try:
+        if len(_query_client_data(conn)) > 6:
+            return False
+        update_sample_data(conn)
+        return True
     finally:
-        if conn:
-            conn.close()
+        cursor = conn.cursor()
+        cursor.execute(
+            f"EXEC sp_releaseapplock @Resource = '{SAMPLE_DATA_LOCK_RESOURCE}', @LockOwner = 'Session'"
+        )
+        cursor.close()
 
 
 def update_sample_data(conn):
@@ -49,6 +49,13 @@ export type ChatResponseChoice = {
   messages: ChatMessage[]
 }
 
+export type ToolProgress = {
+  tool: string
+  status: string
+  message: string
+  elapsed_ms: number
+}
+
 export type ChatResponse = {
   id: string
   model: string
@@ -60,6 +67,7 @@ export type ChatResponse = {
     title: string
     date: string
   }
+  progress?: ToolProgress
   error?: any
 }
 
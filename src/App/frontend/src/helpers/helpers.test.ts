@@ -1,5 +1,5 @@
-import { groupByMonth, formatMonth, parseCitationFromMessage, parseErrorMessage, tryGetRaiPrettyError } from './helpers';
-import { ChatMessage, Conversation } from '../api/models';
+import { groupByMonth, formatMonth, isProgressFrame, parseCitationFromMessage, parseErrorMessage, tryGetRaiPrettyError } from './helpers';
+import { ChatMessage, ChatResponse, Conversation } from '../api/models';
 
 describe('groupByMonth', () => {
 
@@ -197,4 +197,26 @@ describe('parseErrorMessage', () => {
     
 });
 
+describe('isProgressFrame', () => {
 
+    it('should detect a tool progress frame with no messages', () => {
+        const frame = {
+            id: '1',
+            choices: [],
+            progress: { tool: 'ChatWithSQLDatabase', status: 'started', message: 'Querying portfolio data', elapsed_ms: 0 },
+            history_metadata: { conversation_id: 'c1', title: 't', date: 'd' },
+        } as unknown as ChatResponse;
+
+        expect(isProgressFrame(frame)).toBe(true);
+    });
+
+    it('should not treat an answer chunk as a progress frame', () => {
+        const chunk = {
+            id: '1',
+            choices: [{ messages: [{ role: 'assistant', content: 'Hello' }] }],
+        } as unknown as ChatResponse;
+
+        expect(isProgressFrame(chunk)).toBe(false);
+    });
+
+});
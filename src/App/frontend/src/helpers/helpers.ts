@@ -1,4 +1,4 @@
-import { Conversation, GroupedChatHistory, ChatMessage, ToolMessageContent } from '../api/models'
+import { ChatResponse, Conversation, GroupedChatHistory, ChatMessage, ToolMessageContent } from '../api/models'
 
 export const groupByMonth = (entries: Conversation[]) => {
     const groups: GroupedChatHistory[] = [{ month: 'Recent', entries: [] }]
@@ -62,6 +62,11 @@ export const formatMonth = (month: string) => {
 
 
 // -------------Chat.tsx-------------
+// Tool progress frames carry no messages and must not be treated as answer chunks
+export const isProgressFrame = (result: ChatResponse) => {
+    return !!result?.progress && !(result.choices?.length > 0)
+}
+
 export const parseCitationFromMessage = (message: ChatMessage) => {
     if (message?.role && message?.role === 'tool') {
         try {
@@ -30,7 +30,7 @@ import { AppStateContext } from '../../state/AppProvider'
 import { useBoolean } from '@fluentui/react-hooks'
 import { PromptsSection, PromptType } from '../../components/PromptsSection/PromptsSection'
 
-import { parseErrorMessage } from '../../helpers/helpers'
+import { isProgressFrame, parseErrorMessage } from '../../helpers/helpers'
 import { AuthNotConfigure } from './Components/AuthNotConfigure'
 import { ChatMessageContainer } from './Components/ChatMessageContainer'
 import { CitationPanel } from './Components/CitationPanel'
@@ -210,6 +210,10 @@ const Chat = (props: any) => {
               if (obj !== '' && obj !== '{}') {
                 runningText += obj
                 result = JSON.parse(runningText)
+                if (isProgressFrame(result)) {
+                  runningText = ''
+                  return
+                }
                 if (result.choices?.length > 0) {
                   result.choices[0].messages.forEach(msg => {
                     msg.id = result.id
@@ -386,6 +390,10 @@ const Chat = (props: any) => {
               if (obj !== '' && obj !== '{}') {
                 runningText += obj
                 result = JSON.parse(runningText)
+                if (isProgressFrame(result)) {
+                  runningText = ''
+                  return
+                }
                 if (!result.choices?.[0]?.messages?.[0].content) {
                   errorResponseMessage = NO_CONTENT_ERROR
                   throw Error()
@@ -1,3 +1,4 @@
+import asyncio
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
@@ -30,6 +31,7 @@ class TestAgentFactory:
         """Test that get_wealth_advisor_agent creates a new agent when none exists."""
         # Arrange
         mock_agent_instance = AsyncMock()
+        mock_agent_instance.kernel = MagicMock()
         mock_agent.return_value = mock_agent_instance
         mock_client = AsyncMock()
         mock_agent.create_client.return_value = mock_client
@@ -55,6 +57,7 @@ class TestAgentFactory:
                 If the question is unrelated to data but is conversational (e.g., greetings or follow-ups), respond appropriately using context, do not use external tools or perform any web searches for these conversational inputs.''',
         )
         mock_agent.assert_called_once()
+        mock_agent_instance.kernel.add_filter.assert_called_once()
 
     @pytest.mark.asyncio
     async def test_get_wealth_advisor_agent_returns_existing_agent(
@@ -74,20 +77,31 @@ class TestAgentFactory:
     @pytest.mark.asyncio
     @patch("backend.agents.agent_factory.config")
     @patch("backend.agents.agent_factory.AIProjectClient")
-    @patch("backend.agents.agent_factory.get_azure_credential")
+    @patch("backend.agents.agent_factory.get_azure_credential_async")
     async def test_get_search_agent_creates_agent_when_none_exists(
-        self, mock_credential_sync, mock_ai_project_client, mock_config, reset_singleton
+        self, mock_credential_async, mock_ai_project_client, mock_config, reset_singleton
     ):
         """Test that get_search_agent creates a new agent when none exists."""
         # Arrange
         mock_config.CALL_TRANSCRIPT_SYSTEM_PROMPT = "Test search agent instructions"
         mock_config.AI_PROJECT_ENDPOINT = "https://test.ai.endpoint.com"
         mock_config.AZURE_OPENAI_MODEL = "test-search-model"
+        mock_config.AGENT_THREAD_POOL_SIZE = 0
+        mock_config.AGENT_THREAD_TTL_SECONDS = 0
+        mock_config.AGENT_RECONCILE = False
 
         mock_project_client_instance = MagicMock()
         mock_ai_project_client.return_value = mock_project_client_instance
         mock_agent = MagicMock()
-        mock_project_client_instance.agents.create_agent.return_value = mock_agent
+        mock_project_client_instance.agents.create_agent = AsyncMock(
+            return_value=mock_agent
+        )
+        mock_index = MagicMock()
+        mock_index.name = "project-index-test"
+        mock_index.version = "1"
+        mock_project_client_instance.indexes.create_or_update = AsyncMock(
+            return_value=mock_index
+        )
 
         # Act
         result = await AgentFactory.get_search_agent()
@@ -100,32 +114,45 @@ class TestAgentFactory:
         assert result["client"] is mock_project_client_instance
         mock_ai_project_client.assert_called_once_with(
             endpoint="https://test.ai.endpoint.com",
-            credential=mock_credential_sync.return_value,
+            credential=mock_credential_async.return_value,
             api_version="2025-05-01",
         )
-        mock_project_client_instance.agents.create_agent.assert_called_once_with(
+        mock_project_client_instance.agents.create_agent.assert_awaited_once_with(
             model="test-search-model",
             instructions="Test search agent instructions",
             name="CallTranscriptSearchAgent",
         )
+        mock_project_client_instance.indexes.create_or_update.assert_awaited_once()
+        assert result["index_asset_id"] == "project-index-test/versions/1"
 
     @pytest.mark.asyncio
     @patch("backend.agents.agent_factory.config")
     @patch("backend.agents.agent_factory.AIProjectClient")
-    @patch("backend.agents.agent_factory.get_azure_credential")
+    @patch("backend.agents.agent_factory.get_azure_credential_async")
     async def test_get_search_agent_with_default_instructions(
-        self, mock_credential_sync, mock_ai_project_client, mock_config, reset_singleton
+        self, mock_credential_async, mock_ai_project_client, mock_config, reset_singleton
     ):
         """Test that get_search_agent uses default instructions when config is empty."""
         # Arrange
         mock_config.CALL_TRANSCRIPT_SYSTEM_PROMPT = None
         mock_config.AI_PROJECT_ENDPOINT = "https://test.ai.endpoint.com"
         mock_config.AZURE_OPENAI_MODEL = "test-search-model"
+        mock_config.AGENT_THREAD_POOL_SIZE = 0
+        mock_config.AGENT_THREAD_TTL_SECONDS = 0
+        mock_config.AGENT_RECONCILE = False
 
         mock_project_client_instance = MagicMock()
         mock_ai_project_client.return_value = mock_project_client_instance
         mock_agent = MagicMock()
-        mock_project_client_instance.agents.create_agent.return_value = mock_agent
+        mock_project_client_instance.agents.create_agent = AsyncMock(
+            return_value=mock_agent
+        )
+        mock_index = MagicMock()
+        mock_index.name = "project-index-test"
+        mock_index.version = "1"
+        mock_project_client_instance.indexes.create_or_update = AsyncMock(
+            return_value=mock_index
+        )
 
         # Act
         result = await AgentFactory.get_search_agent()
@@ -138,7 +165,7 @@ class TestAgentFactory:
             "When answering questions, especially summary requests, provide a detailed and structured response that includes key topics, concerns, decisions, and trends. "
             "If no data is available, state 'No relevant data found for previous meetings.'"
         )
-        mock_project_client_instance.agents.create_agent.assert_called_once_with(
+        mock_project_client_instance.agents.create_agent.assert_awaited_once_with(
             model="test-search-model",
             instructions=expected_default_instructions,
             name="CallTranscriptSearchAgent",
@@ -166,6 +193,7 @@ class TestAgentFactory:
         mock_client = AsyncMock()
         mock_agent_definition = AsyncMock()
         mock_agent_instance = AsyncMock()
+        mock_agent_instance.kernel = MagicMock()
 
         with patch("backend.agents.agent_factory.AzureAIAgent") as mock_agent_class:
             mock_agent_class.create_client.return_value = mock_client
@@ -193,17 +221,21 @@ class TestAgentFactory:
             with patch(
                 "backend.agents.agent_factory.AIProjectClient"
             ) as mock_ai_project_client:
-                with patch("backend.agents.agent_factory.get_azure_credential"):
+                with patch("backend.agents.agent_factory.get_azure_credential_async"):
                     mock_config.CALL_TRANSCRIPT_SYSTEM_PROMPT = "Test instructions"
                     mock_config.AI_PROJECT_ENDPOINT = "https://test.endpoint.com"
                     mock_config.AZURE_OPENAI_MODEL = "test-model"
+                    mock_config.AGENT_THREAD_POOL_SIZE = 0
+                    mock_config.AGENT_THREAD_TTL_SECONDS = 0
+                    mock_config.AGENT_RECONCILE = False
 
                     mock_project_client_instance = MagicMock()
                     mock_ai_project_client.return_value = mock_project_client_instance
                     mock_agent = MagicMock()
-                    mock_project_client_instance.agents.create_agent.return_value = (
-                        mock_agent
+                    mock_project_client_instance.agents.create_agent = AsyncMock(
+                        return_value=mock_agent
                     )
+                    mock_project_client_instance.indexes.create_or_update = AsyncMock()
 
                     # Act
                     instance1 = await AgentFactory.get_search_agent()
@@ -237,7 +269,7 @@ class TestAgentFactory:
         mock_wealth_advisor_agent.id = "test-wealth-advisor-id"
         AgentFactory._wealth_advisor_agent = mock_wealth_advisor_agent
 
-        mock_search_client = MagicMock()
+        mock_search_client = AsyncMock()
         mock_search_agent = MagicMock()
         mock_search_agent.id = "test-search-agent-id"
         AgentFactory._search_agent = {
@@ -254,10 +286,10 @@ class TestAgentFactory:
         mock_wealth_advisor_agent.client.agents.delete_agent.assert_called_once_with(
             "test-wealth-advisor-id"
         )
-        mock_search_client.agents.delete_agent.assert_called_once_with(
+        mock_search_client.agents.delete_agent.assert_awaited_once_with(
             "test-search-agent-id"
         )
-        mock_search_client.close.assert_called_once()
+        mock_search_client.close.assert_awaited_once()
 
     @pytest.mark.asyncio
     async def test_delete_all_agent_instance_handles_only_wealth_advisor(
@@ -287,7 +319,7 @@ class TestAgentFactory:
     ):
         """Test that delete_all_agent_instance handles when only search agent exists."""
         # Arrange
-        mock_search_client = MagicMock()
+        mock_search_client = AsyncMock()
         mock_search_agent = MagicMock()
         mock_search_agent.id = "test-search-agent-id"
         AgentFactory._wealth_advisor_agent = None
@@ -302,7 +334,108 @@ class TestAgentFactory:
         # Assert
         assert AgentFactory._wealth_advisor_agent is None
         assert AgentFactory._search_agent is None
-        mock_search_client.agents.delete_agent.assert_called_once_with(
+        mock_search_client.agents.delete_agent.assert_awaited_once_with(
             "test-search-agent-id"
         )
-        mock_search_client.close.assert_called_once()
+        mock_search_client.close.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_initialize_agents_provisions_agents_concurrently(self):
+        """Test that initialize_agents creates the three agents in parallel."""
+        # Arrange
+        running = []
+        peak = []
+
+        def slow_getter(result):
+            async def get_agent():
+                running.append(result)
+                peak.append(len(running))
+                await asyncio.sleep(0.05)
+                running.remove(result)
+                return result
+            return get_agent
+
+        with patch.object(
+            AgentFactory, "get_wealth_advisor_agent", side_effect=slow_getter("wealth")
+        ), patch.object(
+            AgentFactory, "get_search_agent", side_effect=slow_getter("search")
+        ), patch.object(
+            AgentFactory, "get_sql_agent", side_effect=slow_getter("sql")
+        ):
+            # Act
+            result = await AgentFactory.initialize_agents()
+
+        # Assert
+        assert result == "wealth"
+        assert max(peak) == 3
+
+    @pytest.mark.asyncio
+    async def test_initialize_agents_warms_plugin_agents_in_background(self):
+        """Test that background warm-up only waits for the WealthAdvisor agent."""
+        # Arrange
+        release = asyncio.Event()
+
+        async def blocked_getter():
+            await release.wait()
+
+        with patch.object(
+            AgentFactory, "get_wealth_advisor_agent", AsyncMock(return_value="wealth")
+        ), patch.object(
+            AgentFactory, "get_search_agent", side_effect=blocked_getter
+        ) as mock_search, patch.object(
+            AgentFactory, "get_sql_agent", side_effect=blocked_getter
+        ):
+            # Act
+            result = await AgentFactory.initialize_agents(warm_in_background=True)
+
+            # Assert
+            assert result == "wealth"
+            assert len(AgentFactory._warmup_tasks) == 2
+            release.set()
+            await asyncio.gather(*list(AgentFactory._warmup_tasks))
+            mock_search.assert_called_once()
+        await asyncio.sleep(0)
+        assert not AgentFactory._warmup_tasks
+
+    @pytest.mark.asyncio
+    async def test_follower_attaches_to_published_agent(self):
+        """Test that a follower worker fetches the leader's agent instead of creating one."""
+        # Arrange
+        agents_client = MagicMock()
+        agents_client.get_agent = AsyncMock(return_value=MagicMock(id="asst_sql"))
+        agents_client.create_agent = AsyncMock()
+
+        with patch.object(
+            AgentFactory, "_published_agents", {"SQLQueryGeneratorAgent": "asst_sql"}
+        ):
+            # Act
+            agent = await AgentFactory._resolve_agent(
+                agents_client,
+                name="SQLQueryGeneratorAgent",
+                model="gpt-4o-mini",
+                instructions="Only return the raw T-SQL query.",
+            )
+
+        # Assert
+        assert agent.id == "asst_sql"
+        agents_client.get_agent.assert_awaited_once_with("asst_sql")
+        agents_client.create_agent.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_follower_shutdown_keeps_agents(self, reset_singleton):
+        """Test that a follower worker never deletes the leader's agents."""
+        # Arrange
+        mock_search_client = AsyncMock()
+        AgentFactory._search_agent = {
+            "agent": MagicMock(id="asst_search"),
+            "client": mock_search_client,
+        }
+        AgentFactory._published_agents = {"CallTranscriptSearchAgent": "asst_search"}
+
+        # Act
+        await AgentFactory.delete_all_agent_instance()
+
+        # Assert
+        mock_search_client.agents.delete_agent.assert_not_awaited()
+        mock_search_client.close.assert_awaited_once()
+        assert AgentFactory._published_agents is None
@@ -0,0 +1,48 @@
+import pytest
+
+from backend.agents.agent_leader import AgentLeaderElection
+
+
+@pytest.fixture
+def lock_path(tmp_path):
+    return str(tmp_path / "agents.lock")
+
+
+def test_only_first_worker_becomes_leader(lock_path):
+    leader = AgentLeaderElection(lock_path)
+    follower = AgentLeaderElection(lock_path)
+
+    assert leader.try_acquire() is True
+    assert follower.try_acquire() is False
+
+    leader.release()
+    assert follower.try_acquire() is True
+    follower.release()
+
+
+@pytest.mark.asyncio
+async def test_follower_receives_published_agents(lock_path):
+    leader = AgentLeaderElection(lock_path)
+    leader.try_acquire()
+    leader.publish({"WealthAdvisor": "asst_1", "index_asset_id": "idx"})
+
+    agents = await AgentLeaderElection(lock_path).wait_for_agents(timeout=1, poll_interval=0.01)
+
+    assert agents == {"WealthAdvisor": "asst_1", "index_asset_id": "idx"}
+    leader.release()
+
+
+@pytest.mark.asyncio
+async def test_state_from_previous_leader_is_ignored(lock_path):
+    previous = AgentLeaderElection(lock_path)
+    previous.try_acquire()
+    previous.publish({"WealthAdvisor": "asst_old"})
+    previous.release()
+
+    # A new leader has taken the lock but not published yet
+    current = AgentLeaderElection(lock_path)
+    current.try_acquire()
+
+    with pytest.raises(TimeoutError):
+        await AgentLeaderElection(lock_path).wait_for_agents(timeout=0.05, poll_interval=0.01)
+    current.release()
@@ -0,0 +1,147 @@
+import time
+from unittest.mock import ANY, AsyncMock, MagicMock, patch
+
+import pytest
+
+from backend.agents.agent_reconciler import (
+    DEFINITION_HASH_KEY,
+    LAST_SEEN_KEY,
+    AgentHeartbeat,
+    definition_hash,
+    get_or_create_agent,
+)
+
+NAME = "SQLQueryGeneratorAgent"
+MODEL = "gpt-4o-mini"
+INSTRUCTIONS = "Only return the raw T-SQL query."
+DIGEST = definition_hash(NAME, MODEL, INSTRUCTIONS)
+
+
+def make_agent(agent_id, name=NAME, digest=DIGEST, age=0, last_seen_age=None):
+    agent = MagicMock()
+    agent.id = agent_id
+    agent.name = name
+    agent.metadata = {DEFINITION_HASH_KEY: digest} if digest else {}
+    if last_seen_age is not None:
+        agent.metadata[LAST_SEEN_KEY] = str(int(time.time() - last_seen_age))
+    agent.created_at = time.time() - age
+    return agent
+
+
+def make_agents_client(*listings):
+    """Agents client whose list_agents returns each listing in turn."""
+    client = MagicMock()
+    calls = iter(listings)
+
+    def list_agents():
+        async def iterate():
+            for agent in next(calls):
+                yield agent
+        return iterate()
+
+    client.list_agents = list_agents
+    client.create_agent = AsyncMock()
+    client.delete_agent = AsyncMock()
+    client.update_agent = AsyncMock()
+    return client
+
+
+@pytest.fixture
+def reconcile():
+    with patch("backend.agents.agent_reconciler.config") as mock_config:
+        mock_config.AGENT_RECONCILE = True
+        mock_config.AGENT_STALE_GRACE_SECONDS = 600
+        yield mock_config
+
+
+@pytest.mark.asyncio
+async def test_creates_agent_when_reconcile_is_off():
+    client = make_agents_client()
+    with patch("backend.agents.agent_reconciler.config") as mock_config:
+        mock_config.AGENT_RECONCILE = False
+        await get_or_create_agent(client, name=NAME, model=MODEL, instructions=INSTRUCTIONS)
+
+    client.create_agent.assert_awaited_once_with(
+        model=MODEL, name=NAME, instructions=INSTRUCTIONS
+    )
+
+
+@pytest.mark.asyncio
+async def test_reattaches_to_matching_agent(reconcile):
+    existing = make_agent("asst_1", age=60)
+    client = make_agents_client([existing, make_agent("other", name="WealthAdvisor")])
+
+    agent = await get_or_create_agent(client, name=NAME, model=MODEL, instructions=INSTRUCTIONS)
+
+    assert agent is existing
+    client.create_agent.assert_not_awaited()
+    client.delete_agent.assert_not_awaited()
+    # Reattaching refreshes the heartbeat
+    client.update_agent.assert_awaited_once_with(
+        "asst_1", metadata={DEFINITION_HASH_KEY: DIGEST, LAST_SEEN_KEY: ANY}
+    )
+
+
+@pytest.mark.asyncio
+async def test_creates_tagged_agent_and_collects_stale_definitions(reconcile):
+    outdated = make_agent("asst_old", digest="outdated", age=3600, last_seen_age=3600)
+    recent = make_agent("asst_recent", digest="outdated", age=10, last_seen_age=10)
+    created = make_agent("asst_new")
+    client = make_agents_client([outdated, recent], [outdated, recent, created])
+    client.create_agent.return_value = created
+
+    agent = await get_or_create_agent(client, name=NAME, model=MODEL, instructions=INSTRUCTIONS)
+
+    assert agent is created
+    client.create_agent.assert_awaited_once_with(
+        model=MODEL,
+        name=NAME,
+        instructions=INSTRUCTIONS,
+        metadata={DEFINITION_HASH_KEY: DIGEST, LAST_SEEN_KEY: ANY},
+    )
+    # Only the agent unseen for longer than the grace period is deleted
+    client.delete_agent.assert_awaited_once_with("asst_old")
+
+
+@pytest.mark.asyncio
+async def test_keeps_old_agents_without_staleness_evidence(reconcile):
+    existing = make_agent("asst_1", age=60)
+    untagged = make_agent("asst_foreign", digest=None, age=3600)
+    no_heartbeat = make_agent("asst_legacy", digest="outdated", age=3600)
+    in_use = make_agent("asst_in_use", digest="outdated", age=3600, last_seen_age=30)
+    client = make_agents_client([untagged, no_heartbeat, in_use, existing])
+
+    agent = await get_or_create_agent(client, name=NAME, model=MODEL, instructions=INSTRUCTIONS)
+
+    assert agent is existing
+    client.delete_agent.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_heartbeat_refreshes_tracked_agents():
+    client = make_agents_client()
+    heartbeat = AgentHeartbeat(interval=0)
+    heartbeat.track(client, make_agent("asst_1"))
+    heartbeat.track(client, make_agent("asst_2"))
+
+    await heartbeat.beat()
+    await heartbeat.close()
+    await heartbeat.beat()
+
+    assert [call.args[0] for call in client.update_agent.await_args_list] == [
+        "asst_1",
+        "asst_2",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_converges_on_oldest_agent_after_creation_race(reconcile):
+    winner = make_agent("asst_winner", age=1)
+    created = make_agent("asst_mine")
+    client = make_agents_client([], [winner, created])
+    client.create_agent.return_value = created
+
+    agent = await get_or_create_agent(client, name=NAME, model=MODEL, instructions=INSTRUCTIONS)
+
+    assert agent is winner
+    client.delete_agent.assert_awaited_once_with("asst_mine")
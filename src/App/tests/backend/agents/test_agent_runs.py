@@ -0,0 +1,50 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from backend.agents.agent_runs import cancel_active_runs
+
+
+def make_run(run_id, status):
+    run = MagicMock()
+    run.id = run_id
+    run.status = status
+    return run
+
+
+def make_agents_client(*runs):
+    client = MagicMock()
+
+    def list_runs(thread_id):
+        async def iterate():
+            for run in runs:
+                yield run
+        return iterate()
+
+    client.runs.list = list_runs
+    client.runs.cancel = AsyncMock()
+    return client
+
+
+@pytest.mark.asyncio
+async def test_cancels_only_active_runs():
+    client = make_agents_client(
+        make_run("run_1", "in_progress"),
+        make_run("run_2", "completed"),
+        make_run("run_3", "requires_action"),
+    )
+
+    await cancel_active_runs(client, "thread_1")
+
+    cancelled = [call.kwargs["run_id"] for call in client.runs.cancel.await_args_list]
+    assert cancelled == ["run_1", "run_3"]
+
+
+@pytest.mark.asyncio
+async def test_errors_are_not_raised():
+    client = make_agents_client(make_run("run_1", "queued"))
+    client.runs.cancel.side_effect = Exception("already finished")
+
+    await cancel_active_runs(client, "thread_1")
+
+    client.runs.cancel.assert_awaited_once_with(thread_id="thread_1", run_id="run_1")
@@ -0,0 +1,98 @@
+import itertools
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from backend.agents.agent_thread_pool import AgentThreadPool
+
+
+def make_client():
+    """Return an async project client mock that hands out numbered threads."""
+    counter = itertools.count(1)
+    client = MagicMock()
+
+    async def create():
+        thread = MagicMock()
+        thread.id = f"thread-{next(counter)}"
+        return thread
+
+    client.agents.threads.create = AsyncMock(side_effect=create)
+    client.agents.threads.delete = AsyncMock()
+    return client
+
+
+@pytest.mark.asyncio
+async def test_start_pre_creates_threads():
+    client = make_client()
+    pool = AgentThreadPool(client, size=3, ttl=0)
+
+    await pool.start()
+
+    assert pool.idle_count == 3
+    assert client.agents.threads.create.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_acquire_uses_ready_thread_and_replenishes():
+    client = make_client()
+    pool = AgentThreadPool(client, size=1, ttl=0)
+    await pool.start()
+
+    thread_id = await pool.acquire()
+    await pool.drain()
+
+    assert thread_id == "thread-1"
+    assert pool.idle_count == 1
+    assert client.agents.threads.create.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_acquire_creates_thread_when_pool_is_empty():
+    client = make_client()
+    pool = AgentThreadPool(client, size=0, ttl=0)
+
+    thread_id = await pool.acquire()
+
+    assert thread_id == "thread-1"
+    assert pool.idle_count == 0
+
+
+@pytest.mark.asyncio
+async def test_release_deletes_thread_in_background():
+    client = make_client()
+    pool = AgentThreadPool(client, size=0, ttl=0)
+    thread_id = await pool.acquire()
+
+    pool.release(thread_id)
+    await pool.drain()
+
+    client.agents.threads.delete.assert_awaited_once_with("thread-1")
+
+
+@pytest.mark.asyncio
+async def test_stale_threads_are_pruned():
+    client = make_client()
+    pool = AgentThreadPool(client, size=1, ttl=60)
+    await pool.start()
+    # Age the idle thread past its TTL
+    thread_id, created_at = pool._idle[0]
+    pool._idle[0] = (thread_id, created_at - 120)
+
+    await pool.prune()
+    await pool.drain()
+
+    client.agents.threads.delete.assert_awaited_once_with("thread-1")
+    assert [idle_id for idle_id, _ in pool._idle] == ["thread-2"]
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_close_deletes_idle_threads():
+    client = make_client()
+    pool = AgentThreadPool(client, size=2, ttl=60)
+    await pool.start()
+
+    await pool.close()
+
+    assert pool.idle_count == 0
+    assert client.agents.threads.delete.await_count == 2
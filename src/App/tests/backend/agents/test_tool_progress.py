@@ -0,0 +1,68 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from backend.agents.tool_progress import (
+    ToolProgress,
+    progress_queue,
+    tool_label,
+    tool_progress_filter,
+)
+from backend.plugins.chat_with_data_plugin import ChatWithDataPlugin
+
+SQL_TOOL = ChatWithDataPlugin.get_SQL_Response.__kernel_function_name__
+SEARCH_TOOL = ChatWithDataPlugin.get_answers_from_calltranscripts.__kernel_function_name__
+
+
+def make_context(name):
+    context = MagicMock()
+    context.function.name = name
+    return context
+
+
+def test_tool_label_matches_registered_plugin_functions():
+    assert tool_label(SQL_TOOL) == "Querying portfolio data"
+    assert tool_label(SEARCH_TOOL) == "Searching call transcripts"
+    assert tool_label("other") == "Running other"
+
+
+@pytest.mark.asyncio
+async def test_filter_reports_start_and_completion():
+    queue = asyncio.Queue()
+    token = progress_queue.set(queue)
+    try:
+        await tool_progress_filter(make_context(SQL_TOOL), AsyncMock())
+    finally:
+        progress_queue.reset(token)
+
+    started, completed = queue.get_nowait(), queue.get_nowait()
+    assert started == ToolProgress(SQL_TOOL, "started", "Querying portfolio data")
+    assert completed.status == "completed"
+
+
+@pytest.mark.asyncio
+async def test_filter_reports_failure():
+    queue = asyncio.Queue()
+    token = progress_queue.set(queue)
+    try:
+        with pytest.raises(RuntimeError):
+            await tool_progress_filter(
+                make_context(SEARCH_TOOL),
+                AsyncMock(side_effect=RuntimeError("search failed")),
+            )
+    finally:
+        progress_queue.reset(token)
+
+    queue.get_nowait()
+    assert queue.get_nowait().status == "failed"
+
+
+@pytest.mark.asyncio
+async def test_filter_without_queue_only_invokes_function():
+    next_filter = AsyncMock()
+    context = make_context(SQL_TOOL)
+
+    await tool_progress_filter(context, next_filter)
+
+    next_filter.assert_awaited_once_with(context)
@@ -1,81 +1,176 @@
-from unittest.mock import patch
+import threading
+from unittest.mock import MagicMock, patch
 
-from backend.common.event_utils import track_event_if_configured
+import pytest
+from opentelemetry import trace
+from opentelemetry.trace import NonRecordingSpan, SpanContext, TraceFlags
+
+import backend.common.event_utils as event_utils
+from backend.common.event_utils import (
+    EventPipeline,
+    get_event_pipeline,
+    parse_sample_rates,
+    track_event_if_configured,
+)
+
+
+@pytest.fixture(autouse=True)
+def reset_pipeline():
+    event_utils._reset_event_pipeline()
+    yield
+    event_utils._reset_event_pipeline()
 
 
 @patch("backend.common.event_utils.track_event")
 @patch("backend.common.event_utils.config")
-@patch("backend.common.event_utils.logging")
-def test_track_event_when_configured(mock_logging, mock_config, mock_track_event):
+def test_track_event_when_configured(mock_config, mock_track_event):
     # Setup
     mock_config.APPLICATIONINSIGHTS_CONNECTION_STRING = "mock_connection_string"
+    mock_config.TELEMETRY_QUEUE_SIZE = 100
+    mock_config.TELEMETRY_BATCH_SIZE = 10
+    mock_config.TELEMETRY_FLUSH_INTERVAL_SECONDS = 0.01
+    mock_config.TELEMETRY_SAMPLE_RATES = ""
+    mock_config.TELEMETRY_DEFAULT_SAMPLE_RATE = 1.0
     event_name = "test_event"
     event_data = {"key": "value"}
 
     # Execute
     track_event_if_configured(event_name, event_data)
+    event_utils.shutdown_event_pipeline()
 
     # Verify
     mock_track_event.assert_called_once_with(event_name, event_data)
-    mock_logging.warning.assert_not_called()
 
 
 @patch("backend.common.event_utils.track_event")
 @patch("backend.common.event_utils.config")
-@patch("backend.common.event_utils.logging")
-def test_track_event_when_not_configured(mock_logging, mock_config, mock_track_event):
+def test_track_event_after_shutdown_is_dropped(mock_config, mock_track_event):
     # Setup
-    mock_config.APPLICATIONINSIGHTS_CONNECTION_STRING = None
-    event_name = "test_event"
-    event_data = {"key": "value"}
+    mock_config.APPLICATIONINSIGHTS_CONNECTION_STRING = "mock_connection_string"
+    mock_config.TELEMETRY_QUEUE_SIZE = 100
+    mock_config.TELEMETRY_BATCH_SIZE = 10
+    mock_config.TELEMETRY_FLUSH_INTERVAL_SECONDS = 0.01
+    mock_config.TELEMETRY_SAMPLE_RATES = ""
+    mock_config.TELEMETRY_DEFAULT_SAMPLE_RATE = 1.0
+    track_event_if_configured("before", {})
+    event_utils.shutdown_event_pipeline()
 
     # Execute
-    track_event_if_configured(event_name, event_data)
+    track_event_if_configured("after", {})
 
-    # Verify
-    mock_track_event.assert_not_called()
-    mock_logging.warning.assert_called_once_with(
-        f"Skipping track_event for {event_name} as Application Insights is not configured"
-    )
+    # Verify: no new flusher is started for late events
+    assert get_event_pipeline() is None
+    mock_track_event.assert_called_once_with("before", {})
+    assert not any(t.name == "telemetry-flusher" for t in threading.enumerate())
 
 
 @patch("backend.common.event_utils.track_event")
 @patch("backend.common.event_utils.config")
 @patch("backend.common.event_utils.logging")
-def test_track_event_attribute_error(mock_logging, mock_config, mock_track_event):
+def test_track_event_when_not_configured(mock_logging, mock_config, mock_track_event):
     # Setup
-    mock_config.APPLICATIONINSIGHTS_CONNECTION_STRING = "mock_connection_string"
-    mock_track_event.side_effect = AttributeError(
-        "ProxyLogger has no attribute 'resource'"
-    )
-    event_name = "test_event"
-    event_data = {"key": "value"}
+    mock_config.APPLICATIONINSIGHTS_CONNECTION_STRING = None
 
     # Execute
-    track_event_if_configured(event_name, event_data)
+    track_event_if_configured("test_event", {"key": "value"})
+    track_event_if_configured("test_event", {"key": "value"})
 
-    # Verify
-    mock_track_event.assert_called_once_with(event_name, event_data)
+    # Verify: detected once, then a no-op
+    assert get_event_pipeline() is None
+    mock_track_event.assert_not_called()
+    mock_logging.warning.assert_called_once()
+
+
+def test_pipeline_logs_attribute_error():
+    sink = MagicMock(side_effect=AttributeError("ProxyLogger has no attribute 'resource'"))
+    pipeline = EventPipeline(sink)
+
+    with patch("backend.common.event_utils.logging") as mock_logging:
+        pipeline.enqueue("test_event", {"key": "value"})
+        pipeline.flush()
+
+    sink.assert_called_once_with("test_event", {"key": "value"})
     mock_logging.warning.assert_called_once_with(
         "ProxyLogger error in track_event: ProxyLogger has no attribute 'resource'"
     )
+    assert pipeline.stats()["errors"] == 1
 
 
-@patch("backend.common.event_utils.track_event")
-@patch("backend.common.event_utils.config")
-@patch("backend.common.event_utils.logging")
-def test_track_event_general_exception(mock_logging, mock_config, mock_track_event):
-    # Setup
-    mock_config.APPLICATIONINSIGHTS_CONNECTION_STRING = "mock_connection_string"
-    mock_track_event.side_effect = Exception("Something went wrong")
-    event_name = "test_event"
-    event_data = {"key": "value"}
+def test_pipeline_logs_general_exception():
+    sink = MagicMock(side_effect=Exception("Something went wrong"))
+    pipeline = EventPipeline(sink)
 
-    # Execute
-    track_event_if_configured(event_name, event_data)
+    with patch("backend.common.event_utils.logging") as mock_logging:
+        pipeline.enqueue("test_event", {"key": "value"})
+        pipeline.flush()
 
-    # Verify
-    mock_track_event.assert_called_once_with(event_name, event_data)
     mock_logging.warning.assert_called_once_with(
         "Error in track_event: Something went wrong"
     )
+
+
+def test_pipeline_drops_events_when_queue_is_full():
+    sink = MagicMock()
+    pipeline = EventPipeline(sink, max_queue=2)
+
+    results = [pipeline.enqueue("event", {"n": n}) for n in range(3)]
+    pipeline.flush()
+
+    assert results == [True, True, False]
+    assert sink.call_count == 2
+    assert pipeline.stats()["dropped"] == 1
+
+
+def test_pipeline_samples_per_event():
+    sink = MagicMock()
+    pipeline = EventPipeline(sink, sample_rates={"noisy": 0.0})
+
+    pipeline.enqueue("noisy", {})
+    pipeline.enqueue("important", {})
+    pipeline.flush()
+
+    sink.assert_called_once_with("important", {})
+    assert pipeline.stats()["sampled_out"] == 1
+
+
+def test_pipeline_flusher_sends_in_background():
+    sink = MagicMock()
+    pipeline = EventPipeline(sink, flush_interval=0.01)
+    pipeline.start()
+
+    pipeline.enqueue("event", {})
+    pipeline.stop()
+
+    sink.assert_called_once_with("event", {})
+    assert pipeline.stats()["sent"] == 1
+
+
+def test_pipeline_sends_event_in_emitting_span_context():
+    trace_ids = []
+    pipeline = EventPipeline(
+        lambda name, data: trace_ids.append(
+            trace.get_current_span().get_span_context().trace_id
+        ),
+        flush_interval=0.01,
+    )
+    span = NonRecordingSpan(
+        SpanContext(
+            trace_id=0x1234,
+            span_id=0x5678,
+            is_remote=False,
+            trace_flags=TraceFlags(TraceFlags.SAMPLED),
+        )
+    )
+    pipeline.start()
+
+    with trace.use_span(span):
+        pipeline.enqueue("event", {})
+    pipeline.enqueue("outside", {})
+    pipeline.stop()
+
+    # Sent from the flusher thread, but under the span each was raised in
+    assert trace_ids == [0x1234, 0]
+
+
+def test_parse_sample_rates():
+    assert parse_sample_rates("a=0.1, b=0,c=2,bad=x,") == {"a": 0.1, "b": 0.0, "c": 1.0}
@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+
+from backend.common.metrics import (
+    StageHistograms,
+    StageTimer,
+    render_gauges,
+    stage,
+    stage_histograms,
+)
+
+
+@pytest.fixture(autouse=True)
+def reset_histograms():
+    stage_histograms.reset()
+    yield
+    stage_histograms.reset()
+
+
+def test_render_prometheus_is_cumulative():
+    # Arrange
+    histograms = StageHistograms(buckets=(0.1, 1))
+
+    # Act
+    histograms.observe("sql_execution", 0.05)
+    histograms.observe("sql_execution", 0.5)
+    histograms.observe("sql_execution", 5)
+    text = histograms.render_prometheus()
+
+    # Assert
+    labels = 'stage="sql_execution",outcome="ok"'
+    assert "# TYPE chat_stage_duration_seconds histogram" in text
+    assert f'chat_stage_duration_seconds_bucket{{{labels},le="0.1"}} 1' in text
+    assert f'chat_stage_duration_seconds_bucket{{{labels},le="1"}} 2' in text
+    assert f'chat_stage_duration_seconds_bucket{{{labels},le="+Inf"}} 3' in text
+    assert f"chat_stage_duration_seconds_count{{{labels}}} 3" in text
+    assert f"chat_stage_duration_seconds_sum{{{labels}}} 5.55" in text
+
+
+def test_stage_records_error_outcome():
+    # Act
+    with pytest.raises(ValueError):
+        with stage("sql_generation"):
+            raise ValueError("boom")
+
+    # Assert
+    text = stage_histograms.render_prometheus()
+    assert 'stage="sql_generation",outcome="error"' in text
+    assert 'outcome="ok"' not in text
+
+
+@pytest.mark.asyncio
+async def test_stage_records_cancellation():
+    # Arrange
+    async def run():
+        with stage("search_run"):
+            await asyncio.sleep(10)
+
+    task = asyncio.create_task(run())
+    await asyncio.sleep(0)
+
+    # Act
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    # Assert
+    assert 'stage="search_run",outcome="cancelled"' in stage_histograms.render_prometheus()
+
+
+def test_stage_timer_records_once():
+    # Arrange
+    timer = StageTimer("agent_invoke")
+
+    # Act
+    timer.end()
+    timer.end(RuntimeError("late"))
+
+    # Assert
+    text = stage_histograms.render_prometheus()
+    assert 'chat_stage_duration_seconds_count{stage="agent_invoke",outcome="ok"} 1' in text
+    assert 'outcome="error"' not in text
+
+
+def test_render_gauges_flattens_nested_stats():
+    # Arrange
+    stats = {"executor": {"running": 2, "avg_wait_ms": 0.5}, "pool": {}, "label": "x"}
+
+    # Act
+    text = render_gauges("sql", stats)
+
+    # Assert
+    assert text == (
+        "# TYPE sql_executor_running gauge\n"
+        "sql_executor_running 2\n"
+        "# TYPE sql_executor_avg_wait_ms gauge\n"
+        "sql_executor_avg_wait_ms 0.5\n"
+    )
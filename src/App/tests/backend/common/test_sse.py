@@ -0,0 +1,127 @@
+import asyncio
+
+import pytest
+
+from backend.common.sse import (
+    HEARTBEAT,
+    ReplayBuffer,
+    ReplayRegistry,
+    event_stream,
+    format_event,
+    parse_event_id,
+    wants_event_stream,
+)
+
+
+async def frames(*items, delay=0):
+    for item in items:
+        if delay:
+            await asyncio.sleep(delay)
+        yield item
+
+
+def test_wants_event_stream():
+    assert wants_event_stream("text/event-stream")
+    assert wants_event_stream("application/json, text/event-stream")
+    assert not wants_event_stream("application/json-lines")
+    assert not wants_event_stream(None)
+
+
+def test_format_event():
+    event = format_event(b'{"a": 1}\n', event_id="s:1")
+    assert event == b'id: s:1\ndata: {"a": 1}\n\n'
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [("abc:3", ("abc", 3)), ("abc", None), ("abc:x", None), ("", None)],
+)
+def test_parse_event_id(value, expected):
+    assert parse_event_id(value) == expected
+
+
+@pytest.mark.asyncio
+async def test_event_stream_sends_frames_with_ids():
+    registry = ReplayRegistry()
+    buffer = registry.start(frames(b'{"n": 1}\n', b'{"n": 2}\n'))
+
+    events = [event async for event in event_stream(buffer)]
+
+    assert events == [
+        f'id: {buffer.stream_id}:1\ndata: {{"n": 1}}\n\n'.encode(),
+        f'id: {buffer.stream_id}:2\ndata: {{"n": 2}}\n\n'.encode(),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_event_stream_sends_heartbeats_while_idle():
+    buffer = ReplayRegistry().start(frames(b"{}\n", delay=0.1))
+
+    events = [event async for event in event_stream(buffer, heartbeat=0.02)]
+
+    assert HEARTBEAT in events
+    assert events[-1].endswith(b"data: {}\n\n")
+
+
+@pytest.mark.asyncio
+async def test_resume_replays_only_missed_events():
+    registry = ReplayRegistry()
+    buffer = registry.start(frames(b"1\n", b"2\n", b"3\n"))
+    await buffer.task
+
+    resumed = registry.get(buffer.stream_id)
+    events = [event async for event in event_stream(resumed, after=1)]
+
+    assert [event.split(b"\n")[1] for event in events] == [b"data: 2", b"data: 3"]
+
+
+@pytest.mark.asyncio
+async def test_resume_fails_when_events_were_evicted():
+    buffer = ReplayBuffer("s", max_events=2)
+    for frame in ("1", "2", "3"):
+        buffer.append(frame)
+    buffer.close()
+
+    assert not buffer.can_resume(0)
+    assert buffer.can_resume(1)
+    events = [event async for event in event_stream(buffer, after=0)]
+    assert events[0].startswith(b"event: error")
+    assert b'"code": "events_evicted"' in events[0]
+
+
+@pytest.mark.asyncio
+async def test_producer_error_is_sent_as_error_event():
+    async def failing():
+        yield b"1\n"
+        raise RuntimeError("boom")
+
+    buffer = ReplayRegistry().start(failing())
+
+    events = [event async for event in event_stream(buffer)]
+
+    assert events[-1] == b'event: error\ndata: {"error": "boom"}\n\n'
+
+
+@pytest.mark.asyncio
+async def test_registry_expires_completed_streams():
+    registry = ReplayRegistry(ttl=0)
+    buffer = registry.start(frames(b"1\n"))
+    await buffer.task
+    await asyncio.sleep(0.01)
+
+    assert registry.get(buffer.stream_id) is None
+
+
+@pytest.mark.asyncio
+async def test_stream_without_reader_is_cancelled():
+    registry = ReplayRegistry(orphan_timeout=0.01)
+    buffer = registry.start(frames(b"1\n", b"2\n", delay=0.5))
+
+    # The only reader disconnects before the stream completes
+    stream = event_stream(buffer, heartbeat=0.01)
+    await stream.__anext__()
+    await stream.aclose()
+    await asyncio.gather(buffer.task, return_exceptions=True)
+
+    assert buffer.task.cancelled()
+    assert buffer.error == "Stream cancelled"
@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+
+from backend.common.stream_coalescer import coalesce_deltas
+
+
+async def stream(*items, delay=0):
+    for item in items:
+        if delay:
+            await asyncio.sleep(delay)
+        yield item
+
+
+async def collect(deltas, **policy):
+    return [text async for text in coalesce_deltas(deltas, **policy)]
+
+
+@pytest.mark.asyncio
+async def test_without_policy_forwards_every_delta():
+    frames = await collect(stream("a", "", "b", "c"))
+    assert frames == ["a", "b", "c"]
+
+
+@pytest.mark.asyncio
+async def test_first_delta_is_not_delayed():
+    async def slow_after_first():
+        yield "Hello"
+        await asyncio.sleep(10)
+        yield " world"
+
+    frames = coalesce_deltas(slow_after_first(), max_bytes=1024)
+    first = await asyncio.wait_for(frames.__anext__(), timeout=1)
+
+    assert first == "Hello"
+    await frames.aclose()
+
+
+@pytest.mark.asyncio
+async def test_flushes_by_size():
+    frames = await collect(stream("first", "ab", "cd", "ef", "g"), max_bytes=4)
+    assert frames == ["first", "abcd", "efg"]
+
+
+@pytest.mark.asyncio
+async def test_flushes_on_sentence_boundary():
+    frames = await collect(
+        stream("Hi", " there", ".", " How", " are", " you?", " Bye"),
+        sentence_boundary=True,
+    )
+    assert frames == ["Hi", " there.", " How are you?", " Bye"]
+
+
+@pytest.mark.asyncio
+async def test_flushes_by_time_while_upstream_is_stalled():
+    async def stalled():
+        yield "a"
+        yield "b"
+        await asyncio.sleep(0.2)
+        yield "c"
+
+    frames = coalesce_deltas(stalled(), max_ms=20)
+    assert await frames.__anext__() == "a"
+    # "b" is flushed by the timer before "c" arrives
+    assert await asyncio.wait_for(frames.__anext__(), timeout=0.1) == "b"
+    assert [text async for text in frames] == ["c"]
@@ -1,11 +1,16 @@
+import asyncio
 import dataclasses
 import json
-from unittest.mock import MagicMock, patch
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
 from backend.common.utils import (
     JSONEncoder,
+    RedactedJSON,
+    StreamChunkEncoder,
+    clear_filter_cache,
     convert_to_pf_format,
     fetchUserGroups,
     format_as_ndjson,
@@ -14,6 +19,7 @@ from backend.common.utils import (
     format_stream_response,
     generateFilterString,
     parse_multi_columns,
+    redact_secrets,
 )
 
 
@@ -29,6 +35,46 @@ def test_json_encoder():
     assert json.loads(encoded) == {"field1": 1, "field2": "test"}
 
 
+def test_redact_secrets_masks_nested_values():
+    model_args = {
+        "messages": [{"role": "user", "content": "hi"}],
+        "extra_body": {
+            "data_sources": [
+                {
+                    "parameters": {
+                        "key": "search-key",
+                        "authentication": {"type": "api_key", "api_key": "secret"},
+                        "embedding_dependency": {
+                            "authentication": {"key": "embedding-key"}
+                        },
+                        "filter": None,
+                    }
+                }
+            ]
+        },
+    }
+
+    redacted = redact_secrets(model_args)
+
+    parameters = redacted["extra_body"]["data_sources"][0]["parameters"]
+    assert parameters["key"] == "*****"
+    assert parameters["authentication"] == {"type": "api_key", "api_key": "*****"}
+    assert parameters["embedding_dependency"]["authentication"]["key"] == "*****"
+    assert parameters["filter"] is None
+    # The original is left untouched
+    assert model_args["extra_body"]["data_sources"][0]["parameters"]["key"] == "search-key"
+
+
+def test_redacted_json_serializes_only_when_formatted():
+    with patch("backend.common.utils.redact_secrets") as mock_redact:
+        mock_redact.return_value = {"api_key": "*****"}
+        value = RedactedJSON({"api_key": "secret"})
+        mock_redact.assert_not_called()
+
+        assert json.loads(str(value)) == {"api_key": "*****"}
+        mock_redact.assert_called_once()
+
+
 # Test parse_multi_columns with edge cases
 @pytest.mark.parametrize(
     "input_str, expected",
@@ -43,34 +89,93 @@ def test_parse_multi_columns(input_str, expected):
     assert parse_multi_columns(input_str) == expected
 
 
-@patch("backend.common.utils.requests.get")
-def test_fetch_user_groups(mock_get):
-    mock_response = MagicMock()
-    mock_response.status_code = 200
-    mock_response.json.return_value = {"value": [{"id": "group1"}]}
-    mock_get.return_value = mock_response
+def make_graph_session(*pages, status=200):
+    """Return a Graph session mock that serves each page in turn."""
+    responses = []
+    for page in pages:
+        response = MagicMock()
+        response.status = status
+        response.json = AsyncMock(return_value=page)
+        response.text = AsyncMock(return_value="error")
+        context = MagicMock()
+        context.__aenter__ = AsyncMock(return_value=response)
+        context.__aexit__ = AsyncMock(return_value=False)
+        responses.append(context)
+    session = MagicMock()
+    session.get = MagicMock(side_effect=responses)
+    return session
+
 
-    user_groups = fetchUserGroups("fake_token")
+@pytest.fixture(autouse=True)
+def reset_filter_cache():
+    clear_filter_cache()
+    yield
+    clear_filter_cache()
+
+
+@pytest.mark.asyncio
+async def test_fetch_user_groups():
+    session = make_graph_session({"value": [{"id": "group1"}]})
+    with patch("backend.common.utils.get_graph_session", return_value=session):
+        user_groups = await fetchUserGroups("fake_token")
     assert user_groups == [{"id": "group1"}]
 
     # Test with nextLink
-    mock_response.json.return_value = {
-        "value": [{"id": "group1"}],
-        "@odata.nextLink": "next_link",
-    }
-    mock_get.side_effect = [mock_response, mock_response]
-    user_groups = fetchUserGroups("fake_token")
-    assert user_groups == [{"id": "group1"}, {"id": "group1"}]
+    session = make_graph_session(
+        {"value": [{"id": "group1"}], "@odata.nextLink": "next_link"},
+        {"value": [{"id": "group2"}]},
+    )
+    with patch("backend.common.utils.get_graph_session", return_value=session):
+        user_groups = await fetchUserGroups("fake_token")
+    assert user_groups == [{"id": "group1"}, {"id": "group2"}]
+    assert session.get.call_args_list[1].args[0] == "next_link"
 
 
-@patch("backend.common.utils.fetchUserGroups")
+@pytest.mark.asyncio
+async def test_fetch_user_groups_error_returns_empty_list():
+    session = make_graph_session({}, status=401)
+    with patch("backend.common.utils.get_graph_session", return_value=session):
+        user_groups = await fetchUserGroups("fake_token")
+    assert user_groups == []
+
+
+@pytest.mark.asyncio
+@patch("backend.common.utils._fetch_user_groups", new_callable=AsyncMock)
 @patch("backend.common.utils.AZURE_SEARCH_PERMITTED_GROUPS_COLUMN", "your_column")
-def test_generate_filter_string(mock_fetch_user_groups):
+async def test_generate_filter_string(mock_fetch_user_groups):
     mock_fetch_user_groups.return_value = [{"id": "group1"}, {"id": "group2"}]
-    filter_string = generateFilterString("fake_token")
+    filter_string = await generateFilterString("fake_token")
     assert filter_string == "your_column/any(g:search.in(g, 'group1, group2'))"
 
 
+@pytest.mark.asyncio
+@patch("backend.common.utils._fetch_user_groups", new_callable=AsyncMock)
+async def test_generate_filter_string_is_cached_per_token(mock_fetch_user_groups):
+    mock_fetch_user_groups.return_value = [{"id": "group1"}]
+
+    results = await asyncio.gather(
+        *(generateFilterString("token_a") for _ in range(5))
+    )
+    await generateFilterString("token_a")
+    await generateFilterString("token_b")
+
+    assert len(set(results)) == 1
+    assert mock_fetch_user_groups.await_count == 2
+
+
+@pytest.mark.asyncio
+@patch("backend.common.utils._fetch_user_groups", new_callable=AsyncMock)
+@patch("backend.common.utils.AZURE_SEARCH_PERMITTED_GROUPS_COLUMN", "your_column")
+async def test_generate_filter_string_does_not_cache_failures(mock_fetch_user_groups):
+    mock_fetch_user_groups.side_effect = [RuntimeError("throttled"), [{"id": "group1"}]]
+
+    first = await generateFilterString("fake_token")
+    second = await generateFilterString("fake_token")
+
+    assert first == "your_column/any(g:search.in(g, ''))"
+    assert second == "your_column/any(g:search.in(g, 'group1'))"
+
+
 @pytest.mark.asyncio
 async def test_format_as_ndjson():
     async def async_gen():
@@ -164,3 +269,20 @@ def test_convert_to_pf_format():
             "outputs": {"response_field": "assistant message"},
         }
     ]
+
+
+@pytest.mark.parametrize("text", ["Hello", 'quote " and \\ slash', "caf\u00e9 \u2014 ok", ""])
+def test_stream_chunk_encoder_matches_format_stream_response(text):
+    history_metadata = {"conversation_id": "conv-1"}
+    encoder = StreamChunkEncoder("chunk-1", "gpt-4o", 1234567890, history_metadata, "apim-1")
+    chunk = SimpleNamespace(
+        id="chunk-1",
+        model="gpt-4o",
+        created=1234567890,
+        object="extensions.chat.completion.chunk",
+        choices=[SimpleNamespace(delta=SimpleNamespace(role="assistant", content=text))],
+    )
+
+    expected = json.dumps(format_stream_response(chunk, history_metadata, "apim-1")) + "\n"
+
+    assert encoder.encode(text) == expected.encode("utf-8")
@@ -0,0 +1,69 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from backend.helpers.openai_client_registry import OpenAIClientRegistry
+
+
+@pytest.fixture
+def mock_project_client():
+    with patch(
+        "backend.helpers.openai_client_registry.AIProjectClient"
+    ) as mock_project_client_class, patch(
+        "backend.helpers.openai_client_registry.get_azure_credential_async",
+        new_callable=AsyncMock,
+    ) as mock_credential, patch(
+        "backend.helpers.openai_client_registry.track_event_if_configured"
+    ):
+        mock_credential.return_value = AsyncMock()
+        mock_instance = MagicMock()
+        mock_instance.close = AsyncMock()
+        mock_instance.get_openai_client = AsyncMock(side_effect=lambda **_: AsyncMock())
+        mock_project_client_class.return_value = mock_instance
+        yield mock_project_client_class, mock_credential
+
+
+@pytest.mark.asyncio
+async def test_get_client_reuses_client_per_endpoint_and_version(mock_project_client):
+    mock_project_client_class, mock_credential = mock_project_client
+    registry = OpenAIClientRegistry(client_id="mid")
+
+    first = await registry.get_client("https://a", "2025-01-01")
+    second = await registry.get_client("https://a", "2025-01-01")
+
+    assert first is second
+    mock_project_client_class.assert_called_once_with(
+        endpoint="https://a",
+        credential=mock_credential.return_value,
+        api_version="2025-01-01",
+    )
+    mock_credential.assert_awaited_once_with("mid")
+
+
+@pytest.mark.asyncio
+async def test_get_client_separates_api_versions(mock_project_client):
+    mock_project_client_class, _ = mock_project_client
+    registry = OpenAIClientRegistry(client_id="mid")
+
+    first = await registry.get_client("https://a", "2025-01-01")
+    second = await registry.get_client("https://a", "2025-02-01")
+
+    assert first is not second
+    assert mock_project_client_class.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_close_releases_all_clients(mock_project_client):
+    mock_project_client_class, mock_credential = mock_project_client
+    registry = OpenAIClientRegistry(client_id="mid")
+    openai_client = await registry.get_client("https://a", "2025-01-01")
+
+    await registry.close()
+
+    openai_client.close.assert_awaited_once()
+    mock_project_client_class.return_value.close.assert_awaited_once()
+    mock_credential.return_value.close.assert_awaited_once()
+
+    # A closed registry builds a fresh client on next use
+    await registry.get_client("https://a", "2025-01-01")
+    assert mock_project_client_class.call_count == 2
@@ -1,7 +1,9 @@
-from unittest.mock import MagicMock, patch
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
+from backend.agents.agent_thread_pool import AgentThreadPool
 from backend.plugins.chat_with_data_plugin import ChatWithDataPlugin
 
 
@@ -45,17 +47,17 @@ class TestChatWithDataPlugin:
         )
 
     @pytest.mark.asyncio
-    @patch("backend.plugins.chat_with_data_plugin.get_connection")
+    @patch("backend.plugins.chat_with_data_plugin.fetch_all")
     @patch("backend.plugins.chat_with_data_plugin.config")
     @patch("backend.agents.agent_factory.AgentFactory.get_sql_agent")
-    async def test_get_sql_response_success(self, mock_get_sql_agent, mock_config, mock_get_connection):
+    async def test_get_sql_response_success(self, mock_get_sql_agent, mock_config, mock_fetch_all):
         mock_config.AI_PROJECT_ENDPOINT = "https://dummy.endpoint"
         mock_config.AZURE_OPENAI_MODEL = "gpt-4o-mini"
         mock_config.SQL_SYSTEM_PROMPT = "Test prompt"
 
         mock_agent = MagicMock()
         mock_agent.id = "mock-agent-id"
-        mock_project_client = MagicMock()
+        mock_project_client = AsyncMock()
 
         mock_thread = MagicMock()
         mock_thread.id = "thread123"
@@ -69,32 +71,36 @@ class TestChatWithDataPlugin:
         mock_message.text.value = "SELECT * FROM Clients WHERE ClientId = 'client123';"
         mock_project_client.agents.messages.get_last_message_text_by_role.return_value = mock_message
 
-        mock_get_sql_agent.return_value = {"agent": mock_agent, "client": mock_project_client}
+        mock_get_sql_agent.return_value = {
+            "agent": mock_agent,
+            "client": mock_project_client,
+            "thread_pool": AgentThreadPool(mock_project_client, size=0, ttl=0),
+        }
 
         # Mock DB execution
-        mock_connection = MagicMock()
-        mock_cursor = MagicMock()
-        mock_cursor.fetchall.return_value = [("John Doe", "john@example.com", "Engineer")]
-        mock_connection.cursor.return_value = mock_cursor
-        mock_get_connection.return_value = mock_connection
+        mock_fetch_all.return_value = [("John Doe", "john@example.com", "Engineer")]
 
         result = await self.plugin.get_SQL_Response("Find client details", "client123")
 
+        mock_fetch_all.assert_awaited_once_with(
+            "SELECT * FROM Clients WHERE ClientId = 'client123';"
+        )
+
         assert "John Doe" in result
         assert "john@example.com" in result
         assert "Engineer" in result
 
     @pytest.mark.asyncio
-    @patch("backend.plugins.chat_with_data_plugin.get_connection")
+    @patch("backend.plugins.chat_with_data_plugin.fetch_all")
     @patch("backend.plugins.chat_with_data_plugin.config")
     @patch("backend.agents.agent_factory.AgentFactory.get_sql_agent")
-    async def test_get_sql_response_database_error(self, mock_get_sql_agent, mock_config, mock_get_connection):
+    async def test_get_sql_response_database_error(self, mock_get_sql_agent, mock_config, mock_fetch_all):
         mock_config.AI_PROJECT_ENDPOINT = "https://dummy.endpoint"
         mock_config.AZURE_OPENAI_MODEL = "gpt-4o-mini"
 
         mock_agent = MagicMock()
         mock_agent.id = "mock-agent-id"
-        mock_project_client = MagicMock()
+        mock_project_client = AsyncMock()
 
         mock_thread = MagicMock()
         mock_thread.id = "thread123"
@@ -108,9 +114,13 @@ class TestChatWithDataPlugin:
         mock_message.text.value = "SELECT * FROM Clients;"
         mock_project_client.agents.messages.get_last_message_text_by_role.return_value = mock_message
 
-        mock_get_sql_agent.return_value = {"agent": mock_agent, "client": mock_project_client}
+        mock_get_sql_agent.return_value = {
+            "agent": mock_agent,
+            "client": mock_project_client,
+            "thread_pool": AgentThreadPool(mock_project_client, size=0, ttl=0),
+        }
 
-        mock_get_connection.side_effect = Exception("Database connection failed")
+        mock_fetch_all.side_effect = Exception("Database connection failed")
 
         result = await self.plugin.get_SQL_Response("Get all clients", "client123")
 
@@ -126,7 +136,7 @@ class TestChatWithDataPlugin:
 
         mock_agent = MagicMock()
         mock_agent.id = "mock-agent-id"
-        mock_project_client = MagicMock()
+        mock_project_client = AsyncMock()
 
         mock_thread = MagicMock()
         mock_thread.id = "thread123"
@@ -135,7 +145,11 @@ class TestChatWithDataPlugin:
         # Simulate error during run processing
         mock_project_client.agents.runs.create_and_process.side_effect = Exception("OpenAI API error")
 
-        mock_get_sql_agent.return_value = {"agent": mock_agent, "client": mock_project_client}
+        mock_get_sql_agent.return_value = {
+            "agent": mock_agent,
+            "client": mock_project_client,
+            "thread_pool": AgentThreadPool(mock_project_client, size=0, ttl=0),
+        }
 
         plugin = ChatWithDataPlugin()
         result = await plugin.get_SQL_Response("Get client data", "client123")
@@ -143,6 +157,38 @@ class TestChatWithDataPlugin:
         assert "Error retrieving SQL data" in result
         assert "OpenAI API error" in result
 
+    @pytest.mark.asyncio
+    @patch("backend.plugins.chat_with_data_plugin.cancel_active_runs")
+    @patch("backend.plugins.chat_with_data_plugin.config")
+    @patch("backend.agents.agent_factory.AgentFactory.get_sql_agent")
+    async def test_get_sql_response_cancels_agent_run_when_cancelled(
+        self, mock_get_sql_agent, mock_config, mock_cancel_active_runs
+    ):
+        mock_agent = MagicMock()
+        mock_agent.id = "mock-agent-id"
+        mock_project_client = AsyncMock()
+
+        mock_thread = MagicMock()
+        mock_thread.id = "thread123"
+        mock_project_client.agents.threads.create.return_value = mock_thread
+
+        # The chat is abandoned while the SQL agent run is in progress
+        mock_project_client.agents.runs.create_and_process.side_effect = asyncio.CancelledError()
+
+        mock_get_sql_agent.return_value = {
+            "agent": mock_agent,
+            "client": mock_project_client,
+            "thread_pool": AgentThreadPool(mock_project_client, size=0, ttl=0),
+        }
+
+        plugin = ChatWithDataPlugin()
+        with pytest.raises(asyncio.CancelledError):
+            await plugin.get_SQL_Response("Get client data", "client123")
+
+        mock_cancel_active_runs.assert_awaited_once_with(
+            mock_project_client.agents, "thread123"
+        )
+
     @pytest.mark.asyncio
     @patch("backend.agents.agent_factory.AgentFactory.get_search_agent")
     async def test_get_answers_from_calltranscripts_success(
@@ -153,21 +199,14 @@ class TestChatWithDataPlugin:
         mock_agent = MagicMock()
         mock_agent.id = "test-agent-id"
 
-        mock_project_client = MagicMock()
+        mock_project_client = AsyncMock()
         mock_get_search_agent.return_value = {
             "agent": mock_agent,
             "client": mock_project_client,
+            "index_asset_id": "project-index-test/versions/1",
+            "thread_pool": AgentThreadPool(mock_project_client, size=0, ttl=0),
         }
 
-        # Mock project index creation
-        mock_index = MagicMock()
-        mock_index.name = "project-index-test"
-        mock_index.version = "1"
-        mock_project_client.indexes.create_or_update.return_value = mock_index
-
-        # Mock agent update
-        mock_project_client.agents.update_agent.return_value = mock_agent
-
         # Mock thread creation
         mock_thread = MagicMock()
         mock_thread.id = "test-thread-id"
@@ -196,15 +235,14 @@ class TestChatWithDataPlugin:
         # Verify agent factory was called
         mock_get_search_agent.assert_called_once()
 
-        # Verify project index was created/updated
-        mock_project_client.indexes.create_or_update.assert_called_once()
+        # Verify the index is not re-registered and the shared agent is not mutated
+        mock_project_client.indexes.create_or_update.assert_not_called()
+        mock_project_client.agents.update_agent.assert_not_called()
 
-        # Verify agent was updated with search tool
-        mock_project_client.agents.update_agent.assert_called_once()
-
-        # Verify thread was created and deleted
+        # Verify thread was created and deleted in the background
+        await mock_get_search_agent.return_value["thread_pool"].drain()
         mock_project_client.agents.threads.create.assert_called_once()
-        mock_project_client.agents.threads.delete.assert_called_once_with(
+        mock_project_client.agents.threads.delete.assert_awaited_once_with(
             "test-thread-id"
         )
 
@@ -212,6 +250,14 @@ class TestChatWithDataPlugin:
         mock_project_client.agents.messages.create.assert_called_once()
         mock_project_client.agents.runs.create_and_process.assert_called_once()
 
+        # Verify the client filter was attached to the run
+        toolset = mock_project_client.agents.runs.create_and_process.call_args.kwargs[
+            "toolset"
+        ]
+        search_index = toolset.resources["azure_ai_search"]["indexes"][0]
+        assert search_index["filter"] == "client_id eq 'client123'"
+        assert search_index["index_asset_id"] == "project-index-test/versions/1"
+
     @pytest.mark.asyncio
     @patch("backend.agents.agent_factory.AgentFactory.get_search_agent")
     async def test_get_answers_from_calltranscripts_no_results(
@@ -222,21 +268,14 @@ class TestChatWithDataPlugin:
         mock_agent = MagicMock()
         mock_agent.id = "test-agent-id"
 
-        mock_project_client = MagicMock()
+        mock_project_client = AsyncMock()
         mock_get_search_agent.return_value = {
             "agent": mock_agent,
             "client": mock_project_client,
+            "index_asset_id": "project-index-test/versions/1",
+            "thread_pool": AgentThreadPool(mock_project_client, size=0, ttl=0),
         }
 
-        # Mock project index creation
-        mock_index = MagicMock()
-        mock_index.name = "project-index-test"
-        mock_index.version = "1"
-        mock_project_client.indexes.create_or_update.return_value = mock_index
-
-        # Mock agent update
-        mock_project_client.agents.update_agent.return_value = mock_agent
-
         # Mock thread creation
         mock_thread = MagicMock()
         mock_thread.id = "test-thread-id"
@@ -268,21 +307,14 @@ class TestChatWithDataPlugin:
         mock_agent = MagicMock()
         mock_agent.id = "test-agent-id"
 
-        mock_project_client = MagicMock()
+        mock_project_client = AsyncMock()
         mock_get_search_agent.return_value = {
             "agent": mock_agent,
             "client": mock_project_client,
+            "index_asset_id": "project-index-test/versions/1",
+            "thread_pool": AgentThreadPool(mock_project_client, size=0, ttl=0),
         }
 
-        # Mock project index creation
-        mock_index = MagicMock()
-        mock_index.name = "project-index-test"
-        mock_index.version = "1"
-        mock_project_client.indexes.create_or_update.return_value = mock_index
-
-        # Mock agent update
-        mock_project_client.agents.update_agent.return_value = mock_agent
-
         # Mock thread creation
         mock_thread = MagicMock()
         mock_thread.id = "test-thread-id"
@@ -309,21 +341,14 @@ class TestChatWithDataPlugin:
         mock_agent = MagicMock()
         mock_agent.id = "test-agent-id"
 
-        mock_project_client = MagicMock()
+        mock_project_client = AsyncMock()
         mock_get_search_agent.return_value = {
             "agent": mock_agent,
             "client": mock_project_client,
+            "index_asset_id": "project-index-test/versions/1",
+            "thread_pool": AgentThreadPool(mock_project_client, size=0, ttl=0),
         }
 
-        # Mock project index creation
-        mock_index = MagicMock()
-        mock_index.name = "project-index-test"
-        mock_index.version = "1"
-        mock_project_client.indexes.create_or_update.return_value = mock_index
-
-        # Mock agent update
-        mock_project_client.agents.update_agent.return_value = mock_agent
-
         # Mock thread creation
         mock_thread = MagicMock()
         mock_thread.id = "test-thread-id"
@@ -351,21 +376,14 @@ class TestChatWithDataPlugin:
         mock_agent = MagicMock()
         mock_agent.id = "test-agent-id"
 
-        mock_project_client = MagicMock()
+        mock_project_client = AsyncMock()
         mock_get_search_agent.return_value = {
             "agent": mock_agent,
             "client": mock_project_client,
+            "index_asset_id": "project-index-test/versions/1",
+            "thread_pool": AgentThreadPool(mock_project_client, size=0, ttl=0),
         }
 
-        # Mock project index creation
-        mock_index = MagicMock()
-        mock_index.name = "project-index-test"
-        mock_index.version = "1"
-        mock_project_client.indexes.create_or_update.return_value = mock_index
-
-        # Mock agent update
-        mock_project_client.agents.update_agent.return_value = mock_agent
-
         # Mock thread creation
         mock_thread = MagicMock()
         mock_thread.id = "test-thread-id"
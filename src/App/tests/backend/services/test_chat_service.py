@@ -1,7 +1,9 @@
+import asyncio
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
+from backend.agents.tool_progress import ToolProgress, progress_queue
 from backend.services.chat_service import stream_response_from_wealth_assistant
 
 
@@ -97,9 +99,22 @@ class TestChatService:
             with pytest.raises(Exception, match="Test exception"):
                 await stream_response_from_wealth_assistant(query, client_id)
 
+    @pytest.mark.asyncio
+    async def test_stream_response_client_lookup_failure(self):
+        """Test that a failure before the thread exists re-raises the original error."""
+        # Arrange
+        with patch(
+            "backend.services.chat_service.get_client_name_from_db",
+            side_effect=RuntimeError("database unavailable"),
+        ):
+
+            # Act & Assert
+            with pytest.raises(RuntimeError, match="database unavailable"):
+                await stream_response_from_wealth_assistant("Test query", "123")
+
     @pytest.mark.asyncio
     async def test_stream_response_empty_iterator(self):
-        """Test behavior with empty iterator (no chunks) - tests the UnboundLocalError bug."""
+        """Test that an empty agent stream yields nothing and deletes no thread."""
         # Arrange
         query = "Test query"
         client_id = "123"
@@ -130,16 +145,16 @@ class TestChatService:
             "backend.services.chat_service.config", mock_config
         ):
 
-            # Act - This should catch the UnboundLocalError from the implementation
-            with pytest.raises(
-                UnboundLocalError, match="cannot access local variable 'chunk'"
-            ):
-                generator_func = await stream_response_from_wealth_assistant(
-                    query, client_id
-                )
-                response_chunks = []
-                async for chunk in generator_func():
-                    response_chunks.append(chunk)
+            # Act
+            generator_func = await stream_response_from_wealth_assistant(
+                query, client_id
+            )
+            response_chunks = []
+            async for chunk in generator_func():
+                response_chunks.append(chunk)
+
+            # Assert
+            assert response_chunks == []
 
     @pytest.mark.asyncio
     async def test_default_prompt_formatting(self):
@@ -194,3 +209,89 @@ class TestChatService:
             assert "selected client" in additional_instructions.lower()
             assert "sql" in additional_instructions.lower()
             mock_thread.delete.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_stream_response_reports_running_tools(self):
+        """Test that progress is repeated while a tool call blocks the agent stream."""
+        # Arrange
+        mock_agent = MagicMock()
+
+        async def mock_stream():
+            queue = progress_queue.get()
+            queue.put_nowait(ToolProgress("get_SQL_Response", "started", "Querying portfolio data"))
+            await asyncio.sleep(0.05)
+            queue.put_nowait(ToolProgress("get_SQL_Response", "completed", "Querying portfolio data"))
+            chunk = MagicMock()
+            chunk.content = "Answer"
+            chunk.thread = None
+            yield chunk
+
+        mock_agent.invoke_stream = MagicMock(return_value=mock_stream())
+        mock_current_app = MagicMock()
+        mock_current_app.wealth_advisor_agent = mock_agent
+        mock_config = MagicMock()
+        mock_config.STREAM_TEXT_SYSTEM_PROMPT = ""
+        mock_config.TOOL_PROGRESS_INTERVAL_SECONDS = 0.01
+
+        with patch(
+            "backend.services.chat_service.current_app", mock_current_app
+        ), patch(
+            "backend.services.chat_service.get_client_name_from_db",
+            return_value="Test Client",
+        ), patch(
+            "backend.services.chat_service.config", mock_config
+        ):
+            # Act
+            generator_func = await stream_response_from_wealth_assistant("q", "1")
+            items = [item async for item in generator_func()]
+
+        # Assert
+        statuses = [item.status for item in items[:-1]]
+        assert statuses[0] == "started"
+        assert "running" in statuses
+        assert statuses[-1] == "completed"
+        assert items[-1] == "Answer"
+
+    @pytest.mark.asyncio
+    async def test_stream_response_cancels_agent_run_when_abandoned(self):
+        """Test that closing the stream mid-run cancels the Foundry run and deletes the thread."""
+        # Arrange
+        mock_agent = MagicMock()
+
+        async def mock_stream():
+            chunk = MagicMock()
+            chunk.content = "Partial"
+            chunk.thread = mock_thread
+            yield chunk
+            await asyncio.sleep(10)
+
+        mock_thread = MagicMock()
+        mock_thread.id = "thread-1"
+        mock_thread.delete = AsyncMock()
+        mock_agent.invoke_stream = MagicMock(return_value=mock_stream())
+        mock_current_app = MagicMock()
+        mock_current_app.wealth_advisor_agent = mock_agent
+        mock_config = MagicMock()
+        mock_config.STREAM_TEXT_SYSTEM_PROMPT = ""
+
+        with patch(
+            "backend.services.chat_service.current_app", mock_current_app
+        ), patch(
+            "backend.services.chat_service.get_client_name_from_db",
+            return_value="Test Client",
+        ), patch(
+            "backend.services.chat_service.config", mock_config
+        ), patch(
+            "backend.services.chat_service.AzureAIAgentThread", return_value=mock_thread
+        ), patch(
+            "backend.services.chat_service.cancel_active_runs", new_callable=AsyncMock
+        ) as mock_cancel_active_runs:
+            # Act
+            generator_func = await stream_response_from_wealth_assistant("q", "1")
+            stream = generator_func()
+            assert await stream.__anext__() == "Partial"
+            await stream.aclose()
+
+        # Assert
+        mock_cancel_active_runs.assert_awaited_once_with(mock_agent.client.agents, "thread-1")
+        mock_thread.delete.assert_awaited_once()
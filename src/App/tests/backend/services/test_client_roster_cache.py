@@ -0,0 +1,82 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+
+from backend.services.client_roster_cache import ClientRosterCache
+
+USERS = [{"ClientId": 1, "ClientName": "Client A"}, {"ClientId": 2, "ClientName": "Client B"}]
+
+
+@pytest.mark.asyncio
+async def test_get_caches_roster_within_ttl():
+    loader = AsyncMock(return_value=USERS)
+    cache = ClientRosterCache(loader, ttl=60)
+
+    first = await cache.get()
+    second = await cache.get()
+
+    assert first == second
+    assert first[0] == USERS
+    assert first[1] == ClientRosterCache.compute_etag(USERS)
+    loader.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_load():
+    started = asyncio.Event()
+    release = asyncio.Event()
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        started.set()
+        await release.wait()
+        return USERS
+
+    cache = ClientRosterCache(loader, ttl=60)
+    waiters = [asyncio.create_task(cache.get()) for _ in range(5)]
+    await started.wait()
+    release.set()
+    results = await asyncio.gather(*waiters)
+
+    assert len(calls) == 1
+    assert all(users == USERS for users, _ in results)
+
+
+@pytest.mark.asyncio
+async def test_zero_ttl_always_reloads():
+    loader = AsyncMock(return_value=USERS)
+    cache = ClientRosterCache(loader, ttl=0)
+
+    await cache.get()
+    await cache.get()
+
+    assert loader.await_count == 2
+    assert cache.get_client_name(1) is None
+
+
+@pytest.mark.asyncio
+async def test_invalidate_forces_reload_and_clears_names():
+    loader = AsyncMock(return_value=USERS)
+    cache = ClientRosterCache(loader, ttl=60)
+    await cache.get()
+    assert cache.get_client_name(2) == "Client B"
+
+    cache.invalidate()
+
+    assert cache.get_client_name(2) is None
+    await cache.get()
+    assert loader.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_loader_errors_are_not_cached():
+    loader = AsyncMock(side_effect=[Exception("SQL down"), USERS])
+    cache = ClientRosterCache(loader, ttl=60)
+
+    with pytest.raises(Exception, match="SQL down"):
+        await cache.get()
+    users, _ = await cache.get()
+
+    assert users == USERS
@@ -182,3 +182,31 @@ async def test_get_messages(cosmos_client):
     )
     response = await cosmos_client.get_messages("user_1", "conv_1")
     assert len(response) == 2
+
+
+@pytest.mark.asyncio
+async def test_get_health_is_cached_after_success(cosmos_client):
+    cosmos_client.ensure = AsyncMock(return_value=(True, "ok"))
+
+    assert await cosmos_client.get_health() == (True, "ok")
+    assert await cosmos_client.get_health() == (True, "ok")
+
+    cosmos_client.ensure.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_get_health_rechecks_after_failure(cosmos_client):
+    cosmos_client.ensure = AsyncMock(side_effect=[(False, "down"), (True, "ok")])
+
+    assert await cosmos_client.check_health() == (False, "down")
+    assert await cosmos_client.get_health() == (True, "ok")
+    assert cosmos_client.ensure.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_close(cosmos_client):
+    cosmos_client.cosmosdb_client = AsyncMock()
+
+    await cosmos_client.close()
+
+    cosmos_client.cosmosdb_client.close.assert_awaited_once()
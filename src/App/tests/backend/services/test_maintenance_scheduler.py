@@ -0,0 +1,60 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+
+from backend.services.maintenance_scheduler import MaintenanceScheduler
+
+
+@pytest.mark.asyncio
+async def test_job_runs_on_start_and_on_interval():
+    func = AsyncMock()
+    scheduler = MaintenanceScheduler()
+    scheduler.add_job("roll", func, interval=0.02)
+
+    scheduler.start()
+    await asyncio.sleep(0.07)
+    await scheduler.stop()
+
+    assert func.await_count >= 2
+    assert scheduler.jobs["roll"].task is None
+
+
+def test_non_positive_interval_disables_job():
+    scheduler = MaintenanceScheduler()
+
+    job = scheduler.add_job("roll", AsyncMock(), interval=0)
+
+    assert job is None
+    assert scheduler.jobs == {}
+
+
+@pytest.mark.asyncio
+async def test_overlapping_runs_are_skipped():
+    release = asyncio.Event()
+
+    async def slow_job():
+        await release.wait()
+
+    scheduler = MaintenanceScheduler()
+    scheduler.add_job("roll", slow_job, interval=60, run_on_start=False)
+
+    first = asyncio.create_task(scheduler.run_now("roll"))
+    await asyncio.sleep(0)
+    skipped = await scheduler.run_now("roll")
+    release.set()
+
+    assert skipped is False
+    assert await first is True
+
+
+@pytest.mark.asyncio
+async def test_job_failure_is_recorded_and_does_not_raise():
+    scheduler = MaintenanceScheduler()
+    job = scheduler.add_job(
+        "roll", AsyncMock(side_effect=Exception("deadlock")), interval=60
+    )
+
+    assert await scheduler.run_now("roll") is True
+    assert job.last_error == "deadlock"
+    assert job.last_run is not None
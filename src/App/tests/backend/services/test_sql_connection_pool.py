@@ -0,0 +1,189 @@
+import asyncio
+import time
+from unittest.mock import MagicMock
+
+import pyodbc
+import pytest
+
+from backend.services.sql_connection_pool import SQLConnectionPool
+
+
+def make_connect(expires_in=3600):
+    """Return a connect callable that hands out fresh mock connections."""
+    connections = []
+
+    def connect():
+        conn = MagicMock()
+        connections.append(conn)
+        expires_on = time.time() + expires_in if expires_in is not None else None
+        return conn, expires_on
+
+    connect.connections = connections
+    return connect
+
+
+@pytest.mark.asyncio
+async def test_connection_is_reused():
+    connect = make_connect()
+    pool = SQLConnectionPool(connect, min_size=0, max_size=2)
+
+    async with pool.connection() as first:
+        pass
+    async with pool.connection() as second:
+        pass
+
+    assert first is second
+    assert len(connect.connections) == 1
+    assert pool.size == 1
+    await pool.close()
+    first.close.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_start_warms_min_size():
+    connect = make_connect()
+    pool = SQLConnectionPool(connect, min_size=2, max_size=4)
+
+    await pool.start()
+
+    assert pool.size == 2
+    assert pool.idle_count == 2
+    await pool.close()
+    assert pool.size == 0
+
+
+@pytest.mark.asyncio
+async def test_acquire_waits_when_pool_is_full():
+    connect = make_connect()
+    pool = SQLConnectionPool(connect, min_size=0, max_size=1, acquire_timeout=5)
+
+    held = await pool.acquire()
+    waiter = asyncio.create_task(pool.acquire())
+    await asyncio.sleep(0.05)
+    assert not waiter.done()
+
+    await pool.release(held)
+    reused = await asyncio.wait_for(waiter, 1)
+
+    assert reused is held
+    assert len(connect.connections) == 1
+    await pool.release(reused)
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_acquire_times_out():
+    pool = SQLConnectionPool(make_connect(), min_size=0, max_size=1, acquire_timeout=0.05)
+    held = await pool.acquire()
+
+    with pytest.raises(TimeoutError):
+        await pool.acquire()
+
+    await pool.release(held)
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_connection_recycled_before_token_expiry():
+    # Token expires inside the refresh margin, so the connection is never reused
+    connect = make_connect(expires_in=60)
+    pool = SQLConnectionPool(connect, min_size=0, max_size=2, token_refresh_margin=300)
+
+    async with pool.connection():
+        pass
+    async with pool.connection():
+        pass
+
+    assert len(connect.connections) == 2
+    connect.connections[0].close.assert_called_once()
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_connection_discarded_after_pyodbc_error():
+    connect = make_connect()
+    pool = SQLConnectionPool(connect, min_size=0, max_size=2)
+
+    with pytest.raises(pyodbc.Error):
+        async with pool.connection():
+            raise pyodbc.Error("connection broken")
+
+    assert pool.size == 0
+    connect.connections[0].close.assert_called_once()
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_connection_rolled_back_before_reuse():
+    connect = make_connect()
+    pool = SQLConnectionPool(connect, min_size=0, max_size=1)
+
+    async with pool.connection() as conn:
+        conn.rollback.assert_not_called()
+
+    conn.rollback.assert_called_once()
+    assert pool.idle_count == 1
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_connection_discarded_when_rollback_fails():
+    connect = make_connect()
+    pool = SQLConnectionPool(connect, min_size=0, max_size=1)
+
+    async with pool.connection() as conn:
+        conn.rollback.side_effect = pyodbc.Error("transaction state unknown")
+
+    assert pool.size == 0
+    conn.close.assert_called_once()
+    async with pool.connection() as fresh:
+        assert fresh is not conn
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_connections_closed_off_the_event_loop():
+    connect = make_connect()
+    ran = []
+
+    async def run_blocking(fn):
+        ran.append(fn)
+        return fn()
+
+    pool = SQLConnectionPool(connect, min_size=0, max_size=1, run_blocking=run_blocking)
+    async with pool.connection() as conn:
+        pass
+
+    await pool.close()
+
+    conn.close.assert_called_once()
+    # connect, rollback on release, then the close at shutdown
+    assert len(ran) == 3
+
+
+@pytest.mark.asyncio
+async def test_evict_idle_closes_stale_connections():
+    connect = make_connect()
+    pool = SQLConnectionPool(connect, min_size=0, max_size=2, idle_timeout=0.01)
+
+    async with pool.connection():
+        pass
+    await asyncio.sleep(0.05)
+    await pool.evict_idle()
+
+    assert pool.size == 0
+    connect.connections[0].close.assert_called_once()
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_open_retries_with_async_backoff():
+    conn = MagicMock()
+    connect = MagicMock(side_effect=[pyodbc.Error("transient"), (conn, None)])
+    pool = SQLConnectionPool(connect, min_size=0, max_size=1, retry_delay=0.01)
+
+    async with pool.connection() as borrowed:
+        assert borrowed is conn
+
+    assert connect.call_count == 2
+    await pool.close()
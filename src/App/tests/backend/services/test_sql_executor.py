@@ -0,0 +1,83 @@
+import asyncio
+import threading
+
+import pytest
+
+from backend.services.sql_executor import SQLExecutor
+
+
+@pytest.mark.asyncio
+async def test_run_returns_result_off_event_loop():
+    executor = SQLExecutor(max_workers=2)
+    loop_thread = threading.current_thread()
+
+    def work(a, b=0):
+        return threading.current_thread(), a + b
+
+    thread, result = await executor.run(work, 1, b=2)
+
+    assert result == 3
+    assert thread is not loop_thread
+    assert thread.name.startswith("sqldb")
+    stats = executor.stats()
+    assert stats["completed"] == 1
+    assert stats["failed"] == 0
+    assert stats["queue_depth"] == 0
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_run_propagates_exceptions_and_counts_failures():
+    executor = SQLExecutor(max_workers=1)
+
+    def boom():
+        raise ValueError("bad query")
+
+    with pytest.raises(ValueError, match="bad query"):
+        await executor.run(boom)
+
+    assert executor.stats()["failed"] == 1
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_stats_report_queue_depth_when_saturated():
+    executor = SQLExecutor(max_workers=1)
+    release = threading.Event()
+
+    first = asyncio.create_task(executor.run(release.wait, 5))
+    second = asyncio.create_task(executor.run(lambda: "done"))
+    await asyncio.sleep(0.05)
+
+    stats = executor.stats()
+    assert stats["running"] == 1
+    assert stats["queue_depth"] == 1
+
+    release.set()
+    assert await second == "done"
+    await first
+    stats = executor.stats()
+    assert stats["queue_depth"] == 0
+    assert stats["max_wait_ms"] > 0
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_cancelled_queued_call_never_runs():
+    executor = SQLExecutor(max_workers=1)
+    release = threading.Event()
+    ran = []
+
+    blocker = asyncio.create_task(executor.run(release.wait, 5))
+    queued = asyncio.create_task(executor.run(ran.append, "queued"))
+    await asyncio.sleep(0.05)
+
+    queued.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await queued
+    release.set()
+    await blocker
+
+    assert ran == []
+    assert executor.stats()["queue_depth"] == 0
+    executor.shutdown()
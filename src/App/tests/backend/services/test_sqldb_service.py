@@ -1,7 +1,11 @@
+import asyncio
 import struct
-from unittest.mock import MagicMock, patch
+import threading
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pyodbc
+import pytest
 
 import backend.services.sqldb_service as sql_db
 
@@ -14,23 +18,36 @@ sql_db.driver = "mock_driver"
 sql_db.mid_id = "mock_mid_id"  # Managed identity client ID if needed
 
 
+def pooled(mock_conn=None, error=None):
+    """Build a stand-in for sqldb_service.pooled_connection yielding mock_conn."""
+
+    @asynccontextmanager
+    async def _pooled_connection():
+        if error:
+            raise error
+        yield mock_conn
+
+    return lambda: _pooled_connection()
+
+
 @patch("backend.services.sqldb_service.pyodbc.connect")  # Mock pyodbc.connect
 @patch(
     "backend.services.sqldb_service.get_azure_credential"
 )  # Mock AzureCliCredential
-def test_get_connection(mock_credential_class, mock_connect):
+def test_open_connection(mock_credential_class, mock_connect):
     # Mock the AzureCliCredential and get_token method
     mock_credential = MagicMock()
     mock_credential_class.return_value = mock_credential
     mock_token = MagicMock()
     mock_token.token = "mock_token"
     mock_credential.get_token.return_value = mock_token
+    mock_token.expires_on = 1700000000
     # Create a mock connection object
     mock_conn = MagicMock()
     mock_connect.return_value = mock_conn
 
     # Call the function
-    conn = sql_db.get_connection()
+    conn, expires_on = sql_db.open_connection()
 
     # Assert that AzureCliCredential and get_token were called correctly
     mock_credential_class.assert_called_once_with(
@@ -55,13 +72,14 @@ def test_get_connection(mock_credential_class, mock_connect):
 
     # Assert that the connection returned is the mock connection
     assert conn == mock_conn
+    assert expires_on == 1700000000
 
 
 @patch("backend.services.sqldb_service.pyodbc.connect")  # Mock pyodbc.connect
 @patch(
     "backend.services.sqldb_service.get_azure_credential"
 )  # Mock AzureCliCredential
-def test_get_connection_token_failure(mock_credential_class, mock_connect):
+def test_open_connection_token_failure(mock_credential_class, mock_connect):
     # Mock the AzureCliCredential and get_token method
     mock_credential = MagicMock()
     mock_credential_class.return_value = mock_credential
@@ -77,7 +95,7 @@ def test_get_connection_token_failure(mock_credential_class, mock_connect):
     mock_connect.side_effect = [pyodbc.Error("pyodbc connection error"), mock_conn]
 
     # Call the function and ensure fallback is used after the pyodbc error
-    conn = sql_db.get_connection()
+    conn, expires_on = sql_db.open_connection()
 
     # Assert that pyodbc.connect was called with username and password as fallback
     mock_connect.assert_any_call(
@@ -87,6 +105,7 @@ def test_get_connection_token_failure(mock_credential_class, mock_connect):
 
     # Assert that the connection returned is the mock connection
     assert conn == mock_conn
+    assert expires_on is None
 
 
 def test_dict_cursor():
@@ -108,82 +127,105 @@ def test_dict_cursor():
     assert result == expected_result
 
 
-@patch.object(sql_db, "get_connection")
-def test_get_client_name_from_db_success(mock_get_connection):
+@pytest.mark.asyncio
+@patch.object(sql_db, "pooled_connection")
+async def test_get_client_name_from_db_success(mock_pooled_connection):
     """Test successful retrieval of client name."""
     # Setup mocks
     mock_conn = MagicMock()
     mock_cursor = MagicMock()
     mock_conn.cursor.return_value = mock_cursor
     mock_cursor.fetchone.return_value = ("John Doe",)
-    mock_get_connection.return_value = mock_conn
+    mock_pooled_connection.side_effect = pooled(mock_conn)
 
     # Call the function
-    result = sql_db.get_client_name_from_db("client123")
+    result = await sql_db.get_client_name_from_db("client123")
 
     # Verify the result
     assert result == "John Doe"
 
     # Verify the function calls
-    mock_get_connection.assert_called_once()
+    mock_pooled_connection.assert_called_once()
     mock_conn.cursor.assert_called_once()
     mock_cursor.execute.assert_called_once_with(
         "SELECT Client FROM Clients WHERE ClientId = ?", ("client123",)
     )
     mock_cursor.fetchone.assert_called_once()
-    mock_conn.close.assert_called_once()
+    mock_conn.close.assert_not_called()  # Connection is returned to the pool
 
 
-@patch.object(sql_db, "get_connection")
-def test_get_client_name_from_db_not_found(mock_get_connection):
+@pytest.mark.asyncio
+@patch.object(sql_db, "pooled_connection")
+async def test_get_client_name_from_db_not_found(mock_pooled_connection):
     """Test when client is not found."""
     # Setup mocks
     mock_conn = MagicMock()
     mock_cursor = MagicMock()
     mock_conn.cursor.return_value = mock_cursor
     mock_cursor.fetchone.return_value = None
-    mock_get_connection.return_value = mock_conn
+    mock_pooled_connection.side_effect = pooled(mock_conn)
 
     # Call the function
-    result = sql_db.get_client_name_from_db("nonexistent_client")
+    result = await sql_db.get_client_name_from_db("nonexistent_client")
 
     # Verify the result
     assert result == ""
 
     # Verify the function calls
-    mock_get_connection.assert_called_once()
+    mock_pooled_connection.assert_called_once()
     mock_cursor.execute.assert_called_once_with(
         "SELECT Client FROM Clients WHERE ClientId = ?", ("nonexistent_client",)
     )
-    mock_conn.close.assert_called_once()
+    mock_conn.close.assert_not_called()  # Connection is returned to the pool
+
+
+@pytest.mark.asyncio
+@patch.object(sql_db, "pooled_connection")
+async def test_get_client_name_from_db_uses_roster_cache(mock_pooled_connection):
+    """Test that a warm roster cache answers name lookups without SQL."""
+    # Setup mocks
+    cache = sql_db.ClientRosterCache(
+        AsyncMock(return_value=[{"ClientId": 7, "ClientName": "Jane Roe"}]), ttl=60
+    )
+    await cache.get()
+
+    # Call the function
+    with patch.object(sql_db, "_roster_cache", cache):
+        result = await sql_db.get_client_name_from_db("7")
+
+    # Verify the result
+    assert result == "Jane Roe"
+    mock_pooled_connection.assert_not_called()
 
 
-@patch.object(sql_db, "get_connection")
-def test_get_client_name_from_db_exception(mock_get_connection):
+@pytest.mark.asyncio
+@patch.object(sql_db, "pooled_connection")
+async def test_get_client_name_from_db_exception(mock_pooled_connection):
     """Test exception handling during database operation."""
     # Setup mocks
-    mock_get_connection.side_effect = Exception("Database connection failed")
+    mock_pooled_connection.side_effect = pooled(error=Exception("Database connection failed"))
 
     # Call the function and expect exception to be raised
     try:
-        sql_db.get_client_name_from_db("client123")
+        await sql_db.get_client_name_from_db("client123")
         assert False, "Expected exception was not raised"
     except Exception as e:
         assert str(e) == "Database connection failed"
 
 
+@pytest.mark.asyncio
 @patch.object(sql_db, "update_sample_data")
 @patch.object(sql_db, "dict_cursor")
-@patch.object(sql_db, "get_connection")
-def test_get_client_data_success_no_update_needed(
-    mock_get_connection, mock_dict_cursor, mock_update_sample_data
+@patch.object(sql_db, "pooled_connection")
+async def test_get_client_data_success_no_update_needed(
+    mock_pooled_connection, mock_dict_cursor, mock_update_sample_data
 ):
     """Test successful retrieval of client data when update is not needed."""
     # Setup mocks
     mock_conn = MagicMock()
     mock_cursor = MagicMock()
     mock_conn.cursor.return_value = mock_cursor
-    mock_get_connection.return_value = mock_conn
+    mock_pooled_connection.side_effect = pooled(mock_conn)
 
     # Mock dict_cursor return with enough records (> 6)
     mock_client_data = [
@@ -221,7 +263,7 @@ def test_get_client_data_success_no_update_needed(
     mock_dict_cursor.return_value = mock_client_data
 
     # Call the function
-    result = sql_db.get_client_data()
+    result = await sql_db.get_client_data()
 
     # Verify the result
     assert len(result) == 7
@@ -231,26 +273,27 @@ def test_get_client_data_success_no_update_needed(
     assert result[0]["AssetValue"] == "100,000"
 
     # Verify function calls
-    mock_get_connection.assert_called_once()
+    mock_pooled_connection.assert_called_once()
     mock_conn.cursor.assert_called_once()
     mock_cursor.execute.assert_called_once()
     mock_dict_cursor.assert_called_once_with(mock_cursor)
     mock_update_sample_data.assert_not_called()  # Should not be called when > 6 records
-    mock_conn.close.assert_called_once()
+    mock_conn.close.assert_not_called()  # Connection is returned to the pool
 
 
+@pytest.mark.asyncio
 @patch.object(sql_db, "update_sample_data")
 @patch.object(sql_db, "dict_cursor")
-@patch.object(sql_db, "get_connection")
-def test_get_client_data_success_with_update(
-    mock_get_connection, mock_dict_cursor, mock_update_sample_data
+@patch.object(sql_db, "pooled_connection")
+async def test_get_client_data_is_read_only_with_few_records(
+    mock_pooled_connection, mock_dict_cursor, mock_update_sample_data
 ):
-    """Test successful retrieval of client data when update is needed."""
+    """Test that a short roster no longer triggers sample data writes."""
     # Setup mocks
     mock_conn = MagicMock()
     mock_cursor = MagicMock()
     mock_conn.cursor.return_value = mock_cursor
-    mock_get_connection.return_value = mock_conn
+    mock_pooled_connection.side_effect = pooled(mock_conn)
 
     # Mock dict_cursor return with few records (<= 6)
     mock_client_data = [
@@ -271,55 +314,164 @@ def test_get_client_data_success_with_update(
     mock_dict_cursor.return_value = mock_client_data
 
     # Call the function
-    result = sql_db.get_client_data()
+    result = await sql_db.get_client_data()
 
     # Verify the result
     assert len(result) == 1
     assert result[0]["ClientName"] == "John Doe"
 
     # Verify function calls
-    mock_get_connection.assert_called_once()
-    mock_update_sample_data.assert_called_once_with(
-        mock_conn
-    )  # Should be called when <= 6 records
-    mock_conn.close.assert_called_once()
+    mock_pooled_connection.assert_called_once()
+    mock_update_sample_data.assert_not_called()  # Left to roll_sample_data_dates
+    mock_conn.close.assert_not_called()  # Connection is returned to the pool
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "lock_result, roster_size, expected_update",
+    [
+        (0, 1, True),  # Lock granted, short roster
+        (0, 7, False),  # Lock granted, dates already current
+        (-1, 1, False),  # Another worker holds the lock
+    ],
+)
+@patch.object(sql_db, "invalidate_client_data_cache")
+@patch.object(sql_db, "_query_client_data")
+@patch.object(sql_db, "update_sample_data")
+@patch.object(sql_db, "pooled_connection")
+async def test_roll_sample_data_dates(
+    mock_pooled_connection,
+    mock_update_sample_data,
+    mock_query_client_data,
+    mock_invalidate,
+    lock_result,
+    roster_size,
+    expected_update,
+):
+    """Test that sample data is rolled forward only under the app lock and when needed."""
+    # Setup mocks
+    mock_conn = MagicMock()
+    mock_cursor = MagicMock()
+    mock_conn.cursor.return_value = mock_cursor
+    mock_cursor.fetchone.return_value = (lock_result,)
+    mock_pooled_connection.side_effect = pooled(mock_conn)
+    mock_query_client_data.return_value = [{}] * roster_size
+
+    # Call the function
+    result = await sql_db.roll_sample_data_dates()
+
+    # Verify the result
+    assert result is expected_update
+    assert mock_update_sample_data.called is expected_update
+    assert mock_invalidate.called is expected_update
+    released = any(
+        "sp_releaseapplock" in call.args[0] for call in mock_cursor.execute.call_args_list
+    )
+    assert released is (lock_result >= 0)
 
 
-@patch.object(sql_db, "get_connection")
-def test_get_client_data_exception_with_finally(mock_get_connection):
+@pytest.mark.asyncio
+@patch.object(sql_db, "pooled_connection")
+async def test_get_client_data_exception_with_finally(mock_pooled_connection):
     """Test exception handling with proper cleanup in finally block."""
     # Setup mocks
     mock_conn = MagicMock()
     mock_cursor = MagicMock()
     mock_conn.cursor.return_value = mock_cursor
     mock_cursor.execute.side_effect = Exception("Database query failed")
-    mock_get_connection.return_value = mock_conn
+    mock_pooled_connection.side_effect = pooled(mock_conn)
 
     # Call the function and expect exception to be raised
     try:
-        sql_db.get_client_data()
+        await sql_db.get_client_data()
         assert False, "Expected exception was not raised"
     except Exception as e:
         assert str(e) == "Database query failed"
 
-    # Verify connection is closed even when exception occurs
-    mock_conn.close.assert_called_once()
+    # The borrowed connection was used and is handed back to the pool
+    mock_conn.cursor.assert_called_once()
+    mock_conn.close.assert_not_called()
 
 
-@patch.object(sql_db, "get_connection")
-def test_get_client_data_exception_no_connection(mock_get_connection):
+@pytest.mark.asyncio
+@patch.object(sql_db, "pooled_connection")
+async def test_get_client_data_exception_no_connection(mock_pooled_connection):
     """Test exception handling when connection fails."""
     # Setup mocks
-    mock_get_connection.side_effect = Exception("Connection failed")
+    mock_pooled_connection.side_effect = pooled(error=Exception("Connection failed"))
 
     # Call the function and expect exception to be raised
     try:
-        sql_db.get_client_data()
+        await sql_db.get_client_data()
         assert False, "Expected exception was not raised"
     except Exception as e:
         assert str(e) == "Connection failed"
 
 
+@pytest.mark.asyncio
+@patch.object(sql_db, "pooled_connection")
+async def test_fetch_all_runs_query_on_sql_executor(mock_pooled_connection):
+    """Test that queries run on the SQL executor's worker threads."""
+    # Setup mocks
+    mock_conn = MagicMock()
+    mock_cursor = MagicMock()
+    mock_conn.cursor.return_value = mock_cursor
+    threads = []
+
+    def fetchall():
+        threads.append(threading.current_thread().name)
+        return [("John Doe",)]
+
+    mock_cursor.fetchall.side_effect = fetchall
+    mock_pooled_connection.side_effect = pooled(mock_conn)
+
+    # Call the function
+    rows = await sql_db.fetch_all("SELECT Client FROM Clients")
+
+    # Verify the result
+    assert rows == [("John Doe",)]
+    assert threads[0].startswith("sqldb")
+    mock_cursor.execute.assert_called_once_with("SELECT Client FROM Clients")
+
+
+@pytest.mark.asyncio
+@patch.object(sql_db, "pooled_connection")
+async def test_fetch_all_cancels_running_statement(mock_pooled_connection):
+    """Test that cancelling the caller cancels the statement and waits for the worker."""
+    # Setup mocks
+    mock_conn = MagicMock()
+    mock_cursor = MagicMock()
+    mock_conn.cursor.return_value = mock_cursor
+    started = threading.Event()
+    statement_cancelled = threading.Event()
+
+    def execute(sql_query):
+        started.set()
+        # Block like a long-running query until SQLCancel is issued
+        statement_cancelled.wait(5)
+        raise RuntimeError("Operation canceled")
+
+    mock_cursor.execute.side_effect = execute
+    mock_cursor.cancel.side_effect = statement_cancelled.set
+    mock_pooled_connection.side_effect = pooled(mock_conn)
+
+    # Call the function and cancel it mid-query
+    task = asyncio.create_task(sql_db.fetch_all("SELECT * FROM Assets"))
+    while not started.is_set():
+        await asyncio.sleep(0.01)
+    task.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    # Verify the statement was cancelled and the cursor closed before returning
+    mock_cursor.cancel.assert_called_once()
+    mock_cursor.close.assert_called_once()
+    calls = [name for name, _, _ in mock_cursor.mock_calls if name in ("cancel", "close")]
+    assert calls == ["cancel", "close"]
+    assert sql_db.get_stats()["executor"]["completed"] >= 1
+
+
 @patch.object(sql_db, "dict_cursor")
 def test_update_sample_data_all_updates_needed(mock_dict_cursor):
     """Test update_sample_data when all tables need updates."""
@@ -415,29 +567,3 @@ def test_update_sample_data_exception_handling(mock_dict_cursor):
         assert False, "Expected exception was not raised"
     except Exception as e:
         assert str(e) == "Update query failed"
-    """Test suite for get_client_name_from_db function."""
-
-    @patch.object(sql_db, "get_connection")
-    def test_get_client_name_from_db_success(self, mock_get_connection):
-        """Test successful retrieval of client name."""
-        # Setup mocks
-        mock_conn = MagicMock()
-        mock_cursor = MagicMock()
-        mock_conn.cursor.return_value = mock_cursor
-        mock_cursor.fetchone.return_value = ("John Doe",)
-        mock_get_connection.return_value = mock_conn
-
-        # Call the function
-        result = sql_db.get_client_name_from_db("client123")
-
-        # Verify the result
-        assert result == "John Doe"
-
-        # Verify the function calls
-        mock_get_connection.assert_called_once()
-        mock_conn.cursor.assert_called_once()
-        mock_cursor.execute.assert_called_once_with(
-            "SELECT Client FROM Clients WHERE ClientId = ?", ("client123",)
-        )
-        mock_cursor.fetchone.assert_called_once()
-        mock_conn.close.assert_called_once()
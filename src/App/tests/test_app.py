@@ -1,18 +1,25 @@
 import asyncio
 import json
+import os
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from app import (
+    build_data_source_template,
     create_app,
     delete_all_conversations,
     generate_title,
+    get_configured_data_source,
     init_cosmosdb_client,
     init_ai_projects_client,
     stream_chat_request,
 )
 from quart import Response
 
+from backend.agents.tool_progress import ToolProgress, tool_label
+from backend.plugins.chat_with_data_plugin import ChatWithDataPlugin
+from backend.services import sqldb_service
+
 # Constants for testing
 INVALID_API_VERSION = "2022-01-01"
 INVALID_API_KEY = None
@@ -61,6 +68,12 @@ def set_env_vars():
         yield
 
 
+@pytest.fixture(autouse=True)
+def reset_roster_cache():
+    with patch.object(sqldb_service, "_roster_cache", None):
+        yield
+
+
 @pytest.fixture
 def app():
     """Create a test client for the app."""
@@ -80,16 +93,36 @@ def test_create_app():
     assert "routes" in app.blueprints
 
 
-@patch("app.AIProjectClient")
-def test_init_ai_projects_client(mock_ai_projects_client):
-    mock_project_instance = MagicMock()
+@pytest.mark.asyncio
+@patch("app.OpenAIClientRegistry")
+async def test_init_ai_projects_client(mock_registry_class):
+    mock_registry = MagicMock()
     mock_openai_client = MagicMock()
-    mock_project_instance.inference.get_azure_openai_client.return_value = mock_openai_client
-    mock_ai_projects_client.return_value = mock_project_instance
+    mock_registry.get_client = AsyncMock(return_value=mock_openai_client)
+    mock_registry_class.return_value = mock_registry
+
+    async with create_app().app_context():
+        client = await init_ai_projects_client()
+        # The registry is created once and reused for subsequent calls
+        second_client = await init_ai_projects_client()
+
+    assert client is mock_openai_client
+    assert second_client is mock_openai_client
+    mock_registry_class.assert_called_once()
+    mock_registry.get_client.assert_awaited_with(
+        "https://test-ai-project.com/", "2024-02-15-preview"
+    )
 
-    client = init_ai_projects_client()
-    assert client is not None
-    mock_ai_projects_client.assert_called_once()
+
+@pytest.mark.asyncio
+async def test_init_ai_projects_client_invalid_api_version():
+    with patch(
+        "backend.common.config.config.AZURE_OPENAI_PREVIEW_API_VERSION",
+        INVALID_API_VERSION,
+    ):
+        async with create_app().app_context():
+            with pytest.raises(Exception, match="minimum supported"):
+                await init_ai_projects_client()
 
 
 @patch("app.CosmosConversationClient")
@@ -143,21 +176,22 @@ async def test_ensure_cosmos_not_configured(client):
 @patch("app.init_cosmosdb_client")
 async def test_ensure_cosmos_success(mock_init_cosmosdb_client, client):
     mock_client = AsyncMock()
-    mock_client.ensure.return_value = (True, None)
+    mock_client.get_health.return_value = (True, None)
     mock_init_cosmosdb_client.return_value = mock_client
 
     response = await client.get("/history/ensure")
     res_text = await response.get_data(as_text=True)
     assert response.status_code == 200
     assert json.loads(res_text) == {"message": "CosmosDB is configured and working"}
-    mock_client.cosmosdb_client.close.assert_called_once()
+    mock_client.ensure.assert_not_called()
+    mock_client.cosmosdb_client.close.assert_not_called()
 
 
 @pytest.mark.asyncio
 @patch("app.init_cosmosdb_client")
 async def test_ensure_cosmos_failure(mock_init_cosmosdb_client, client):
     mock_client = AsyncMock()
-    mock_client.ensure.return_value = (False, "Some error")
+    mock_client.get_health.return_value = (False, "Some error")
     mock_init_cosmosdb_client.return_value = mock_client
 
     response = await client.get("/history/ensure")
@@ -288,6 +322,88 @@ async def test_get_users_sql_execution_failure(mock_get_client_data, client):
     assert "SQL execution failed" in res_text
 
 
+@pytest.mark.asyncio
+@patch("backend.services.sqldb_service.get_client_data")
+async def test_get_users_served_from_cache_with_etag(mock_get_client_data, client):
+    mock_get_client_data.return_value = [{"ClientId": 1, "ClientName": "Client A"}]
+
+    first = await client.get("/api/users")
+    etag = first.headers["ETag"]
+    second = await client.get("/api/users")
+    not_modified = await client.get("/api/users", headers={"If-None-Match": etag})
+
+    assert first.status_code == 200
+    assert second.status_code == 200
+    assert await second.get_json() == [{"ClientId": 1, "ClientName": "Client A"}]
+    assert not_modified.status_code == 304
+    assert not_modified.headers["ETag"] == etag
+    mock_get_client_data.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+@patch("app.get_authenticated_user_details")
+@patch("backend.services.sqldb_service.get_client_data")
+async def test_invalidate_users_cache(
+    mock_get_client_data, mock_get_authenticated_user_details, client
+):
+    mock_get_client_data.return_value = []
+    mock_get_authenticated_user_details.return_value = {"user_principal_id": "admin1"}
+    await client.get("/api/users")
+
+    with patch("backend.common.config.config.ADMIN_PRINCIPAL_IDS", ["admin1"]):
+        response = await client.post("/api/admin/users/cache/invalidate")
+    await client.get("/api/users")
+
+    assert response.status_code == 200
+    assert (await response.get_json())["worker"]["pid"] == os.getpid()
+    assert mock_get_client_data.await_count == 2
+
+
+@pytest.mark.asyncio
+@patch("app.get_authenticated_user_details")
+async def test_invalidate_users_cache_forbidden(
+    mock_get_authenticated_user_details, client
+):
+    mock_get_authenticated_user_details.return_value = {"user_principal_id": "user1"}
+
+    with patch("backend.common.config.config.ADMIN_PRINCIPAL_IDS", ["admin1"]):
+        response = await client.post("/api/admin/users/cache/invalidate")
+
+    assert response.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_metrics_disabled(client):
+    with patch("backend.common.config.config.METRICS_ENDPOINT_ENABLED", False):
+        response = await client.get("/metrics")
+
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+@patch("app.sqldb_service.get_stats")
+@patch("app.stage_histograms")
+async def test_metrics_enabled(mock_histograms, mock_get_stats, client):
+    mock_histograms.render_prometheus.return_value = "chat_stage_duration_seconds_count 1\n"
+    mock_get_stats.return_value = {
+        "executor": {"queue_depth": 3, "avg_wait_ms": 1.5},
+        "pool": {"size": 4, "idle": 1, "max_size": 10},
+    }
+
+    with patch("backend.common.config.config.METRICS_ENDPOINT_ENABLED", True):
+        response = await client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.content_type.startswith("text/plain")
+    lines = (await response.get_data(as_text=True)).splitlines()
+    assert lines[0] == "chat_stage_duration_seconds_count 1"
+    assert "# TYPE sql_executor_queue_depth gauge" in lines
+    assert "sql_executor_queue_depth 3" in lines
+    assert "sql_executor_avg_wait_ms 1.5" in lines
+    assert "sql_pool_idle 1" in lines
+    assert "sql_pool_max_size 10" in lines
+
+
 @pytest.fixture
 def mock_request_headers():
     return {"Authorization": "Bearer test_token"}
@@ -454,7 +570,7 @@ async def test_delete_all_conversations_success(
     mock_cosmos_conversation_client.delete_conversation.assert_any_await(
         "test_user_id", "conv2"
     )
-    mock_cosmos_conversation_client.cosmosdb_client.close.assert_awaited_once()
+    mock_cosmos_conversation_client.cosmosdb_client.close.assert_not_awaited()
 
 
 @patch("app.get_authenticated_user_details")
@@ -551,7 +667,7 @@ async def test_rename_conversation(
     mock_cosmos_conversation_client.upsert_conversation.assert_called_once_with(
         {"id": "123", "title": "New Title"}
     )
-    mock_cosmos_conversation_client.cosmosdb_client.close.assert_called_once()
+    mock_cosmos_conversation_client.cosmosdb_client.close.assert_not_called()
 
 
 @pytest.mark.asyncio
@@ -734,6 +850,26 @@ async def test_list_conversations_success(
     assert await response.get_json() == [{"id": "1"}, {"id": "2"}]
 
 
+@pytest.mark.asyncio
+@patch("app.init_cosmosdb_client")
+@patch("app.get_authenticated_user_details")
+async def test_history_routes_reuse_cosmos_client(
+    mock_get_user_details, mock_init_cosmosdb_client, client
+):
+    mock_get_user_details.return_value = {"user_principal_id": "test_user"}
+    mock_cosmos_client = AsyncMock()
+    mock_cosmos_client.get_conversations.return_value = [{"id": "1"}]
+    mock_init_cosmosdb_client.return_value = mock_cosmos_client
+
+    for _ in range(3):
+        response = await client.get("/history/list")
+        assert response.status_code == 200
+
+    mock_init_cosmosdb_client.assert_called_once()
+    assert mock_cosmos_client.get_conversations.await_count == 3
+    mock_cosmos_client.cosmosdb_client.close.assert_not_called()
+
+
 @pytest.mark.asyncio
 @patch("app.init_cosmosdb_client")
 @patch("app.get_authenticated_user_details")
@@ -817,7 +953,7 @@ async def test_delete_conversation_success(
     }
     mock_cosmos_client.delete_messages.assert_called_once_with("12345", "user123")
     mock_cosmos_client.delete_conversation.assert_called_once_with("user123", "12345")
-    mock_cosmos_client.cosmosdb_client.close.assert_called_once()
+    mock_cosmos_client.cosmosdb_client.close.assert_not_called()
 
 
 @pytest.mark.asyncio
@@ -1182,7 +1318,7 @@ async def test_add_conversation_conversation_not_found(
 
 
 @pytest.mark.asyncio
-@patch("app.init_ai_projects_client")
+@patch("app.init_ai_projects_client", new_callable=AsyncMock)
 async def test_generate_title_success(mock_init_ai_projects_client):
     mock_openai_client = AsyncMock()
     mock_openai_client.chat.completions.create.return_value = MagicMock(
@@ -1198,7 +1334,7 @@ async def test_generate_title_success(mock_init_ai_projects_client):
 
 
 @pytest.mark.asyncio
-@patch("app.init_ai_projects_client")
+@patch("app.init_ai_projects_client", new_callable=AsyncMock)
 async def test_generate_title_exception(mock_init_ai_projects_client):
     mock_openai_client = AsyncMock()
     mock_openai_client.chat.completions.create.side_effect = Exception("API error")
@@ -1310,19 +1446,13 @@ class MockChatCompletionChunk:
         self.choices = choices
 
 
-# Mock chunk object with content attribute
-class MockStreamChunk:
-    def __init__(self, content):
-        self.content = content
-
-
 # Simulated async generator for testing purposes
 async def fake_internal_stream_response():
-    # Simulating streaming data chunk by chunk
+    # Simulating streaming data chunk by chunk, as delta text like chat_service
     chunks = ["chunk1", "chunk2"]
     for chunk in chunks:
         await asyncio.sleep(0.1)
-        yield MockStreamChunk(chunk)
+        yield chunk
 
 
 @pytest.mark.asyncio
@@ -1431,3 +1561,211 @@ async def test_stream_chat_request_without_azurefunction():
 
             assert len(chunks) == 2
             assert "apim-request-id" in chunks[0]
+
+
+@pytest.fixture
+def search_config():
+    with patch("app.DATASOURCE_TYPE", "AzureCognitiveSearch", create=True), patch(
+        "backend.common.config.config.AZURE_SEARCH_SERVICE", "search"
+    ), patch("backend.common.config.config.AZURE_SEARCH_INDEX", "index"), patch(
+        "backend.common.config.config.AZURE_SEARCH_QUERY_TYPE", "simple"
+    ), patch(
+        "backend.common.config.config.AZURE_SEARCH_KEY", "search-key"
+    ), patch(
+        "backend.common.config.config.AZURE_SEARCH_CONTENT_COLUMNS", "content|title"
+    ), patch(
+        "backend.common.config.config.AZURE_SEARCH_TOP_K", "5"
+    ), patch(
+        "backend.common.config.config.AZURE_SEARCH_STRICTNESS", "3"
+    ):
+        yield
+
+
+def test_build_data_source_template(search_config):
+    template = build_data_source_template()
+
+    parameters = template["parameters"]
+    assert template["type"] == "azure_search"
+    assert parameters["endpoint"] == "https://search.search.windows.net"
+    assert parameters["fields_mapping"]["content_fields"] == ("content", "title")
+    assert parameters["filter"] is None
+    with pytest.raises(TypeError):
+        parameters["filter"] = "changed"
+
+
+def test_build_data_source_template_is_deeply_read_only(search_config):
+    template = build_data_source_template()
+
+    fields_mapping = template["parameters"]["fields_mapping"]
+    with pytest.raises(TypeError):
+        fields_mapping["title_field"] = "changed"
+    with pytest.raises(TypeError):
+        template["parameters"]["authentication"]["type"] = "api_key"
+    with pytest.raises(AttributeError):
+        fields_mapping["content_fields"].append("changed")
+
+
+def test_build_data_source_template_rejects_vector_without_embedding(search_config):
+    with patch(
+        "backend.common.config.config.AZURE_SEARCH_QUERY_TYPE", "vector"
+    ), patch("backend.common.config.config.AZURE_OPENAI_EMBEDDING_NAME", ""), patch(
+        "backend.common.config.config.AZURE_OPENAI_EMBEDDING_ENDPOINT", ""
+    ):
+        with pytest.raises(Exception, match="no embedding dependency is configured"):
+            build_data_source_template()
+
+
+@pytest.mark.asyncio
+async def test_get_configured_data_source_patches_user_filter(app, search_config):
+    with patch(
+        "backend.common.config.config.AZURE_SEARCH_PERMITTED_GROUPS_COLUMN", "groups"
+    ), patch(
+        "app.generateFilterString", new_callable=AsyncMock, return_value="group-filter"
+    ):
+        async with app.test_request_context(
+            "/conversation", headers={"X-MS-TOKEN-AAD-ACCESS-TOKEN": "token"}
+        ):
+            first = await get_configured_data_source()
+            first["parameters"]["fields_mapping"]["content_fields"].append("changed")
+            second = await get_configured_data_source()
+
+        template = app.data_source_template
+
+    assert first["parameters"]["filter"] == "group-filter"
+    assert second["parameters"]["fields_mapping"]["content_fields"] == ["content", "title"]
+    assert template["parameters"]["filter"] is None
+    # Sent as JSON in the request body
+    assert json.loads(json.dumps(second)) == second
+
+
+@pytest.mark.asyncio
+async def test_stream_chat_request_with_event_stream_and_resume(app, client):
+    request_body = {
+        "history_metadata": {},
+        "client_id": "test_client",
+        "messages": [{"content": "test query", "role": "user"}],
+    }
+    request_headers = {"apim-request-id": "test_id", "Accept": "text/event-stream"}
+
+    with patch(
+        "app.stream_response_from_wealth_assistant",
+        return_value=fake_internal_stream_response,
+    ) as mock_stream, patch("backend.common.config.config.USE_INTERNAL_STREAM", True):
+        async with app.app_context():
+            response = await stream_chat_request(request_body, request_headers)
+            assert response.mimetype == "text/event-stream"
+            events = (await response.get_data(as_text=True)).strip().split("\n\n")
+
+        assert len(events) == 2
+        first_id = events[0].split("\n")[0][len("id: "):]
+        assert "chunk1" in events[0]
+
+        # Reconnect after the first event
+        resumed = await client.post(
+            "/conversation",
+            json=request_body,
+            headers={**request_headers, "Last-Event-ID": first_id},
+        )
+        replayed = (await resumed.get_data(as_text=True)).strip().split("\n\n")
+
+        unknown = await client.post(
+            "/conversation",
+            json=request_body,
+            headers={**request_headers, "Last-Event-ID": "missing:1"},
+        )
+
+    assert len(replayed) == 1
+    assert "chunk2" in replayed[0]
+    assert unknown.status_code == 404
+    assert (await unknown.get_json())["code"] == "stream_not_found"
+    mock_stream.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_resume_reports_evicted_events(app, client):
+    request_body = {
+        "history_metadata": {},
+        "client_id": "test_client",
+        "messages": [{"content": "test query", "role": "user"}],
+    }
+    request_headers = {"Accept": "text/event-stream"}
+
+    with patch(
+        "app.stream_response_from_wealth_assistant",
+        return_value=fake_internal_stream_response,
+    ), patch("backend.common.config.config.USE_INTERNAL_STREAM", True), patch(
+        "backend.common.config.config.SSE_REPLAY_MAX_EVENTS", 1
+    ):
+        async with app.app_context():
+            response = await stream_chat_request(request_body, request_headers)
+            events = (await response.get_data(as_text=True)).strip().split("\n\n")
+        stream_id = events[0].split("\n")[0][len("id: "):].split(":")[0]
+
+        # Only the last event is still buffered
+        resumed = await client.post(
+            "/conversation",
+            json=request_body,
+            headers={**request_headers, "Last-Event-ID": f"{stream_id}:0"},
+        )
+
+    assert resumed.status_code == 410
+    assert (await resumed.get_json())["code"] == "events_evicted"
+
+
+@pytest.mark.asyncio
+@patch("app.get_authenticated_user_details")
+@patch("app.init_cosmosdb_client")
+async def test_add_conversation_resume_does_not_write_history(
+    mock_init_cosmosdb_client, mock_get_authenticated_user_details, client
+):
+    mock_get_authenticated_user_details.return_value = {
+        "user_principal_id": "test_user"
+    }
+    mock_cosmos_client = AsyncMock()
+    mock_init_cosmosdb_client.return_value = mock_cosmos_client
+
+    with patch("backend.common.config.config.USE_INTERNAL_STREAM", True):
+        response = await client.post(
+            "/history/generate",
+            json={"messages": [{"role": "user", "content": "Hello"}]},
+            headers={"Accept": "text/event-stream", "Last-Event-ID": "missing:3"},
+        )
+
+    assert response.status_code == 404
+    mock_cosmos_client.create_conversation.assert_not_called()
+    mock_cosmos_client.create_message.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_stream_chat_request_sends_tool_progress_frames():
+    request_body = {
+        "history_metadata": {},
+        "client_id": "test_client",
+        "messages": [{"content": "test query", "role": "user"}],
+    }
+
+    sql_tool = ChatWithDataPlugin.get_SQL_Response.__kernel_function_name__
+
+    async def stream_with_tool_call():
+        yield ToolProgress(sql_tool, "started", tool_label(sql_tool))
+        yield ToolProgress(sql_tool, "completed", tool_label(sql_tool), 1200)
+        yield "answer"
+
+    with patch(
+        "app.stream_response_from_wealth_assistant",
+        return_value=stream_with_tool_call,
+    ), patch("backend.common.config.config.USE_INTERNAL_STREAM", True):
+        async with create_app().app_context():
+            response = await stream_chat_request(request_body, {})
+            lines = (await response.get_data(as_text=True)).strip().split("\n")
+
+    frames = [json.loads(line) for line in lines]
+    assert [frame["choices"] for frame in frames[:2]] == [[], []]
+    assert frames[0]["progress"] == {
+        "tool": "ChatWithSQLDatabase",
+        "status": "started",
+        "message": "Querying portfolio data",
+        "elapsed_ms": 0,
+    }
+    assert frames[1]["progress"]["status"] == "completed"
+    assert frames[2]["choices"][0]["messages"][0]["content"] == "answer"
@@ -0,0 +1,149 @@
+import asyncio
+import io
+import json
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+
+from tools.data_collection import (
+    Checkpoint,
+    EvaluationRunner,
+    OrderedWriter,
+    delta_text,
+    load_questions,
+)
+
+QA_SET = [
+    {
+        "client_id": "10005",
+        "qa_pairs": [
+            {"question": "slow question", "answer": "a"},
+            {"question": "throttled question", "answer": "b"},
+            {"question": "fast question", "answer": "c"},
+        ],
+    }
+]
+
+
+def ndjson(text):
+    chunk = {"choices": [{"messages": [{"role": "assistant", "content": text}]}]}
+    return (json.dumps(chunk) + "\n").encode("utf-8")
+
+
+@pytest_asyncio.fixture
+async def backend():
+    calls = []
+
+    async def conversation(request):
+        body = await request.json()
+        question = body["messages"][-1]["content"]
+        calls.append(question)
+        if question == "throttled question" and calls.count(question) == 1:
+            return web.Response(status=429, headers={"Retry-After": "0"})
+        if question == "slow question":
+            await asyncio.sleep(0.05)
+        response = web.StreamResponse()
+        await response.prepare(request)
+        for word in ("Answer", " to ", question):
+            await response.write(ndjson(word))
+        await response.write_eof()
+        return response
+
+    web_app = web.Application()
+    web_app.router.add_post("/conversation", conversation)
+    runner = web.AppRunner(web_app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    yield f"http://127.0.0.1:{port}", calls
+    await runner.cleanup()
+
+
+def test_delta_text_reads_ndjson_and_sse_lines():
+    assert delta_text(ndjson("hi").strip()) == "hi"
+    assert delta_text(b"data: " + ndjson("there")) == "there"
+    assert delta_text(b"{}") == ""
+    assert delta_text(b": heartbeat") == ""
+
+
+def test_ordered_writer_holds_back_out_of_order_records():
+    # Arrange
+    out = io.StringIO()
+    writer = OrderedWriter(out)
+
+    # Act
+    writer.put(1, {"i": 1})
+    written_early = out.getvalue()
+    writer.put(0, {"i": 0})
+
+    # Assert
+    assert written_early == ""
+    assert [json.loads(line)["i"] for line in out.getvalue().splitlines()] == [0, 1]
+
+
+@pytest.mark.asyncio
+async def test_runner_retries_writes_in_order_and_resumes(backend, tmp_path):
+    # Arrange
+    base_url, calls = backend
+    questions = load_questions(QA_SET)
+    checkpoint_path = str(tmp_path / "checkpoint.jsonl")
+    runner = EvaluationRunner(base_url, concurrency=3, base_delay=0)
+
+    # Act
+    out = io.StringIO()
+    checkpoint = Checkpoint(checkpoint_path)
+    stats = await runner.run(questions, OrderedWriter(out), checkpoint)
+    checkpoint.close()
+
+    # Assert
+    records = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [r["messages"][0]["content"] for r in records] == [
+        "slow question",
+        "throttled question",
+        "fast question",
+    ]
+    assert records[0]["messages"][1]["content"] == "Answer to slow question"
+    assert records[1]["attempts"] == 2
+    assert records[2]["question_tokens"] > 0
+    assert records[2]["answer_tokens"] > 0
+    assert records[2]["ground_truth"] == "c"
+    assert stats["answered"] == 3 and stats["retries"] == 1
+
+    # Act: a second run answers nothing new
+    calls.clear()
+    out = io.StringIO()
+    stats = await EvaluationRunner(base_url).run(
+        questions, OrderedWriter(out), Checkpoint(checkpoint_path)
+    )
+
+    # Assert
+    assert calls == []
+    assert stats["resumed"] == 3
+    assert [json.loads(line) for line in out.getvalue().splitlines()] == records
+
+
+@pytest.mark.asyncio
+async def test_runner_records_failures_without_checkpointing(backend, tmp_path):
+    # Arrange
+    base_url, _ = backend
+    questions = load_questions(QA_SET)
+    checkpoint = Checkpoint(str(tmp_path / "checkpoint.jsonl"))
+    runner = EvaluationRunner(base_url, max_retries=0)
+
+    # Act
+    out = io.StringIO()
+    stats = await runner.run(questions, OrderedWriter(out), checkpoint)
+    checkpoint.close()
+
+    # Assert
+    records = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert stats["failed"] == 1
+    assert records[1]["error"].startswith("HTTP 429")
+    assert questions[1].key not in checkpoint.load()
+
+
+def test_load_questions_requires_a_client_id():
+    with pytest.raises(ValueError):
+        load_questions([{"qa_pairs": [{"question": "q"}]}])
@@ -0,0 +1,74 @@
+import pytest
+
+from tools.load_test import (
+    LoadTestSettings,
+    RequestResult,
+    _classify,
+    check_thresholds,
+    percentile,
+    run,
+    summarize,
+)
+
+
+def test_percentile_nearest_rank():
+    values = [float(v) for v in range(1, 101)]
+
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([0.2], 99) == 0.2
+    assert percentile([], 99) is None
+
+
+def test_classify_matches_frontend_frame_handling():
+    assert _classify(b'{"choices": [{"messages": [{"content": "hi"}]}]}') == "text"
+    assert _classify(b'data: {"choices": [], "progress": {"status": "started"}}') == "progress"
+    assert _classify(b"{}") == "skip"
+    assert _classify(b"id: 3") == "skip"
+    assert _classify(b'{"choices": []}') == "rejected"
+
+
+def test_summary_flags_failures_and_slow_runs():
+    # Arrange
+    results = [RequestResult(True, 200, latency=0.5, ttft=0.1) for _ in range(9)]
+    results.append(RequestResult(False, 500, latency=0.01, error="HTTP 500"))
+
+    # Act
+    summary = summarize(results, elapsed=1.0)
+    violations = check_thresholds(summary, max_ttft_p99_ms=50, max_p99_ms=1000, min_rps=20)
+
+    # Assert
+    assert summary["succeeded"] == 9
+    assert summary["rps"] == 9.0
+    assert summary["ttft_ms"]["p99"] == 100.0
+    assert summary["errors"] == {"HTTP 500": 1}
+    assert len(violations) == 3  # failures, TTFT and throughput; latency is within limits
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "scenario,event_stream", [("conversation", False), ("history", True)]
+)
+async def test_load_test_runs_offline(scenario, event_stream):
+    # Arrange
+    settings = LoadTestSettings(
+        requests=6,
+        concurrency=3,
+        scenario=scenario,
+        event_stream=event_stream,
+        first_token_latency=0,
+        token_latency=0,
+        tool_latency=0,
+        answer="Hello from the load test.",
+    )
+
+    # Act
+    summary = await run(settings, show_stages=True)
+
+    # Assert
+    assert summary["failed"] == 0, summary["errors"]
+    assert summary["succeeded"] == 6
+    assert summary["ttft_ms"]["p99"] is not None
+    assert 'stage="first_token"' in summary["stages"]
+    # Every request streamed a tool call's start and completion frames
+    assert summary["progress_frames"] >= 12
@@ -1,107 +1,384 @@
-import asyncio
-import json
-import os
-import sys
-
-from dotenv import load_dotenv
-
-import app
-
-# import the app.py module to gain access to the methods to construct payloads and
-# call the API through the sdk
-
-# Add parent directory to sys.path
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-
-
-# function to enable loading of the .env file into the global variables of the app.py module
-
-
-def load_env_into_module(module_name, prefix=""):
-    load_dotenv()
-    module = __import__(module_name)
-    for key, value in os.environ.items():
-        if key.startswith(prefix):
-            setattr(module, key[len(prefix) :], value)
-
-
-load_env_into_module("app")
-
-# some settings required in app.py
-
-app.SHOULD_STREAM = False
-app.SHOULD_USE_DATA = app.should_use_data()
-
-# format:
 """
+Generate evaluation data by asking the chat backend every question of a QA set.
+
+Questions are sent to a running backend's ``/conversation`` endpoint (locally
+or deployed) by a bounded pool of concurrent workers. Throttled or failed
+requests are retried with exponential backoff, honoring ``Retry-After`` on
+429s. Every answered question is appended to a checkpoint file keyed by a hash
+of the client id and question, so an interrupted run picks up where it left
+off. Results are written to the output JSONL as soon as they are ready, in the
+order of the input, with per-question latency, time to first token and the
+token counts of the question and answer text. The backend does not report
+model usage, so these are not the prompt tokens billed for the agent runs,
+which include instructions, history and tool results.
+
+Input format:
 [
   {
-    "qa_pairs":[{"question":"...", "answer":"..."}]
+    "client_id": "10005",            # optional, defaults to --client-id
+    "qa_pairs": [{"question": "...", "answer": "..."}]
   }
 ]
-"""
-
-generated_data_path = r"path/to/qa_input_file.json"
 
-with open(generated_data_path, "r") as file:
-    data = json.load(file)
-
-
-"""
-Process a list of q(and a) pairs outputting to a file as we go.
+Usage (from src/App):
+    python -m tools.data_collection qa_input.json eval_data.jsonl \\
+        --base-url http://127.0.0.1:50505 --client-id 10005 --concurrency 16
 """
 
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import sys
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
 
-async def process(data: list, file):
-    for qa_pairs_obj in data:
-        qa_pairs = qa_pairs_obj["qa_pairs"]
-        for qa_pair in qa_pairs:
-            question = qa_pair["question"]
-            messages = [{"role": "user", "content": question}]
-
-            print("processing question " + question)
-
-            request = {"messages": messages, "id": "1"}
-
-            response = await app.complete_chat_request(request)
-
-            # print(json.dumps(response))
-
-            messages = response["choices"][0]["messages"]
-
-            tool_message = None
-            assistant_message = None
-
-            for message in messages:
-                if message["role"] == "tool":
-                    tool_message = message["content"]
-                elif message["role"] == "assistant":
-                    assistant_message = message["content"]
-                else:
-                    raise ValueError("unknown message role")
+import aiohttp
 
-            # construct data for ai studio evaluation
+try:
+    import tiktoken
+except ImportError:  # pragma: no cover - token counts are estimated instead
+    tiktoken = None
 
-            user_message = {"role": "user", "content": question}
-            assistant_message = {"role": "assistant", "content": assistant_message}
+RETRY_STATUSES = {429, 500, 502, 503, 504}
 
-            # prepare citations
-            citations = json.loads(tool_message)
-            assistant_message["context"] = citations
 
-            # create output
-            messages = []
-            messages.append(user_message)
-            messages.append(assistant_message)
+class EvaluationError(Exception):
+    """A question could not be answered, after any retries."""
 
-            evaluation_data = {"messages": messages}
 
-            # incrementally write out to the jsonl file
-            file.write(json.dumps(evaluation_data) + "\n")
-            file.flush()
+@dataclass
+class Question:
+    index: int
+    client_id: str
+    question: str
+    answer: Optional[str] = None
 
+    @property
+    def key(self) -> str:
+        payload = json.dumps([self.client_id, self.question])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
 
-evaluation_data_file_path = r"path/to/output_file.jsonl"
 
-with open(evaluation_data_file_path, "w") as file:
-    asyncio.run(process(data, file))
+def load_questions(data: list, default_client_id: Optional[str] = None) -> List[Question]:
+    questions = []
+    for qa_pairs_obj in data:
+        client_id = str(qa_pairs_obj.get("client_id") or default_client_id or "")
+        for qa_pair in qa_pairs_obj["qa_pairs"]:
+            questions.append(
+                Question(
+                    index=len(questions),
+                    client_id=str(qa_pair.get("client_id") or client_id),
+                    question=qa_pair["question"],
+                    answer=qa_pair.get("answer"),
+                )
+            )
+    missing = [q.question for q in questions if not q.client_id]
+    if missing:
+        raise ValueError(f"{len(missing)} questions have no client_id; pass --client-id")
+    return questions
+
+
+_encoding = None
+
+
+def count_tokens(text: str) -> int:
+    """
+    Count tokens with tiktoken when it is installed, otherwise estimate them
+    at four characters per token.
+    """
+    global _encoding
+    if tiktoken is None:
+        return math.ceil(len(text) / 4)
+    if _encoding is None:
+        _encoding = tiktoken.get_encoding("o200k_base")
+    return len(_encoding.encode(text))
+
+
+def delta_text(line: bytes) -> str:
+    """
+    Return the assistant text in one NDJSON (or SSE ``data:``) line of the
+    streamed response.
+    """
+    if line.startswith(b"data:"):
+        line = line[5:]
+    line = line.strip()
+    if not line.startswith(b"{"):
+        return ""
+    try:
+        payload = json.loads(line)
+    except ValueError:
+        return ""
+    if payload.get("error"):
+        raise EvaluationError(str(payload["error"]))
+    text = []
+    for choice in payload.get("choices") or []:
+        for message in choice.get("messages") or []:
+            if message.get("role", "assistant") == "assistant" and message.get("content"):
+                text.append(message["content"])
+    return "".join(text)
+
+
+def retry_delay(attempt: int, retry_after: Optional[str], base_delay: float, max_delay: float) -> float:
+    if retry_after:
+        try:
+            return min(max_delay, max(0.0, float(retry_after)))
+        except ValueError:
+            pass
+    # Exponential backoff with full jitter
+    return random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+
+class Checkpoint:
+    """
+    Append-only JSONL of finished records keyed by question hash.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    def load(self) -> Dict[str, dict]:
+        records = {}
+        if not os.path.exists(self.path):
+            return records
+        with open(self.path, "r", encoding="utf-8") as file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A run killed mid-write leaves a partial last line
+                    continue
+                records[entry["key"]] = entry["record"]
+        return records
+
+    def append(self, key: str, record: dict):
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write(json.dumps({"key": key, "record": record}) + "\n")
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class OrderedWriter:
+    """
+    Writes records to a JSONL file in input order as soon as each one and all
+    of its predecessors are ready.
+    """
+
+    def __init__(self, file):
+        self.file = file
+        self.next_index = 0
+        self._pending: Dict[int, dict] = {}
+
+    def put(self, index: int, record: dict):
+        self._pending[index] = record
+        while self.next_index in self._pending:
+            self.file.write(json.dumps(self._pending.pop(self.next_index)) + "\n")
+            self.next_index += 1
+        self.file.flush()
+
+
+class EvaluationRunner:
+    """
+    Asks the backend each question with bounded concurrency and retries.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        concurrency: int = 8,
+        max_retries: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+        timeout: float = 300.0,
+        headers: Optional[Dict[str, str]] = None,
+    ):
+        self.url = base_url.rstrip("/") + "/conversation"
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.timeout = timeout
+        self.headers = headers or {}
+        self.stats = {"answered": 0, "resumed": 0, "failed": 0, "retries": 0}
+
+    async def ask(self, session, question: Question) -> dict:
+        body = {
+            "client_id": question.client_id,
+            "messages": [{"role": "user", "content": question.question}],
+        }
+        for attempt in range(self.max_retries + 1):
+            started = time.perf_counter()
+            try:
+                async with session.post(self.url, json=body, headers=self.headers) as response:
+                    if response.status in RETRY_STATUSES and attempt < self.max_retries:
+                        delay = retry_delay(
+                            attempt,
+                            response.headers.get("Retry-After") if response.status == 429 else None,
+                            self.base_delay,
+                            self.max_delay,
+                        )
+                        self.stats["retries"] += 1
+                        await asyncio.sleep(delay)
+                        continue
+                    if response.status != 200:
+                        text = await response.text()
+                        raise EvaluationError(f"HTTP {response.status}: {text[:200]}")
+
+                    chunks = []
+                    ttft = None
+                    pending = b""
+                    async for data in response.content.iter_any():
+                        pending += data
+                        *lines, pending = pending.split(b"\n")
+                        for line in lines:
+                            text = delta_text(line)
+                            if text:
+                                if ttft is None:
+                                    ttft = time.perf_counter() - started
+                                chunks.append(text)
+                    chunks.append(delta_text(pending))
+                    return {
+                        "content": "".join(chunks),
+                        "latency": time.perf_counter() - started,
+                        "ttft": ttft,
+                        "attempts": attempt + 1,
+                    }
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if attempt >= self.max_retries:
+                    raise EvaluationError(f"{type(e).__name__}: {e}") from e
+                self.stats["retries"] += 1
+                await asyncio.sleep(retry_delay(attempt, None, self.base_delay, self.max_delay))
+        raise EvaluationError("retries exhausted")
+
+    def to_record(self, question: Question, reply: dict) -> dict:
+        # Data for AI Studio evaluation, plus what is needed to compare runs
+        record = {
+            "messages": [
+                {"role": "user", "content": question.question},
+                {"role": "assistant", "content": reply["content"]},
+            ],
+            "client_id": question.client_id,
+            "latency_ms": round(reply["latency"] * 1000, 1),
+            "ttft_ms": None if reply["ttft"] is None else round(reply["ttft"] * 1000, 1),
+            "question_tokens": count_tokens(question.question),
+            "answer_tokens": count_tokens(reply["content"]),
+            "attempts": reply["attempts"],
+        }
+        if question.answer is not None:
+            record["ground_truth"] = question.answer
+        return record
+
+    async def run(self, questions: List[Question], writer: OrderedWriter, checkpoint: Checkpoint):
+        """
+        Answer every question not already in the checkpoint and write all
+        records, resumed or new, through the writer in input order.
+        """
+        done = checkpoint.load()
+        queue = asyncio.Queue()
+        for question in questions:
+            if question.key in done:
+                self.stats["resumed"] += 1
+                writer.put(question.index, done[question.key])
+            else:
+                queue.put_nowait(question)
+        total = queue.qsize()
+
+        async def worker(session):
+            while True:
+                try:
+                    question = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                try:
+                    record = self.to_record(question, await self.ask(session, question))
+                except EvaluationError as e:
+                    # Written for the record but not checkpointed, so a rerun retries it
+                    self.stats["failed"] += 1
+                    print(f"failed question {question.index}: {e}", file=sys.stderr)
+                    record = {
+                        "messages": [{"role": "user", "content": question.question}],
+                        "client_id": question.client_id,
+                        "error": str(e),
+                    }
+                else:
+                    self.stats["answered"] += 1
+                    checkpoint.append(question.key, record)
+                writer.put(question.index, record)
+                finished = self.stats["answered"] + self.stats["failed"]
+                if finished % 25 == 0 or finished == total:
+                    print(f"processed {finished}/{total} questions", file=sys.stderr)
+
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        connector = aiohttp.TCPConnector(limit=self.concurrency)
+        async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+            await asyncio.gather(*(worker(session) for _ in range(self.concurrency)))
+        return self.stats
+
+
+def parse_headers(values: List[str]) -> Dict[str, str]:
+    headers = {}
+    for value in values or []:
+        name, _, header_value = value.partition(":")
+        headers[name.strip()] = header_value.strip()
+    return headers
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate evaluation data from a QA set")
+    parser.add_argument("input", help="QA pairs JSON file")
+    parser.add_argument("output", help="Evaluation data JSONL file to write")
+    parser.add_argument("--base-url", default="http://127.0.0.1:50505")
+    parser.add_argument("--client-id", help="Client id for QA sets that do not set one")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--max-retries", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=300, help="Seconds per request")
+    parser.add_argument("--checkpoint", help="Defaults to <output>.checkpoint.jsonl")
+    parser.add_argument(
+        "--header",
+        action="append",
+        default=[],
+        help='Extra request header, e.g. "Cookie: AppServiceAuthSession=..."',
+    )
+    return parser.parse_args(argv)
+
+
+async def main_async(args) -> dict:
+    with open(args.input, "r", encoding="utf-8") as file:
+        questions = load_questions(json.load(file), args.client_id)
+
+    runner = EvaluationRunner(
+        args.base_url,
+        concurrency=args.concurrency,
+        max_retries=args.max_retries,
+        timeout=args.timeout,
+        headers=parse_headers(args.header),
+    )
+    checkpoint = Checkpoint(args.checkpoint or f"{args.output}.checkpoint.jsonl")
+    started = time.perf_counter()
+    try:
+        with open(args.output, "w", encoding="utf-8") as file:
+            stats = await runner.run(questions, OrderedWriter(file), checkpoint)
+    finally:
+        checkpoint.close()
+    stats["elapsed_s"] = round(time.perf_counter() - started, 1)
+    return stats
+
+
+def main(argv=None) -> int:
+    stats = asyncio.run(main_async(parse_args(argv)))
+    print(json.dumps(stats), file=sys.stderr)
+    return 1 if stats["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
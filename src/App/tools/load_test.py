@@ -0,0 +1,687 @@
+"""
+Offline load test for the chat backend.
+
+Boots the real Quart app from ``app.create_app()`` under uvicorn on localhost,
+with every Azure dependency replaced by a local stand-in:
+
+* Azure OpenAI: an OpenAI-compatible HTTP server that streams a fixed answer
+  with a configurable delay before the first token and between tokens.
+* Foundry agents: a WealthAdvisor agent that runs a simulated tool call (a
+  sleep plus a query through the real SQL pool) and streams its answer from
+  the local OpenAI server.
+* Cosmos DB: the real ``CosmosConversationClient`` over an in-memory container.
+* SQL: the real connection pool and executor over a shared in-memory SQLite
+  database seeded with a few clients.
+
+Concurrent clients then post chat requests and the run reports throughput,
+time to first token (TTFT) and end-to-end latency percentiles. No network or
+Azure credentials are needed, so it can run on a laptop or in CI before a
+deploy. Thresholds turn it into a regression gate: the process exits with 1
+if a limit is exceeded.
+
+Usage (from src/App):
+    python -m tools.load_test --requests 500 --concurrency 50
+    python -m tools.load_test --scenario history --event-stream --json
+    python -m tools.load_test --max-ttft-p99-ms 300 --min-rps 40
+
+Clients and server share one event loop, so absolute numbers are lower than
+on a deployed instance; compare runs on the same machine.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import itertools
+import json
+import os
+import re
+import socket
+import sqlite3
+import sys
+import time
+import uuid
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import List, Optional
+from unittest.mock import patch
+
+import aiohttp
+from aiohttp import web
+
+# Allow running as a script from the tools directory
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# Settings applied before the app is imported, so nothing reaches Azure even if
+# a developer .env is present (load_dotenv does not override these)
+OFFLINE_ENVIRONMENT = {
+    "APPLICATIONINSIGHTS_CONNECTION_STRING": "",
+    "AZURE_SEARCH_SERVICE": "",
+    "AZURE_SEARCH_INDEX": "",
+    "AZURE_AI_AGENT_ENDPOINT": "http://127.0.0.1/loadtest",
+    "AZURE_OPENAI_MODEL": "gpt-4o-mini",
+    "AZURE_OPENAI_STREAM": "true",
+    "USE_INTERNAL_STREAM": "true",
+    "AZURE_COSMOSDB_ACCOUNT": "loadtest",
+    "AZURE_COSMOSDB_DATABASE": "db_conversation_history",
+    "AZURE_COSMOSDB_CONVERSATIONS_CONTAINER": "conversations",
+    "SAMPLE_DATA_MAINTENANCE_INTERVAL_SECONDS": "0",
+    "AGENT_BACKGROUND_WARMUP": "false",
+    "MS_DEFENDER_ENABLED": "false",
+}
+
+CLIENTS = [
+    (10005, "Karen Berg"),
+    (10006, "Danny Chen"),
+    (10007, "Chris Gonzales"),
+    (10008, "Susan Martin"),
+]
+
+QUESTIONS = [
+    "What were the key points of our last meeting?",
+    "Show the current asset allocation.",
+    "When is the next scheduled meeting?",
+    "How are the investment goals progressing?",
+]
+
+DEFAULT_ANSWER = (
+    "Based on the portfolio data, the client holds a balanced mix of equities, "
+    "fixed income and cash. Returns over the last quarter were in line with the "
+    "benchmark. The next review is scheduled for the coming month, where we "
+    "should revisit the retirement goal and the education savings plan."
+)
+
+
+@dataclass
+class LoadTestSettings:
+    requests: int = 200
+    concurrency: int = 20
+    scenario: str = "conversation"
+    event_stream: bool = False
+    first_token_latency: float = 0.05
+    token_latency: float = 0.01
+    tool_latency: float = 0.1
+    answer: str = DEFAULT_ANSWER
+
+
+@dataclass
+class RequestResult:
+    ok: bool
+    status: int
+    latency: float
+    ttft: Optional[float] = None
+    error: Optional[str] = None
+    progress_frames: int = 0
+
+
+# --------------------------
+# Azure OpenAI stand-in
+# --------------------------
+
+
+class FakeOpenAIServer:
+    """
+    OpenAI-compatible ``/v1/chat/completions`` endpoint on localhost.
+
+    Streaming requests get the answer word by word as server-sent events.
+    Non-streaming requests only come from conversation title generation and
+    get a JSON title back.
+    """
+
+    def __init__(self, settings: LoadTestSettings):
+        self.settings = settings
+        self.base_url = None
+        self._runner = None
+
+    async def start(self):
+        web_app = web.Application()
+        web_app.router.add_post("/v1/chat/completions", self.chat_completions)
+        self._runner = web.AppRunner(web_app, access_log=None)
+        await self._runner.setup()
+        port = free_port()
+        await web.TCPSite(self._runner, "127.0.0.1", port).start()
+        self.base_url = f"http://127.0.0.1:{port}/v1"
+
+    async def close(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def _chunk(self, model, delta, finish_reason=None):
+        return {
+            "id": "chatcmpl-loadtest",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }
+
+    async def chat_completions(self, request):
+        body = await request.json()
+        model = body.get("model", "")
+        await asyncio.sleep(self.settings.first_token_latency)
+
+        if not body.get("stream"):
+            content = json.dumps({"title": "Load test conversation"})
+            return web.json_response(
+                {
+                    "id": "chatcmpl-loadtest",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {"role": "assistant", "content": content},
+                            "finish_reason": "stop",
+                        }
+                    ],
+                }
+            )
+
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        for i, word in enumerate(self.settings.answer.split(" ")):
+            if i:
+                await asyncio.sleep(self.settings.token_latency)
+                word = " " + word
+            chunk = self._chunk(model, {"role": "assistant", "content": word})
+            await response.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+        done = self._chunk(model, {}, finish_reason="stop")
+        await response.write(f"data: {json.dumps(done)}\n\ndata: [DONE]\n\n".encode("utf-8"))
+        await response.write_eof()
+        return response
+
+
+class LocalOpenAIClientRegistry:
+    """
+    Stands in for OpenAIClientRegistry, handing out one client for the local server.
+    """
+
+    def __init__(self, base_url: str):
+        from openai import AsyncOpenAI
+
+        self.client = AsyncOpenAI(base_url=base_url, api_key="loadtest", max_retries=0)
+
+    async def get_client(self, endpoint: str, api_version: str):
+        return self.client
+
+    async def close(self):
+        await self.client.close()
+
+
+# --------------------------
+# Foundry agent stand-in
+# --------------------------
+
+
+class FakeWealthAdvisorAgent:
+    """
+    Mimics ``AzureAIAgent.invoke_stream`` for the WealthAdvisor agent.
+
+    Each run makes one simulated tool call, which waits ``tool_latency`` and
+    runs a query through the real SQL pool, then streams the answer from the
+    local OpenAI server. The tool call goes through the real tool progress
+    filter, so the stream carries the same progress frames as in production.
+    """
+
+    def __init__(self, settings: LoadTestSettings, openai_client):
+        self.settings = settings
+        self.openai_client = openai_client
+        # Only used by chat_service to cancel runs on threads that have an id
+        self.client = SimpleNamespace(agents=None)
+
+    async def _run_tool(self, context):
+        from backend.common.metrics import stage
+        from backend.services import sqldb_service
+
+        with stage("sql_execution"):
+            await asyncio.sleep(self.settings.tool_latency)
+            await sqldb_service.fetch_all("SELECT ClientId, Client FROM Clients")
+
+    async def invoke_stream(self, messages, thread, additional_instructions=None):
+        from backend.agents.tool_progress import tool_progress_filter
+        from backend.plugins.chat_with_data_plugin import ChatWithDataPlugin
+
+        function = SimpleNamespace(
+            name=ChatWithDataPlugin.get_SQL_Response.__kernel_function_name__
+        )
+        await tool_progress_filter(SimpleNamespace(function=function), self._run_tool)
+
+        stream = await self.openai_client.chat.completions.create(
+            model=OFFLINE_ENVIRONMENT["AZURE_OPENAI_MODEL"],
+            messages=[
+                {"role": "system", "content": additional_instructions or ""},
+                {"role": "user", "content": str(messages[-1].content)},
+            ],
+            stream=True,
+        )
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield SimpleNamespace(content=chunk.choices[0].delta.content, thread=thread)
+
+
+# --------------------------
+# Cosmos DB stand-in
+# --------------------------
+
+
+class InMemoryContainer:
+    """
+    The subset of the async Cosmos container API used by CosmosConversationClient.
+
+    ``query_items`` understands the parameterized queries that client issues:
+    equality on the bound parameters and ``c.type``, ``order by`` on one field
+    and ``offset``/``limit``.
+    """
+
+    def __init__(self):
+        self.items = {}
+
+    async def read(self):
+        return {"id": "loadtest"}
+
+    async def upsert_item(self, item):
+        self.items[(item["userId"], item["id"])] = dict(item)
+        return dict(item)
+
+    async def read_item(self, item, partition_key):
+        return dict(self.items[(partition_key, item)])
+
+    async def delete_item(self, item, partition_key):
+        self.items.pop((partition_key, item), None)
+
+    async def query_items(self, query, parameters=None):
+        params = {p["name"]: p["value"] for p in parameters or []}
+        item_type = re.search(r"c\.type\s*=\s*'(\w+)'", query).group(1)
+        # Messages are filtered on c.conversationId, conversations on c.id
+        id_field = "conversationId" if item_type == "message" else "id"
+
+        rows = [
+            item
+            for item in self.items.values()
+            if item["type"] == item_type
+            and item["userId"] == params.get("@userId")
+            and ("@conversationId" not in params or item[id_field] == params["@conversationId"])
+        ]
+        order = re.search(r"order by c\.(\w+) (asc|desc)", query, re.IGNORECASE)
+        if order:
+            rows.sort(key=lambda r: r.get(order.group(1), ""), reverse=order.group(2).lower() == "desc")
+        page = re.search(r"offset (\d+) limit (\d+)", query, re.IGNORECASE)
+        if page:
+            offset, limit = int(page.group(1)), int(page.group(2))
+            rows = rows[offset:offset + limit]
+        for row in rows:
+            yield dict(row)
+
+
+def in_memory_conversation_client():
+    from backend.services.cosmosdb_service import CosmosConversationClient
+
+    class InMemoryConversationClient(CosmosConversationClient):
+        def __init__(self):
+            container = InMemoryContainer()
+            self.cosmosdb_endpoint = "memory://loadtest"
+            self.credential = None
+            self.database_name = OFFLINE_ENVIRONMENT["AZURE_COSMOSDB_DATABASE"]
+            self.container_name = OFFLINE_ENVIRONMENT["AZURE_COSMOSDB_CONVERSATIONS_CONTAINER"]
+            self.enable_message_feedback = False
+            self.health = None
+            self.cosmosdb_client = SimpleNamespace(close=_async_noop)
+            self.database_client = container
+            self.container_client = container
+
+    return InMemoryConversationClient()
+
+
+# --------------------------
+# SQL stand-in
+# --------------------------
+
+
+class SQLiteDatabase:
+    """
+    Shared in-memory SQLite database with the Clients table.
+
+    The first connection keeps the database alive; the pool opens its own
+    connections to it from the SQL executor threads.
+    """
+
+    def __init__(self):
+        self.uri = f"file:loadtest-{uuid.uuid4().hex}?mode=memory&cache=shared"
+        self._keeper = self._connect()
+        self._keeper.execute("CREATE TABLE Clients (ClientId INTEGER PRIMARY KEY, Client TEXT)")
+        self._keeper.executemany("INSERT INTO Clients VALUES (?, ?)", CLIENTS)
+        self._keeper.commit()
+
+    def _connect(self):
+        return sqlite3.connect(self.uri, uri=True, check_same_thread=False)
+
+    def open_connection(self):
+        # Same contract as sqldb_service.open_connection: (connection, token expiry)
+        return self._connect(), None
+
+    def close(self):
+        self._keeper.close()
+
+
+# --------------------------
+# Harness
+# --------------------------
+
+
+async def _async_noop(*args, **kwargs):
+    return None
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextlib.asynccontextmanager
+async def serve_app(settings: LoadTestSettings):
+    """
+    Run the app with local stand-ins under uvicorn and yield its base URL.
+    """
+    for key, value in OFFLINE_ENVIRONMENT.items():
+        os.environ[key] = value
+
+    import uvicorn
+
+    import app as app_module
+    from backend.agents.agent_factory import AgentFactory
+    from backend.common.config import config
+    from backend.services import sqldb_service
+
+    openai_server = FakeOpenAIServer(settings)
+    await openai_server.start()
+    database = SQLiteDatabase()
+    registries = []
+
+    def make_registry(*args, **kwargs):
+        registry = LocalOpenAIClientRegistry(openai_server.base_url)
+        registries.append(registry)
+        return registry
+
+    async def initialize_agents(**kwargs):
+        return FakeWealthAdvisorAgent(settings, registries[-1].client)
+
+    # The module may already have been imported with other settings, e.g. by
+    # the test suite, so the values read at request time are patched as well
+    with contextlib.ExitStack() as stack:
+        for name, value in {
+            "USE_INTERNAL_STREAM": True,
+            "SHOULD_STREAM": True,
+            "AZURE_OPENAI_MODEL": OFFLINE_ENVIRONMENT["AZURE_OPENAI_MODEL"],
+            "AI_PROJECT_ENDPOINT": OFFLINE_ENVIRONMENT["AZURE_AI_AGENT_ENDPOINT"],
+            "CHAT_HISTORY_ENABLED": True,
+            "SAMPLE_DATA_MAINTENANCE_INTERVAL_SECONDS": 0,
+            "AGENT_BACKGROUND_WARMUP": False,
+            "APPLICATIONINSIGHTS_CONNECTION_STRING": "",
+            "METRICS_ENDPOINT_ENABLED": True,
+        }.items():
+            stack.enter_context(patch.object(config, name, value))
+        stack.enter_context(patch.object(app_module, "SHOULD_USE_DATA", False))
+        stack.enter_context(patch.object(app_module, "MS_DEFENDER_ENABLED", False))
+        stack.enter_context(patch.object(app_module, "OpenAIClientRegistry", make_registry))
+        stack.enter_context(
+            patch.object(app_module, "init_cosmosdb_client", in_memory_conversation_client)
+        )
+        stack.enter_context(patch.object(AgentFactory, "initialize_agents", initialize_agents))
+        stack.enter_context(patch.object(AgentFactory, "delete_all_agent_instance", _async_noop))
+        stack.enter_context(patch.object(sqldb_service, "open_connection", database.open_connection))
+
+        port = free_port()
+        server = uvicorn.Server(
+            uvicorn.Config(
+                app_module.create_app(),
+                host="127.0.0.1",
+                port=port,
+                log_level="warning",
+                lifespan="on",
+            )
+        )
+        serve_task = asyncio.create_task(server.serve())
+        try:
+            while not server.started:
+                if serve_task.done():
+                    serve_task.result()
+                    raise RuntimeError("uvicorn exited before it started")
+                await asyncio.sleep(0.01)
+            yield f"http://127.0.0.1:{port}"
+        finally:
+            server.should_exit = True
+            await serve_task
+            await openai_server.close()
+            database.close()
+
+
+def _classify(line: bytes) -> str:
+    """
+    Classify one NDJSON line or SSE field the way the chat frontend reads it.
+
+    Returns "text" for an answer chunk, "progress" for a tool progress frame,
+    "skip" for blank lines, ``{}``, SSE ids, events and comments, and
+    "rejected" for any other frame, which the chat history request path in
+    Chat.tsx would report as an error.
+    """
+    if line.startswith(b"data:"):
+        line = line[5:]
+    line = line.strip()
+    if not line.startswith(b"{") or line == b"{}":
+        return "skip"
+    try:
+        payload = json.loads(line)
+    except ValueError:
+        return "rejected"
+    if payload.get("progress") and not payload.get("choices"):
+        return "progress"
+    choices = payload.get("choices") or [{}]
+    messages = choices[0].get("messages") or [{}]
+    return "text" if messages[0].get("content") else "rejected"
+
+
+async def _send(session, base_url: str, settings: LoadTestSettings, index: int) -> RequestResult:
+    client_id, _ = CLIENTS[index % len(CLIENTS)]
+    body = {
+        "client_id": str(client_id),
+        "messages": [{"role": "user", "content": QUESTIONS[index % len(QUESTIONS)]}],
+    }
+    path = "/history/generate" if settings.scenario == "history" else "/conversation"
+    headers = {"Accept": "text/event-stream"} if settings.event_stream else {}
+
+    started = time.perf_counter()
+    ttft = None
+    counts = {"text": 0, "progress": 0, "skip": 0, "rejected": 0}
+    try:
+        async with session.post(base_url + path, json=body, headers=headers) as response:
+            pending = b""
+            async for data in response.content.iter_any():
+                pending += data
+                *lines, pending = pending.split(b"\n")
+                for line in lines:
+                    kind = _classify(line)
+                    counts[kind] += 1
+                    if kind == "text" and ttft is None:
+                        ttft = time.perf_counter() - started
+            kind = _classify(pending)
+            counts[kind] += 1
+            if kind == "text" and ttft is None:
+                ttft = time.perf_counter() - started
+            latency = time.perf_counter() - started
+
+            error = None
+            if response.status != 200:
+                error = f"HTTP {response.status}"
+            elif counts["rejected"]:
+                error = "frame rejected by client"
+            elif ttft is None:
+                error = "no text"
+            return RequestResult(
+                error is None, response.status, latency, ttft, error, counts["progress"]
+            )
+    except Exception as e:
+        return RequestResult(False, 0, time.perf_counter() - started, None, repr(e))
+
+
+async def run_load(base_url: str, settings: LoadTestSettings):
+    """
+    Send ``settings.requests`` requests from ``settings.concurrency`` clients.
+
+    Returns the per-request results and the wall-clock duration of the run.
+    """
+    results: List[RequestResult] = []
+    counter = itertools.count()
+    timeout = aiohttp.ClientTimeout(total=300)
+    connector = aiohttp.TCPConnector(limit=settings.concurrency)
+
+    async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+
+        async def client():
+            while True:
+                index = next(counter)
+                if index >= settings.requests:
+                    return
+                results.append(await _send(session, base_url, settings, index))
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(settings.concurrency)))
+        elapsed = time.perf_counter() - started
+    return results, elapsed
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """
+    Nearest-rank percentile, or None for no values.
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def summarize(results: List[RequestResult], elapsed: float) -> dict:
+    ok = [r for r in results if r.ok]
+
+    def distribution(values):
+        return {
+            f"p{pct}": None if percentile(values, pct) is None else round(percentile(values, pct) * 1000, 1)
+            for pct in (50, 95, 99)
+        }
+
+    errors = {}
+    for result in results:
+        if not result.ok:
+            errors[result.error] = errors.get(result.error, 0) + 1
+    return {
+        "requests": len(results),
+        "succeeded": len(ok),
+        "failed": len(results) - len(ok),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "rps": round(len(ok) / elapsed, 2) if elapsed > 0 else 0.0,
+        "progress_frames": sum(r.progress_frames for r in results),
+        "ttft_ms": distribution([r.ttft for r in ok]),
+        "latency_ms": distribution([r.latency for r in ok]),
+    }
+
+
+def check_thresholds(summary: dict, max_ttft_p99_ms=None, max_p99_ms=None, min_rps=None) -> List[str]:
+    """
+    Return a message per violated threshold; empty if the run passes.
+    """
+    violations = []
+    if summary["failed"]:
+        violations.append(f"{summary['failed']} requests failed: {summary['errors']}")
+    ttft_p99 = summary["ttft_ms"]["p99"]
+    if max_ttft_p99_ms is not None and ttft_p99 is not None and ttft_p99 > max_ttft_p99_ms:
+        violations.append(f"TTFT p99 {ttft_p99}ms exceeds {max_ttft_p99_ms}ms")
+    latency_p99 = summary["latency_ms"]["p99"]
+    if max_p99_ms is not None and latency_p99 is not None and latency_p99 > max_p99_ms:
+        violations.append(f"latency p99 {latency_p99}ms exceeds {max_p99_ms}ms")
+    if min_rps is not None and summary["rps"] < min_rps:
+        violations.append(f"throughput {summary['rps']} rps is below {min_rps} rps")
+    return violations
+
+
+async def run(settings: LoadTestSettings, show_stages: bool = False) -> dict:
+    async with serve_app(settings) as base_url:
+        # One request first so startup work is not counted in the run
+        async with aiohttp.ClientSession() as session:
+            await _send(session, base_url, settings, 0)
+            from backend.common.metrics import stage_histograms
+
+            stage_histograms.reset()
+        results, elapsed = await run_load(base_url, settings)
+        summary = summarize(results, elapsed)
+        if show_stages:
+            async with aiohttp.ClientSession() as session:
+                async with session.get(base_url + "/metrics") as response:
+                    summary["stages"] = await response.text()
+    return summary
+
+
+def print_summary(summary: dict, settings: LoadTestSettings):
+    print(
+        f"{settings.scenario} x{summary['requests']} at concurrency {settings.concurrency}"
+        f"{' (SSE)' if settings.event_stream else ''}"
+    )
+    print(f"  succeeded  {summary['succeeded']}, failed {summary['failed']}")
+    print(f"  throughput {summary['rps']} req/s over {summary['elapsed_s']}s")
+    for label, key in (("TTFT", "ttft_ms"), ("latency", "latency_ms")):
+        dist = summary[key]
+        print(f"  {label:<10} p50 {dist['p50']}ms  p95 {dist['p95']}ms  p99 {dist['p99']}ms")
+    if summary.get("stages"):
+        print(summary["stages"])
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline load test for the chat backend")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--scenario", choices=("conversation", "history"), default="conversation")
+    parser.add_argument("--event-stream", action="store_true", help="Request SSE instead of NDJSON")
+    parser.add_argument("--first-token-latency-ms", type=float, default=50)
+    parser.add_argument("--token-latency-ms", type=float, default=10)
+    parser.add_argument("--tool-latency-ms", type=float, default=100)
+    parser.add_argument("--max-ttft-p99-ms", type=float)
+    parser.add_argument("--max-p99-ms", type=float)
+    parser.add_argument("--min-rps", type=float)
+    parser.add_argument("--stages", action="store_true", help="Print the server's stage histograms")
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    settings = LoadTestSettings(
+        requests=args.requests,
+        concurrency=args.concurrency,
+        scenario=args.scenario,
+        event_stream=args.event_stream,
+        first_token_latency=args.first_token_latency_ms / 1000,
+        token_latency=args.token_latency_ms / 1000,
+        tool_latency=args.tool_latency_ms / 1000,
+    )
+    summary = asyncio.run(run(settings, show_stages=args.stages))
+    violations = check_thresholds(
+        summary,
+        max_ttft_p99_ms=args.max_ttft_p99_ms,
+        max_p99_ms=args.max_p99_ms,
+        min_rps=args.min_rps,
+    )
+    summary["violations"] = violations
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print_summary(summary, settings)
+        for violation in violations:
+            print(f"FAIL: {violation}")
+    return 1 if violations else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())